@@ -1,54 +1,552 @@
+import time
+_SCRIPT_T0 = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
 import numpy as np
-# import sqlite3
-from datetime import datetime
-# import json
-import uuid
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from datetime import datetime, timedelta
+import json
+import hashlib
+import importlib
+import pickle
+import sqlite3
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import atexit
 import re
-import altair as alt
-from streamlit_scroll_to_top import scroll_to_here
-import mysql.connector
-import time
+from types import MappingProxyType
+from collections.abc import Mapping
+import threading
+import socket
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
 
 
-class DatabaseManager:
-    # self = object DatabaseManager itu sendiri
-    # Dipakai supaya data (db_config) bisa dipakai di semua function dalam class ini
-    # __init__ akan otomatis dipanggil saat DatabaseManager() dibuat
+# ==========================================
+# IMPORT MALAS & LAPORAN WAKTU STARTUP
+# ==========================================
+class StartupTimings:
+    """
+    Catatan waktu startup per proses: import modul berat & inisialisasi resource.
+    Laporan dicetak sekali ke terminal setelah halaman pertama selesai dirender;
+    yang dimuat sesudahnya (mis. sklearn saat halaman hasil) dicetak per baris.
+    Waktu bersifat inklusif (init engine ikut terhitung di init katalog TF-IDF, dst).
+    """
     def __init__(self):
-        # akses ke secrets (host, username, password, milik db)
-        self.db_config = st.secrets["mysql"]
-        self.init_db()
+        self._lock = threading.Lock()
+        self._rows = []
+        self._seen = set()
+        self.reported = False
+
+    def record(self, kind, name, seconds, once=False):
+        with self._lock:
+            if once:
+                if (kind, name) in self._seen:
+                    return
+                self._seen.add((kind, name))
+            self._rows.append((kind, name, seconds))
+            late = self.reported
+        if late:
+            print(f"⏱️ [startup] {kind} {name}: {seconds * 1000:.0f} ms")
+
+    def rows(self):
+        with self._lock:
+            return list(self._rows)
+
+    def report(self):
+        lines = ["⏱️ Laporan startup (proses ini):"]
+        for kind, name, seconds in self.rows():
+            lines.append(f"   {kind:<6} {name:<45} {seconds * 1000:8.0f} ms")
+        return "\n".join(lines)
+
+    def first_paint(self, seconds):
+        """Dipanggil di akhir run script; hanya run pertama per proses yang dicatat."""
+        with self._lock:
+            if self.reported:
+                return
+            self._rows.append(("paint", "halaman pertama (sejak awal script)", seconds))
+            self.reported = True
+        print(self.report())
+
+
+@st.cache_resource(show_spinner=False)
+def get_startup_timings():
+    """Satu StartupTimings per proses (script di-exec ulang tiap rerun)."""
+    return StartupTimings()
+
+
+@contextmanager
+def startup_timer(kind, name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_startup_timings().record(kind, name, time.perf_counter() - t0)
 
-    # 1. BIKIN KONEKSI
-    def get_connection(self):
-        return mysql.connector.connect(
-            host=self.db_config["host"],
-            user=self.db_config["user"],
-            password=self.db_config["password"],
-            database=self.db_config["database"],
-            port=self.db_config["port"]
+
+class LazyModule:
+    """
+    Modul yang baru di-import saat atributnya pertama kali dipakai.
+    Halaman cover/profil/kuesioner tidak butuh sklearn, pandas, mysql, pyarrow,
+    jadi import berat itu ditunda sampai halaman hasil / lapisan DB benar-benar memakainya.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            if self._name in sys.modules:
+                self._module = sys.modules[self._name]
+            else:
+                with startup_timer("import", self._name):
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "lazy"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+pd = LazyModule("pandas")
+sk_text = LazyModule("sklearn.feature_extraction.text")
+sk_pairwise = LazyModule("sklearn.metrics.pairwise")
+sparse = LazyModule("scipy.sparse")
+mysql_connector = LazyModule("mysql.connector")
+pa = LazyModule("pyarrow")
+pq = LazyModule("pyarrow.parquet")
+scroll_to_top = LazyModule("streamlit_scroll_to_top")
+
+get_startup_timings().record("import", "eager (streamlit, numpy, stdlib)",
+                             time.perf_counter() - _SCRIPT_T0, once=True)
+
+
+class PooledConnection:
+    """
+    Pembungkus koneksi dari ConnectionPool.
+    Semua atribut diteruskan ke koneksi asli (cursor, commit, ...),
+    tapi close() MENGEMBALIKAN koneksi ke pool, bukan memutusnya.
+    """
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise AttributeError(f"Koneksi sudah dikembalikan ke pool ('{name}')")
+        return getattr(conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Jaring pengaman: koneksi yang lupa di-close tetap kembali ke pool
+        if self.__dict__.get("_conn") is not None:
+            self._pool.stats_counter("leaked")
+            self.close()
+
+
+class ConnectionPool:
+    """
+    Pool koneksi MySQL/TiDB yang dibatasi (max_size) dan dipakai bersama semua session.
+    - Koneksi dibuat lazy; jika semua terpakai, acquire() menunggu sampai 'timeout' detik.
+    - Health check (ping) untuk koneksi yang sudah menganggur > health_check_after detik.
+    - Koneksi menganggur > idle_timeout atau berumur > max_lifetime ditutup & diganti.
+    """
+    def __init__(self, connect, max_size=5, timeout=10.0, idle_timeout=300.0,
+                 max_lifetime=1800.0, health_check_after=30.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = []          # [(conn, dibuat_pada, terakhir_dipakai)]
+        self._born = {}          # id(conn) -> waktu dibuat (koneksi yang sedang dipinjam)
+        self._total = 0          # jumlah koneksi hidup (idle + dipinjam)
+        self._stats = {"created": 0, "reused": 0, "closed": 0, "health_failures": 0,
+                       "waits": 0, "timeouts": 0, "leaked": 0}
+
+    def stats_counter(self, key, n=1):
+        with self._cond:
+            self._stats[key] += n
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._stats["closed"] += 1
+
+    def _expired(self, born, last_used, now):
+        return now - born > self.max_lifetime or now - last_used > self.idle_timeout
+
+    def acquire(self):
+        """Pinjam koneksi (PooledConnection). Raise TimeoutError jika pool penuh terlalu lama."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                # 1. Pakai koneksi idle terbaru (LIFO) yang belum kedaluwarsa
+                while self._idle:
+                    conn, born, last_used = self._idle.pop()
+                    if self._expired(born, last_used, now):
+                        self._close(conn)
+                        self._total -= 1
+                        continue
+                    if now - last_used > self.health_check_after:
+                        try:
+                            conn.ping(reconnect=False)
+                        except Exception:
+                            self._stats["health_failures"] += 1
+                            self._close(conn)
+                            self._total -= 1
+                            continue
+                    self._born[id(conn)] = born
+                    self._stats["reused"] += 1
+                    return PooledConnection(self, conn)
+
+                # 2. Masih ada slot -> buat koneksi baru (di luar lock)
+                if self._total < self.max_size:
+                    self._total += 1
+                    break
+
+                # 3. Pool penuh -> tunggu koneksi dikembalikan
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise TimeoutError(f"Pool koneksi penuh ({self.max_size}) selama {self.timeout} detik")
+                self._stats["waits"] += 1
+                self._cond.wait(remaining)
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._born[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Kembalikan koneksi ke pool (transaksi yang belum di-commit di-rollback)."""
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            born = self._born.pop(id(conn), time.monotonic())
+            now = time.monotonic()
+            if healthy and now - born <= self.max_lifetime:
+                self._idle.append((conn, born, now))
+            else:
+                self._close(conn)
+                self._total -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        """Tutup semua koneksi idle (koneksi yang sedang dipinjam ditutup saat dikembalikan)."""
+        with self._cond:
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._close(conn)
+                self._total -= 1
+
+    def stats(self):
+        """Statistik pool: ukuran, koneksi idle/dipinjam & counter kejadian."""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._total,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                **self._stats,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_connection_pool():
+    """
+    Satu ConnectionPool per proses (dipakai bersama semua session).
+    Ukuran & timeout bisa diatur di secrets [mysql]: pool_size, pool_timeout,
+    pool_idle_timeout, pool_max_lifetime, pool_health_check_after.
+    """
+    cfg = st.secrets["mysql"]
+
+    def connect():
+        conn = mysql_connector.connect(
+            host=cfg["host"],
+            user=cfg["user"],
+            password=cfg["password"],
+            database=cfg["database"],
+            port=cfg["port"]
         )
-    
-    # 2. BIKIN TABEL (Jalan otomatis saat pertama kali)
-    def init_db(self):
-        conn = self.get_connection()
-        # perantara python ke sql
-        cursor = conn.cursor()
-        db_name = self.db_config["database"] # Ambil nama DB dari secrets
+        if cfg.get("id_mode") == "auto_random":
+            # user_id diisi aplikasi (IdGenerator) -> TiDB harus mengizinkan nilai eksplisit
+            cursor = conn.cursor()
+            cursor.execute("SET @@allow_auto_random_explicit_insert = 1")
+            cursor.close()
+        return conn
+
+    return ConnectionPool(
+        connect=connect,
+        max_size=int(cfg.get("pool_size", 5)),
+        timeout=float(cfg.get("pool_timeout", 10)),
+        idle_timeout=float(cfg.get("pool_idle_timeout", 300)),
+        max_lifetime=float(cfg.get("pool_max_lifetime", 1800)),
+        health_check_after=float(cfg.get("pool_health_check_after", 30)),
+    )
 
-        # 1. Bikin Database dulu kalau belum ada
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_name}")
-        
-        # 2. Pilih Database-nya
-        cursor.execute(f"USE {db_name}")
-        
 
-        # 2. Buat Tabel Baru (Menggunakan single quote ''' agar aman)
-        create_table_query = '''
+# ==========================================
+# ID USER (BIGINT, BERURUTAN WAKTU)
+# ==========================================
+ID_EPOCH_MS = 1704067200000   # 2024-01-01 00:00:00 UTC
+
+class IdGenerator:
+    """
+    Generator user_id BIGINT: unik, ringkas & berurutan waktu (mirip ULID/Snowflake).
+    Layout 63 bit (bit tanda selalu 0), sama dengan AUTO_RANDOM TiDB:
+        [shard_bits][41 bit ms sejak ID_EPOCH_MS][7 bit node][10 bit sequence]
+    - shard dipilih round-robin per id -> insert tersebar ke beberapa region.
+      shard_bits=0 -> id murni urut waktu (cocok untuk MySQL/InnoDB).
+    - node unik per proses/replica menjamin tidak ada tabrakan antar proses: node_id tetap
+      dari konfigurasi, atau lease (NodeLease) yang menyewa node dari database.
+    - sequence 10 bit = 1024 id/ms; jika habis, pinjam ms berikutnya (tetap monoton).
+    """
+    TIME_BITS = 41
+    NODE_BITS = 7
+    SEQ_BITS = 10
+    MAX_SHARD_BITS = 63 - TIME_BITS - NODE_BITS - SEQ_BITS
+
+    def __init__(self, node_id=None, shard_bits=0, epoch_ms=ID_EPOCH_MS, lease=None):
+        if not 0 <= shard_bits <= self.MAX_SHARD_BITS:
+            raise ValueError(f"shard_bits harus 0..{self.MAX_SHARD_BITS}")
+        if (node_id is None) == (lease is None):
+            raise ValueError("isi salah satu: node_id atau lease")
+        if node_id is not None and not 0 <= node_id < (1 << self.NODE_BITS):
+            raise ValueError(f"node_id harus 0..{(1 << self.NODE_BITS) - 1}")
+        self.node_id = node_id
+        self.lease = lease
+        self.shard_bits = shard_bits
+        self.epoch_ms = epoch_ms
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._seq = 0
+        self._shard = 0
+
+    def next_id(self):
+        # node sewaan bisa berganti (sewa hilang -> node lain); id tetap unik & monoton per proses
+        node_id = self.node_id if self.lease is None else self.lease.current()
+        with self._lock:
+            now = int(time.time() * 1000)
+            if now > self._last_ms:
+                self._last_ms, self._seq = now, 0
+            else:
+                # ms yang sama / jam mundur -> lanjutkan sequence dari ms terakhir
+                self._seq += 1
+                if self._seq >> self.SEQ_BITS:
+                    self._last_ms, self._seq = self._last_ms + 1, 0
+            seq = self._seq
+            shard = self._shard & ((1 << self.shard_bits) - 1)
+            self._shard += 1
+            ts = self._last_ms - self.epoch_ms
+
+        low = (ts << (self.NODE_BITS + self.SEQ_BITS)) | (node_id << self.SEQ_BITS) | seq
+        return (shard << (63 - self.shard_bits)) | low
+
+    @classmethod
+    def sort_key(cls, user_id):
+        """Bagian id tanpa shard bits -> urutan waktu pembuatan."""
+        return user_id & ((1 << (cls.TIME_BITS + cls.NODE_BITS + cls.SEQ_BITS)) - 1)
+
+    @classmethod
+    def created_at(cls, user_id, epoch_ms=ID_EPOCH_MS):
+        ms = (cls.sort_key(user_id) >> (cls.NODE_BITS + cls.SEQ_BITS)) + epoch_ms
+        return datetime.fromtimestamp(ms / 1000)
+
+
+class NodeLease:
+    """
+    Sewa node_id IdGenerator dari tabel id_node_lease (migrasi v6), dipakai jika id_node kosong.
+    - claim(): ambil node yang belum disewa / sewanya kedaluwarsa. INSERT IGNORE & UPDATE
+      bersyarat per baris -> dua proses tidak pernah mendapat node yang sama.
+    - Thread heartbeat memperpanjang sewa tiap ttl/3; jika node sudah diambil proses lain
+      (sewa sempat kedaluwarsa), pindah ke node lain.
+    - current() dipanggil tiap membuat id: sewa yang habis menurut jam lokal diperpanjang dulu;
+      jika database tidak terjangkau -> error (lebih baik gagal daripada id dobel).
+    Kedaluwarsa memakai jam database (NOW(6)). Node proses yang mati bebas lagi setelah ttl;
+    id penyewa berikutnya tetap unik karena bagian waktunya sudah lewat.
+    """
+    def __init__(self, connect, ttl=60.0, owner=None, node_count=1 << IdGenerator.NODE_BITS):
+        self._connect = connect     # -> koneksi (context manager), mis. get_connection_pool().acquire
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+        self.node_count = node_count
+        self.node_id = None
+        self._valid_until = 0.0     # time.monotonic(); selalu <= expires_at di database
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _execute(self, sql, params=(), fetch=False):
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            if fetch:
+                return cursor.fetchall()
+            conn.commit()
+            return cursor.rowcount
+
+    def _hold(self, node, started):
+        # expires_at = NOW(6) saat query + ttl, dan NOW(6) >= started -> aman dipakai sampai started + ttl
+        self.node_id, self._valid_until = node, started + self.ttl
+
+    def claim(self):
+        """Sewa node bebas (urutan acak); RuntimeError jika semua node sedang disewa."""
+        us = int(self.ttl * 1_000_000)
+        busy = {row[0] for row in self._execute(
+            "SELECT node_id FROM id_node_lease WHERE expires_at >= NOW(6)", fetch=True)}
+        start = int.from_bytes(os.urandom(2), "big")
+        for i in range(self.node_count):
+            node = (start + i) % self.node_count
+            if node in busy:
+                continue
+            started = time.monotonic()
+            if self._execute("INSERT IGNORE INTO id_node_lease (node_id, owner, expires_at) "
+                             "VALUES (%s, %s, NOW(6) + INTERVAL %s MICROSECOND)",
+                             (node, self.owner, us)):
+                self._hold(node, started)
+                return node
+            started = time.monotonic()
+            if self._execute("UPDATE id_node_lease SET owner = %s, expires_at = NOW(6) + INTERVAL %s MICROSECOND "
+                             "WHERE node_id = %s AND expires_at < NOW(6)",
+                             (self.owner, us, node)):
+                self._hold(node, started)
+                return node
+        raise RuntimeError(f"Semua {self.node_count} id_node sedang disewa proses lain")
+
+    def renew(self):
+        """Perpanjang sewa; False jika node sudah diambil proses lain."""
+        started = time.monotonic()
+        if self._execute("UPDATE id_node_lease SET expires_at = NOW(6) + INTERVAL %s MICROSECOND "
+                         "WHERE node_id = %s AND owner = %s",
+                         (int(self.ttl * 1_000_000), self.node_id, self.owner)):
+            self._hold(self.node_id, started)
+            return True
+        return False
+
+    def _refresh(self):
+        lost = self.node_id
+        if lost is not None and self.renew():
+            return
+        self.node_id, self._valid_until = None, 0.0
+        node = self.claim()
+        if lost is not None:
+            print(f"⚠️ Sewa id_node {lost} diambil proses lain -> pindah ke id_node {node}")
+
+    def current(self):
+        with self._lock:
+            if time.monotonic() >= self._valid_until:
+                self._refresh()
+            return self.node_id
+
+    def start(self):
+        """Sewa pertama (gagal -> error saat startup) lalu jalankan thread heartbeat."""
+        print(f"🆔 id_node {self.current()} disewa oleh {self.owner}")
+        self._thread = threading.Thread(target=self._run, name="id-node-lease", daemon=True)
+        self._thread.start()
+        atexit.register(self.release)
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                with self._lock:
+                    self._refresh()
+            except Exception as e:
+                print(f"⚠️ Perpanjang sewa id_node gagal: {e}")
+
+    def release(self):
+        self._stop.set()
+        with self._lock:
+            if self.node_id is None:
+                return
+            try:
+                self._execute("DELETE FROM id_node_lease WHERE node_id = %s AND owner = %s",
+                              (self.node_id, self.owner))
+            except Exception as e:
+                print(f"⚠️ Gagal melepas sewa id_node {self.node_id}: {e}")
+            self.node_id, self._valid_until = None, 0.0
+
+
+def normalize_user_id(user_id):
+    """
+    Id lama (8 karakter hex dari uuid4) -> BIGINT yang sama dengan hasil migrasi v2
+    (CONV(user_id, 16, 10)). Id baru (int) dikembalikan apa adanya.
+    """
+    if isinstance(user_id, str) and re.fullmatch(r"[0-9a-fA-F]{8}", user_id):
+        return int(user_id, 16)
+    return user_id
+
+
+@st.cache_resource(show_spinner=False)
+def get_id_generator():
+    """
+    Satu IdGenerator per proses. secrets [mysql]:
+    - id_node: nomor unik per replica (0..127). Jika kosong, node disewa dari database
+      (NodeLease, lama sewa id_node_lease_ttl detik, default 60) -> tidak pernah dobel antar proses.
+    - id_shard_bits: default 5 untuk id_mode auto_random/shard_row_id, 0 untuk bigint.
+    """
+    cfg = st.secrets["mysql"]
+    shard_bits = _id_shard_bits(cfg)
+    node = cfg.get("id_node")
+    if node is not None:
+        return IdGenerator(node_id=int(node), shard_bits=shard_bits)
+    ensure_schema()   # tabel id_node_lease (migrasi v6)
+    lease = NodeLease(get_connection_pool().acquire, ttl=float(cfg.get("id_node_lease_ttl", 60)))
+    return IdGenerator(lease=lease.start(), shard_bits=shard_bits)
+
+
+def _id_shard_bits(cfg):
+    mode = cfg.get("id_mode", "bigint")
+    return int(cfg.get("id_shard_bits", 0 if mode == "bigint" else 5))
+
+
+# ==========================================
+# MIGRASI SKEMA (BERVERSI)
+# ==========================================
+# Daftar migrasi berurutan: (versi, deskripsi, [langkah]).
+# Langkah = SQL, (SQL, sudah_diterapkan(cursor)) atau fungsi(cursor) (lihat _run_migration_step).
+# DDL MySQL/TiDB tidak transaksional -> setiap langkah harus aman diulang bila migrasi gagal di tengah.
+# Tambah migrasi baru di AKHIR list; migrasi yang sudah jalan jangan diubah.
+MIGRATIONS = [
+    (1, "buat tabel mst_tbl", [
+        '''
         CREATE TABLE IF NOT EXISTS mst_tbl(
             user_id VARCHAR(50) PRIMARY KEY,
             created_at DATETIME,
@@ -70,7 +568,7 @@ class DatabaseManager:
             `EXT-2` INT, `CON-1` INT, `OPE-1` INT, `AGR-1` INT,
             `NEU-3` INT, `EXT-3` INT, `OPE-2` INT, `AGR-3` INT,
             `NEU-2` INT, `CON-3` INT, `EXT-1` INT,
-            
+
             rec_single TEXT,
             rec_hybrid TEXT,
             top3_sector_single TEXT,
@@ -82,345 +580,1212 @@ class DatabaseManager:
             chosen_h_list TEXT,
             feedback_hybrid TEXT
         )
+        ''',
+    ]),
+    (2, "user_id BIGINT berurutan waktu (id lama di legacy_user_id)", lambda options: _migration_bigint_user_id(options)),
+    (3, "jawaban TINYINT, daftar rekomendasi JSON", lambda options: _migration_typed_columns()),
+    (4, "index created_at untuk export bertahap", [
+        ("ALTER TABLE mst_tbl ADD INDEX idx_created_at (created_at, user_id)",
+         lambda cur: _index_exists(cur, "mst_tbl", "idx_created_at")),
+    ]),
+    # created_at = saat profil dibuat, bukan saat baris ditulis/diubah -> tidak bisa jadi watermark
+    (5, "kolom updated_at (waktu tulis terakhir) untuk export bertahap", [
+        ("ALTER TABLE mst_tbl ADD COLUMN updated_at DATETIME(6) NOT NULL "
+         "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)",
+         lambda cur: _column_type(cur, "mst_tbl", "updated_at") is not None),
+        ("ALTER TABLE mst_tbl ADD INDEX idx_updated_at (updated_at, user_id)",
+         lambda cur: _index_exists(cur, "mst_tbl", "idx_updated_at")),
+    ]),
+    (6, "tabel sewa id_node untuk IdGenerator (NodeLease)", [
         '''
-        
+        CREATE TABLE IF NOT EXISTS id_node_lease(
+            node_id SMALLINT PRIMARY KEY,
+            owner VARCHAR(100) NOT NULL,
+            expires_at DATETIME(6) NOT NULL
+        )
+        ''',
+    ]),
+]
+
+# Kolom data mst_tbl (selain kunci), dipakai migrasi v2 (tabel baru) & v3 (tipe kolom)
+_MST_DATA_COLUMNS = """
+    created_at DATETIME,
+    name VARCHAR(100),
+    kategori VARCHAR(100),
+    role_desc TEXT,
+    umur INT,
+    gender VARCHAR(50),
+    domisili VARCHAR(100),
+
+    `INN-CE1` INT, `SE-M1` INT, `NACH-FF2` INT, `LOC-I1` INT,
+    `SE-P2` INT, `INN-O2` INT, `SE-IP1` INT, `NACH-HS1` INT,
+    `SE-IF1` INT, `LOC-E2` INT, `SE-S1` INT, `INN-W1` INT,
+    `NACH-HS2` INT, `SE-IF2` INT, `INN-CE2` INT, `LOC-E1` INT,
+    `SE-M2` INT, `SE-S2` INT, `LOC-I2` INT, `INN-W2` INT,
+    `SE-P1` INT, `INN-O1` INT, `SE-IP2` INT, `NACH-FF1` INT,
+
+    `CON-2` INT, `OPE-3` INT, `NEU-1` INT, `AGR-2` INT,
+    `EXT-2` INT, `CON-1` INT, `OPE-1` INT, `AGR-1` INT,
+    `NEU-3` INT, `EXT-3` INT, `OPE-2` INT, `AGR-3` INT,
+    `NEU-2` INT, `CON-3` INT, `EXT-1` INT,
+
+    rec_single TEXT,
+    rec_hybrid TEXT,
+    top3_sector_single TEXT,
+    top3_sector_hybrid TEXT,
+    rate_single INT,
+    chosen_s_list TEXT,
+    feedback_single TEXT,
+    rate_hybrid INT,
+    chosen_h_list TEXT,
+    feedback_hybrid TEXT
+"""
+
+def _migration_bigint_user_id(options):
+    """
+    Ganti kunci mst_tbl dari VARCHAR acak ke BIGINT (lihat IdGenerator).
+    Tipe kolom PK tidak bisa diubah di TiDB, jadi: buat tabel baru, salin
+    (id hex lama -> CONV(user_id, 16, 10), teks aslinya di legacy_user_id), lalu tukar nama.
+    Tabel lama disimpan sebagai mst_tbl_legacy; baris yang tidak ikut tersalin
+    (id bukan hex 8 digit) dilaporkan sebelum tukar nama dan tetap ada di sana.
+    Semua langkah dilewati jika mst_tbl_legacy sudah ada (tukar nama sudah terjadi);
+    sebelum itu mst_tbl_v2 sisa percobaan gagal dibuang & dibuat ulang.
+    id_mode (secrets [mysql]):
+    - bigint       : BIGINT PRIMARY KEY biasa
+    - auto_random  : TiDB AUTO_RANDOM(shard_bits); id tetap diisi aplikasi (layout sama)
+    - shard_row_id : TiDB PK NONCLUSTERED + SHARD_ROW_ID_BITS / PRE_SPLIT_REGIONS
+    Opsi TiDB ditulis sebagai komentar /*T! ... */ sehingga diabaikan MySQL.
+    """
+    mode = options.get("id_mode", "bigint")
+    bits = int(options.get("id_shard_bits", 5))
+    if mode == "bigint":
+        key, table_opts = "user_id BIGINT NOT NULL PRIMARY KEY", ""
+    elif mode == "auto_random":
+        key, table_opts = f"user_id BIGINT NOT NULL /*T![auto_rand] AUTO_RANDOM({bits}) */ PRIMARY KEY", ""
+    elif mode == "shard_row_id":
+        key = "user_id BIGINT NOT NULL PRIMARY KEY /*T![clustered_index] NONCLUSTERED */"
+        table_opts = f"/*T! SHARD_ROW_ID_BITS = {bits} PRE_SPLIT_REGIONS = {min(bits, 4)} */"
+    else:
+        raise ValueError(f"id_mode tidak dikenal: {mode!r}")
+
+    data_cols = ", ".join(re.findall(r"(`[^`]+`|\w+) [A-Z]+", _MST_DATA_COLUMNS))
+    swapped = lambda cur: _table_exists(cur, "mst_tbl_legacy")
+    return [
+        ("DROP TABLE IF EXISTS mst_tbl_v2", swapped),
+        (f"""
+        CREATE TABLE mst_tbl_v2(
+            {key},
+            legacy_user_id VARCHAR(50),
+            {_MST_DATA_COLUMNS},
+            KEY idx_legacy_user_id (legacy_user_id)
+        ) {table_opts}
+        """, swapped),
+        (f"""
+        INSERT INTO mst_tbl_v2 (user_id, legacy_user_id, {data_cols})
+        SELECT CAST(CONV(user_id, 16, 10) AS UNSIGNED), user_id, {data_cols}
+        FROM mst_tbl WHERE user_id REGEXP '^[0-9a-fA-F]{{8}}$'
+        """, swapped),
+        lambda cur: swapped(cur) or _report_uncopied_users(cur),
+        ("RENAME TABLE mst_tbl TO mst_tbl_legacy, mst_tbl_v2 TO mst_tbl", swapped),
+    ]
+
+def _report_uncopied_users(cursor, limit=50):
+    """
+    Catat baris mst_tbl yang tidak ada di mst_tbl_v2 (id bukan hex 8 digit).
+    Baris ini tidak dihapus: setelah tukar nama hanya ada di mst_tbl_legacy.
+    Output: list user_id lama yang tertinggal.
+    """
+    cursor.execute("""
+        SELECT t.user_id FROM mst_tbl t
+        WHERE NOT EXISTS (SELECT 1 FROM mst_tbl_v2 v WHERE v.legacy_user_id = t.user_id)
+    """)
+    left = [row[0] for row in cursor.fetchall()]
+    if left:
+        shown = ", ".join(repr(u) for u in left[:limit]) + (" ..." if len(left) > limit else "")
+        print(f"⚠️ Migrasi v2: {len(left)} baris tidak disalin (user_id bukan hex 8 digit), "
+              f"tetap di mst_tbl_legacy: {shown}")
+    return left
+
+# Kolom list (dulu TEXT dipisah koma) -> JSON array sejak migrasi v3
+MST_LIST_COLUMNS = ("rec_single", "rec_hybrid", "top3_sector_single", "top3_sector_hybrid",
+                    "chosen_s_list", "chosen_h_list")
+
+def _migration_typed_columns():
+    """
+    - 39 kolom jawaban (skala 1-5) & rating: INT -> TINYINT UNSIGNED.
+    - Kolom list: TEXT "a, b, c" -> JSON ["a", "b", "c"] (kolom baru, backfill, tukar).
+    Satu perubahan per ALTER agar jalan juga di TiDB tanpa multi-schema change.
+    Tiap langkah dicek ke information_schema -> migrasi yang gagal di tengah bisa diulang:
+    kolom yang sudah TINYINT dilewati; kolom list dilanjutkan dari tahap terakhir
+    ({col}_json ada & {col} masih TEXT -> backfill/drop; tinggal {col}_json -> ganti nama).
+    """
+    small_ints = re.findall(r"(`[^`]+`) INT", _MST_DATA_COLUMNS) + ["rate_single", "rate_hybrid"]
+    statements = [(f"ALTER TABLE mst_tbl MODIFY {col} TINYINT UNSIGNED",
+                   lambda cur, name=col.strip("`"): _column_type(cur, "mst_tbl", name) == "tinyint")
+                  for col in small_ints]
+    for col in MST_LIST_COLUMNS:
+        old_type = lambda cur, col=col: _column_type(cur, "mst_tbl", col)
+        has_json = lambda cur, col=col: _column_type(cur, "mst_tbl", f"{col}_json") is not None
+        # tahap backfill/drop hanya selama kolom TEXT lama & kolom _json sama-sama ada
+        both = lambda cur, t=old_type, j=has_json: t(cur) not in (None, "json") and j(cur)
+        text_to_json = (
+            f"CASE WHEN {col} IS NULL THEN NULL "
+            f"WHEN TRIM({col}) = '' THEN JSON_ARRAY() "
+            rf"""ELSE CAST(CONCAT('["', REPLACE(REPLACE(REPLACE(TRIM({col}), '\\', '\\\\'), '"', '\\"'), ', ', '","'), '"]') AS JSON) END"""
+        )
+        statements += [
+            (f"ALTER TABLE mst_tbl ADD COLUMN {col}_json JSON",
+             lambda cur, t=old_type, j=has_json: t(cur) == "json" or j(cur)),
+            (f"UPDATE mst_tbl SET {col}_json = {text_to_json}", lambda cur, b=both: not b(cur)),
+            (f"ALTER TABLE mst_tbl DROP COLUMN {col}", lambda cur, b=both: not b(cur)),
+            (f"ALTER TABLE mst_tbl CHANGE COLUMN {col}_json {col} JSON",
+             lambda cur, t=old_type, j=has_json: t(cur) is not None or not j(cur)),
+        ]
+    return statements
+
+def _schema_value(value):
+    # information_schema kadang dikembalikan sebagai bytes/bytearray oleh mysql.connector
+    return value.decode() if isinstance(value, (bytes, bytearray)) else value
+
+def _table_exists(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,))
+    return bool(cursor.fetchall())
+
+def _column_type(cursor, table, column):
+    """Tipe data kolom (huruf kecil, mis. 'tinyint', 'json') atau None jika kolom tidak ada."""
+    cursor.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column))
+    rows = cursor.fetchall()
+    return _schema_value(rows[0][0]).lower() if rows else None
+
+def _index_exists(cursor, table, index):
+    cursor.execute(
+        "SELECT 1 FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index))
+    return bool(cursor.fetchall())
+
+def _run_migration_step(cursor, step):
+    """
+    Jalankan satu langkah migrasi:
+    - "SQL"                        : selalu dijalankan (harus idempoten, mis. IF NOT EXISTS)
+    - ("SQL", sudah_diterapkan)    : dilewati jika sudah_diterapkan(cursor) True
+    - fungsi(cursor)               : langkah Python (cek/laporan)
+    """
+    if callable(step):
+        step(cursor)
+        return
+    sql, applied = step if isinstance(step, tuple) else (step, None)
+    if applied is not None and applied(cursor):
+        return
+    cursor.execute(sql)
+
+def run_migrations(conn, options=None):
+    """
+    Jalankan migrasi yang belum tercatat di tabel schema_version (urut versi).
+    Dikunci dengan GET_LOCK agar beberapa proses/replica tidak migrasi bersamaan.
+    statements boleh berupa fungsi(options) -> [langkah] untuk DDL yang bergantung konfigurasi.
+    Versi baru dicatat setelah semua langkahnya selesai; jika gagal di tengah, jalankan ulang
+    -> langkah yang sudah diterapkan dilewati (lihat _run_migration_step).
+    Output: versi skema setelah migrasi.
+    """
+    options = options or {}
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(200),
+            applied_at DATETIME
+        )
+    """)
+    cursor.execute("SELECT GET_LOCK('schema_migrations', 60)")
+    cursor.fetchall()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cursor.fetchone()[0]
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            if callable(statements):
+                statements = statements(options)
+            for step in statements:
+                _run_migration_step(cursor, step)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (%s, %s, %s)",
+                (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+            print(f"✅ Migrasi skema v{version}: {description}")
+            current = version
+        return current
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+        cursor.fetchall()
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_schema():
+    """
+    Sekali per proses: jalankan migrasi (default) atau, jika secrets [mysql] auto_migrate = false
+    (migrasi dijalankan terpisah/out of band), cukup cek versi skema.
+    Session baru hanya memakai hasil cache ini -> tanpa round trip DDL.
+    """
+    target = MIGRATIONS[-1][0]
+    with startup_timer("init", "database (koneksi + skema)"), get_connection_pool().acquire() as conn:
+        cfg = st.secrets["mysql"]
+        if cfg.get("auto_migrate", True):
+            return run_migrations(conn, {
+                "id_mode": cfg.get("id_mode", "bigint"),
+                "id_shard_bits": _id_shard_bits(cfg),
+            })
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cursor.fetchone()[0]
+        if current < target:
+            print(f"⚠️ Skema database v{current}, aplikasi butuh v{target}. Jalankan run_migrations().")
+        return current
+
+
+class WriteBehindQueue:
+    """
+    Antrian tulis (write-behind) untuk data responden di mst_tbl.
+    - enqueue() hanya menulis ke journal lokal (append-only + fsync) lalu kembali;
+      pindah halaman tidak lagi menunggu database.
+    - Update untuk user_id yang sama digabung (coalesce) sampai di-flush.
+    - Thread flusher menulis per batch (satu transaksi, UPSERT). Batch gagal karena data
+      (row_error) -> ditulis ulang per baris; baris yang tetap gagal max_attempts kali dipindah
+      ke file dead-letter, jadi satu baris rusak tidak menahan tulisan lain. Gagal karena
+      koneksi/DB -> seluruh batch dikembalikan ke antrian & dicoba lagi dengan backoff.
+    - Journal per proses (<journal_path>.<host>-<pid>) dengan file .lock yang dikunci selama
+      proses hidup. Saat start, journal sendiri & journal proses lain yang sudah mati (lock bisa
+      diambil) di-replay -> update yang belum tersimpan sebelum crash tidak hilang.
+    """
+    def __init__(self, acquire, journal_path, table="mst_tbl", key="user_id",
+                 batch_size=200, flush_interval=1.0, batch_window=0.05, max_backoff=30.0,
+                 normalize_key=None, max_attempts=5, dead_letter_path=None, row_error=None):
+        self._acquire = acquire
+        self._normalize_key = normalize_key or (lambda k: k)
+        self._row_error = row_error or _is_row_error
+        self.base_path = journal_path
+        self.journal_path = f"{journal_path}.{socket.gethostname()}-{os.getpid()}"
+        self.dead_letter_path = dead_letter_path or journal_path + ".dead"
+        self.table = table
+        self.key = key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batch_window = batch_window
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+
+        self._cond = threading.Condition()
+        self._pending = {}       # user_id -> {kolom: nilai} (belum di-flush)
+        self._inflight = {}      # user_id -> {kolom: nilai} (sedang ditulis ke DB)
+        self._attempts = {}      # user_id -> jumlah gagal berturut-turut karena data
+        self._stopped = False
+        self._stats = {"enqueued": 0, "coalesced": 0, "replayed": 0, "adopted_journals": 0,
+                       "corrupt_lines": 0, "batches": 0, "rows_flushed": 0, "failures": 0,
+                       "row_failures": 0, "dead_lettered": 0}
+        self.last_error = None
+
+        self._lock_file = _lock_journal(self.journal_path)
+        if self._lock_file is None:
+            raise RuntimeError(f"Journal {self.journal_path} sedang dipakai proses lain")
+        self._replay(self.journal_path)
+        adopted = self._adopt_orphans()
+        self._compact()
+        for path, lock_file in adopted:
+            _remove_journal(path, lock_file)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- journal ---
+    def _replay(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # baris terakhir bisa terpotong saat crash -> lewati
+                    self._stats["corrupt_lines"] += 1
+                    continue
+                self._merge(rec["u"], rec["f"])
+                self._stats["replayed"] += 1
+
+    def _adopt_orphans(self):
+        """
+        Replay journal milik proses yang sudah mati (lock-nya bisa diambil), termasuk journal
+        bersama lama (<journal_path> tanpa akhiran). Output: [(path, lock file)] untuk dihapus
+        setelah isinya masuk journal sendiri.
+        """
+        folder, base = os.path.split(os.path.abspath(self.base_path))
+        prefix = base + "."
+        candidates = [self.base_path] + [
+            os.path.join(folder, name) for name in sorted(os.listdir(folder))
+            if name.startswith(prefix) and not name.endswith((".lock", ".tmp", ".dead"))
+        ]
+        adopted = []
+        for path in candidates:
+            if os.path.abspath(path) == os.path.abspath(self.journal_path) or not os.path.isfile(path):
+                continue
+            lock_file = _lock_journal(path)
+            if lock_file is None:
+                continue    # pemiliknya masih hidup
+            if not os.path.exists(path):
+                # sudah diambil proses lain sebelum lock kita dapat
+                _remove_journal(path, lock_file)
+                continue
+            self._replay(path)
+            self._stats["adopted_journals"] += 1
+            print(f"♻️ Write-behind: replay journal proses lain {path}")
+            adopted.append((path, lock_file))
+        return adopted
+
+    def _compact(self):
+        """Tulis ulang journal hanya berisi data yang belum tersimpan (atomic replace)."""
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rows in (self._inflight, self._pending):
+                for user_id, fields in rows.items():
+                    f.write(json.dumps({"u": user_id, "f": fields}, default=_json_scalar) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def _merge(self, user_id, fields):
+        user_id = self._normalize_key(user_id)
+        if user_id in self._pending:
+            self._pending[user_id].update(fields)
+            self._stats["coalesced"] += 1
+        else:
+            self._pending[user_id] = dict(fields)
+
+    def _dead_letter(self, rows):
+        """Simpan baris yang terus gagal (append, satu JSON per baris) untuk diperiksa manual."""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            for user_id, fields, error in rows:
+                f.write(json.dumps({"u": user_id, "f": fields, "error": str(error), "at": now},
+                                   default=_json_scalar) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- API ---
+    def enqueue(self, user_id, fields):
+        """Catat update kolom untuk satu user (durable di journal), tanpa menunggu DB."""
+        if not fields:
+            return
+        for col in fields:
+            if "`" in col:
+                raise ValueError(f"Nama kolom tidak valid: {col!r}")
+        line = json.dumps({"u": user_id, "f": fields}, default=_json_scalar) + "\n"
+        with self._cond:
+            self._journal.write(line)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._merge(user_id, json.loads(line)["f"])
+            self._stats["enqueued"] += 1
+            self._cond.notify_all()
+
+    def pending_for(self, user_id):
+        """Kolom user yang belum tersimpan di DB (untuk ditimpakan ke hasil SELECT)."""
+        user_id = self._normalize_key(user_id)
+        with self._cond:
+            return {**self._inflight.get(user_id, {}), **self._pending.get(user_id, {})}
+
+    def flush(self, timeout=10.0):
+        """Tunggu sampai antrian kosong. Output: True jika semua sudah tersimpan (atau dead-letter)."""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def close(self, timeout=5.0):
+        drained = self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            if self._journal.closed:
+                return
+            self._journal.close()
+            # journal kosong tidak perlu ditinggal (nama per pid -> file menumpuk tiap restart)
+            if drained and not self._pending and not self._inflight:
+                _remove_journal(self.journal_path, self._lock_file)
+
+    def stats(self):
+        with self._cond:
+            return {"pending": len(self._pending), "inflight": len(self._inflight),
+                    "retrying": len(self._attempts), "journal_path": self.journal_path,
+                    "last_error": self.last_error, **self._stats}
+
+    # --- flusher ---
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._stopped, self.flush_interval)
+                if self._stopped:
+                    return
+                if not self._pending:
+                    continue
+            # beri jeda singkat agar update yang berdekatan ikut satu batch
+            time.sleep(self.batch_window)
+            if self._flush_once():
+                backoff = 0.0
+            else:
+                backoff = min(self.max_backoff, max(self.flush_interval, backoff * 2))
+                with self._cond:
+                    self._cond.wait_for(lambda: self._stopped, backoff)
+
+    def _flush_once(self):
+        """Output: True jika tidak ada baris yang gagal (tanpa backoff)."""
+        with self._cond:
+            batch = {}
+            for user_id in list(self._pending)[:self.batch_size]:
+                batch[user_id] = self._pending.pop(user_id)
+            self._inflight.update(batch)
         try:
-            cursor.execute(create_table_query)
-            # save hasil eksekusi query ke database
+            self._write(batch)
+            done, failed, error = list(batch), {}, None
+        except Exception as e:
+            print(f"❌ Write-behind gagal flush {len(batch)} baris: {e}")
+            done, failed, error = self._write_each(batch, e)
+
+        dead = []
+        with self._cond:
+            for user_id in done:
+                self._inflight.pop(user_id, None)
+                self._attempts.pop(user_id, None)
+            for user_id, fields in batch.items():
+                if user_id in done:
+                    continue
+                self._inflight.pop(user_id, None)
+                if user_id in failed:
+                    self._stats["row_failures"] += 1
+                    self._attempts[user_id] = self._attempts.get(user_id, 0) + 1
+                    if self._attempts[user_id] >= self.max_attempts:
+                        # update yang lebih baru (belum dicoba) tetap di antrian
+                        dead.append((user_id, fields, failed[user_id]))
+                        del self._attempts[user_id]
+                        continue
+                # kembalikan ke antrian; update yang lebih baru tetap menang
+                self._pending[user_id] = {**fields, **self._pending.get(user_id, {})}
+            if error is not None or failed:
+                self._stats["failures"] += 1
+                self.last_error = str(error if error is not None else next(iter(failed.values())))
+            if dead:
+                self._dead_letter(dead)
+                self._stats["dead_lettered"] += len(dead)
+            if done or dead:
+                self._stats["batches"] += 1
+                self._stats["rows_flushed"] += len(done)
+                self._journal.close()
+                self._compact()
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._cond.notify_all()
+        for user_id, _, e in dead:
+            print(f"☠️ Write-behind: user {user_id} gagal {self.max_attempts}x, dipindah ke "
+                  f"{self.dead_letter_path}: {e}")
+        return error is None and not failed
+
+    def _write_each(self, batch, error):
+        """
+        Setelah batch gagal: tulis ulang per baris untuk memisahkan baris bermasalah.
+        Output: (user_id tersimpan, {user_id: error data}, error koneksi/DB atau None).
+        """
+        if not self._row_error(error):
+            return [], {}, error
+        if len(batch) == 1:
+            return [], dict.fromkeys(batch, error), None
+        done, failed = [], {}
+        for user_id, fields in batch.items():
+            try:
+                self._write({user_id: fields})
+            except Exception as e:
+                if not self._row_error(e):
+                    return done, failed, e
+                failed[user_id] = e
+            else:
+                done.append(user_id)
+        return done, failed, None
+
+    def _write(self, batch):
+        # kelompokkan per set kolom -> satu executemany per kelompok
+        groups = {}
+        for user_id, fields in batch.items():
+            cols = tuple(fields)
+            groups.setdefault(cols, []).append((user_id, *map(_sql_value, fields.values())))
+
+        conn = self._acquire()
+        try:
+            cursor = conn.cursor()
+            for cols, rows in groups.items():
+                names = ", ".join(f"`{c}`" for c in (self.key, *cols))
+                marks = ", ".join(["%s"] * (len(cols) + 1))
+                updates = ", ".join(f"`{c}` = VALUES(`{c}`)" for c in cols)
+                cursor.executemany(
+                    f"INSERT INTO {self.table} ({names}) VALUES ({marks}) "
+                    f"ON DUPLICATE KEY UPDATE {updates}",
+                    rows
+                )
             conn.commit()
-        except mysql.connector.Error as e:
+        finally:
+            conn.close()
+
+
+def _lock_journal(path):
+    """
+    Kunci eksklusif (non-blocking) <path>.lock. Output: file lock yang harus tetap dibuka
+    selama dipakai, atau None jika dipegang proses lain. Lock lepas sendiri saat proses mati.
+    """
+    f = open(path + ".lock", "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _remove_journal(path, lock_file):
+    for p in (path, path + ".lock"):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+    lock_file.close()
+
+
+def _is_row_error(e):
+    """True jika error berasal dari isi baris (constraint, tipe/JSON salah), bukan koneksi/DB."""
+    if isinstance(e, (ValueError, TypeError)):
+        return True
+    errors = mysql_connector.errors
+    return isinstance(e, (errors.DataError, errors.IntegrityError, errors.ProgrammingError))
+
+
+def _json_scalar(obj):
+    # nilai numpy (np.int64 dll) -> tipe Python biasa
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+def _sql_value(value):
+    # list/dict -> teks JSON untuk kolom JSON (rec_*, top3_sector_*, chosen_*_list)
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=_json_scalar, ensure_ascii=False)
+    return value
+
+
+def parse_db_list(value):
+    """
+    Nilai kolom list dari DB -> list Python.
+    Kolom JSON (skema v3) dikembalikan driver sebagai teks/bytes; teks dipisah koma
+    (data lama sebelum migrasi v3) tetap didukung.
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [x.strip() for x in value.split(",") if x.strip()]
+
+
+@st.cache_resource(show_spinner=False)
+def get_write_queue():
+    """
+    Satu WriteBehindQueue per proses. Bisa diatur di secrets [mysql]:
+    journal_path (awalan; file sebenarnya per host & pid), write_batch_size,
+    write_flush_interval, write_max_attempts, dead_letter_path.
+    """
+    cfg = st.secrets["mysql"]
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".write_behind.jsonl")
+    return WriteBehindQueue(
+        acquire=get_connection_pool().acquire,
+        journal_path=cfg.get("journal_path", default_path),
+        batch_size=int(cfg.get("write_batch_size", 200)),
+        flush_interval=float(cfg.get("write_flush_interval", 1.0)),
+        normalize_key=normalize_user_id,
+        max_attempts=int(cfg.get("write_max_attempts", 5)),
+        dead_letter_path=cfg.get("dead_letter_path"),
+    )
+
+
+# Titik (halaman/langkah) di mana perubahan session dikirim ke antrian write-behind
+# (journal lokal, durable; update per user tetap digabung sebelum ditulis ke DB).
+# Profil & Part 1 ikut: data yang hanya ada di session hilang jika session ditinggal/timeout
+# atau server restart. Hasil single cukup ikut flush hasil_hybrid (bisa dihitung ulang).
+# Bisa diganti lewat secrets [mysql] flush_points atau DatabaseManager(flush_points=...).
+DEFAULT_FLUSH_POINTS = ("profil", "part_1", "part_2", "hasil_hybrid", "feedback")
+
+class UnitOfWork:
+    """
+    Kumpulan perubahan kolom milik satu session (per user_id) yang belum dikirim.
+    - stage(): catat perubahan di memori; nilai yang sama dengan yang sudah
+      tercatat diabaikan (rerun halaman hasil tidak membuat write baru).
+    - flush(): kirim satu record gabungan per user ke sink (antrian write-behind)
+      -> satu UPSERT per user, bukan satu transaksi per langkah.
+    """
+    def __init__(self, sink):
+        self._sink = sink
+        self._pending = {}   # user_id -> {kolom: nilai} (belum dikirim)
+        self._sent = {}      # user_id -> {kolom: nilai} (sudah dikirim)
+
+    def stage(self, user_id, fields):
+        current = {**self._sent.get(user_id, {}), **self._pending.get(user_id, {})}
+        for col, val in fields.items():
+            if col not in current or current[col] != val:
+                self._pending.setdefault(user_id, {})[col] = val
+
+    def pending_for(self, user_id):
+        return dict(self._pending.get(user_id, {}))
+
+    def has_changes(self):
+        return bool(self._pending)
+
+    def flush(self):
+        """Kirim semua perubahan. Output: jumlah user yang dikirim."""
+        sent = 0
+        for user_id in list(self._pending):
+            fields = self._pending[user_id]
+            self._sink(user_id, fields)
+            self._sent.setdefault(user_id, {}).update(fields)
+            del self._pending[user_id]
+            sent += 1
+        return sent
+
+
+# ==========================================
+# EXPORT DATA RESPONDEN (PARQUET, BERTAHAP)
+# ==========================================
+_EXPORT_OPS = ("=", "!=", ">", ">=", "<", "<=")
+_EXPORT_KEYS = ("updated_at", "created_at", "user_id")
+
+def iter_user_pages(conn, key="updated_at", since=None, until=None, filters=None, columns=None,
+                    page_size=5000):
+    """
+    Baca mst_tbl per halaman dengan keyset pagination (WHERE key > terakhir ORDER BY key LIMIT n):
+    memori terbatas & tanpa OFFSET yang makin lambat.
+    - key: "updated_at" (waktu tulis terakhir, user_id pemecah seri), "created_at" atau "user_id" (PK).
+      Untuk export bertahap pakai updated_at: baris yang baru ditulis write-behind & baris yang
+      di-UPDATE (feedback, rec_*) selalu dapat stempel baru. created_at diisi saat profil dibuat,
+      jadi baris bisa masuk DB dengan created_at lebih tua dari watermark yang sudah dibagikan.
+    - since: watermark dari export sebelumnya -> hanya baris setelahnya.
+    - until: batas atas (eksklusif) untuk key waktu; baris di atasnya diambil export berikutnya.
+    - filters: {kolom: nilai} atau {kolom: (op, nilai)}, op di _EXPORT_OPS.
+    Output (generator): (cursor.description, list baris, watermark baris terakhir) per halaman.
+    """
+    if key not in _EXPORT_KEYS:
+        raise ValueError(f"key export harus salah satu dari {_EXPORT_KEYS}, bukan {key!r}")
+    keys = [key] if key == "user_id" else [key, "user_id"]
+
+    conds, params = [], []
+    for col, cond in (filters or {}).items():
+        op, val = cond if isinstance(cond, tuple) else ("=", cond)
+        if op not in _EXPORT_OPS or "`" in col:
+            raise ValueError(f"Filter tidak valid: {col} {op}")
+        conds.append(f"`{col}` {op} %s")
+        params.append(val)
+    if key != "user_id":
+        conds.append(f"{key} IS NOT NULL")
+        if until is not None:
+            conds.append(f"{key} < %s")
+            params.append(until)
+
+    if columns:
+        select = ", ".join(f"`{c}`" for c in [*keys, *[c for c in columns if c not in keys]])
+    else:
+        select = "*"
+    order = ", ".join(keys)
+
+    watermark = since
+    cursor = conn.cursor()   # unbuffered: baris diambil bertahap dari server
+    try:
+        while True:
+            page_conds, page_params = list(conds), list(params)
+            if watermark is not None:
+                if key == "user_id":
+                    page_conds.append("user_id > %s")
+                    page_params.append(watermark)
+                elif isinstance(watermark, (tuple, list)):
+                    page_conds.append(f"({key} > %s OR ({key} = %s AND user_id > %s))")
+                    page_params += [watermark[0], watermark[0], watermark[1]]
+                else:
+                    page_conds.append(f"{key} > %s")
+                    page_params.append(watermark)
+            where = f"WHERE {' AND '.join(page_conds)}" if page_conds else ""
+            cursor.execute(f"SELECT {select} FROM mst_tbl {where} ORDER BY {order} LIMIT %s",
+                           (*page_params, page_size))
+
+            rows = []
+            while True:
+                chunk = cursor.fetchmany(1000)
+                if not chunk:
+                    break
+                rows.extend(chunk)
+            if not rows:
+                return
+
+            names = [d[0] for d in cursor.description]
+            last = rows[-1]
+            if key == "user_id":
+                watermark = last[names.index("user_id")]
+            else:
+                watermark = (last[names.index(key)], last[names.index("user_id")])
+            yield cursor.description, rows, watermark
+            if len(rows) < page_size:
+                return
+    finally:
+        cursor.close()
+
+
+def _arrow_column(name, type_code):
+    """Tipe Arrow + fungsi konversi nilai untuk satu kolom hasil SELECT."""
+    info = mysql_connector.FieldType.get_info(type_code)
+    if name in MST_LIST_COLUMNS:
+        return pa.list_(pa.string()), lambda v: None if v is None else parse_db_list(v)
+    if info in ("TINY", "SHORT", "INT24", "LONG", "LONGLONG", "YEAR"):
+        return pa.int64(), None
+    if info in ("FLOAT", "DOUBLE", "DECIMAL", "NEWDECIMAL"):
+        return pa.float64(), lambda v: None if v is None else float(v)
+    if info in ("DATETIME", "TIMESTAMP"):
+        return pa.timestamp("us"), None
+    if info == "DATE":
+        return pa.date32(), None
+    return pa.string(), lambda v: v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else v
+
+
+def export_users_parquet(conn, path, key="updated_at", since=None, filters=None, columns=None,
+                         page_size=5000, settle_seconds=5.0):
+    """
+    Tulis mst_tbl ke file Parquet per halaman (satu row group per halaman) -> memori
+    terbatas berapapun ukuran tabel. Ditulis ke file sementara lalu os.replace (atomic).
+    Kolom list (JSON) jadi list<string>. Lihat iter_user_pages untuk key/since/filters.
+    - settle_seconds: baris dengan stempel dalam N detik terakhir (jam server DB) belum diambil,
+      agar transaksi yang belum commit tidak terlewati watermark.
+    - Export bertahap (updated_at) memuat ulang baris yang berubah -> gabungkan per user_id,
+      ambil updated_at terbaru.
+    Output: {"rows": jumlah baris, "watermark": simpan & pakai sebagai since berikutnya}.
+    Tidak ada baris baru -> file tidak dibuat dan watermark tetap.
+    """
+    until = None
+    if key != "user_id" and settle_seconds is not None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT NOW(6)")
+            until = cursor.fetchall()[0][0] - timedelta(seconds=settle_seconds)
+        finally:
+            cursor.close()
+
+    tmp = path + ".tmp"
+    writer = None
+    total = 0
+    watermark = since
+    try:
+        for description, rows, watermark in iter_user_pages(conn, key, since, until, filters, columns,
+                                                             page_size):
+            if writer is None:
+                cols = [_arrow_column(d[0], d[1]) for d in description]
+                schema = pa.schema([pa.field(d[0], t) for d, (t, _) in zip(description, cols)])
+                writer = pq.ParquetWriter(tmp, schema)
+            arrays = []
+            for values, (arrow_type, convert) in zip(zip(*rows), cols):
+                if convert is not None:
+                    values = [convert(v) for v in values]
+                arrays.append(pa.array(values, type=arrow_type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            total += len(rows)
+    except Exception:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp)
+        raise
+    if writer is not None:
+        writer.close()
+        os.replace(tmp, path)
+    return {"rows": total, "watermark": watermark}
+
+
+class DatabaseManager:
+    # self = object DatabaseManager itu sendiri
+    # Dipakai supaya data (db_config) bisa dipakai di semua function dalam class ini
+    # __init__ akan otomatis dipanggil saat DatabaseManager() dibuat
+    def __init__(self, flush_points=None):
+        # akses ke secrets (host, username, password, milik db)
+        self.db_config = st.secrets["mysql"]
+        # pool koneksi bersama (satu per proses, bukan per session)
+        self.pool = get_connection_pool()
+        # cek versi skema (hasil cache per proses -> tanpa DDL per session baru)
+        self.schema_version = self.init_db()
+        # antrian write-behind bersama (satu per proses)
+        self.writes = get_write_queue()
+        # perubahan milik session ini, dikirim sekaligus di flush point
+        self.uow = UnitOfWork(self._send)
+        if flush_points is None:
+            flush_points = self.db_config.get("flush_points", DEFAULT_FLUSH_POINTS)
+        self.flush_points = frozenset(flush_points)
+
+    # 1. AMBIL KONEKSI (dari pool; conn.close() = kembalikan ke pool)
+    def get_connection(self):
+        return self.pool.acquire()
+
+    def pool_stats(self):
+        return self.pool.stats()
+    
+    # 2. SKEMA DATABASE (migrasi dijalankan sekali per proses, lihat ensure_schema)
+    def init_db(self):
+        try:
+            return ensure_schema()
+        except mysql_connector.Error as e:
             # INI AKAN MUNCUL DI LAYAR JIKA ERROR
             st.error("🚨 TERJADI ERROR SAAT MEMBUAT DATABASE!")
             st.error(f"Pesan Error SQL: {e}")
-            st.code(create_table_query, language="sql") # Tampilkan query biar kelihatan salahnya
             st.stop() # Hentikan program agar tidak crash lebih parah
-        finally:
-            # menutup koneksi ke database
-            conn.close()
 
     # 3. FUNGSI SIMPAN DATA USER
+    # Semua penulisan dicatat dulu di unit of work session (self.uow) lalu dikirim
+    # sekaligus ke antrian write-behind saat checkpoint() mencapai flush point.
     def save_user_profile(self, profile_dict):
-        print("--- [DEBUG] 1. Membuka Koneksi... ---")
-        conn = self.get_connection()
-        print("--- [DEBUG] Connected ---")
-        # perantara python ke sql
-        cursor = conn.cursor()
-
-        new_id = str(uuid.uuid4())[:8]
+        new_id = get_id_generator().next_id()
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Query dasar untuk membuat user baru
-        query = """
-            INSERT INTO mst_tbl (user_id, created_at, name, kategori, role_desc, umur, gender, domisili)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        values = (
-            new_id, 
-            timestamp, 
-            profile_dict.get('name'), 
-            profile_dict.get('role'), 
-            profile_dict.get('role_desc'), 
-            profile_dict.get('age'), 
-            profile_dict.get('gender'), 
-            profile_dict.get('domicile')
-        )
-        
-        try:
-            print("--- [DEBUG] 2. Eksekusi Query INSERT... ---")
-            cursor.execute(query, values)
-            print("--- [DEBUG] 3. Melakukan COMMIT... ---")
-            conn.commit()
-            print("--- [DEBUG] 4. Selesai & Return ID ---")
-            return new_id # PENTING: Kembalikan ID agar bisa disimpan di session_state
-        except mysql.connector.Error as e:
-            print(f"Error Save Profile: {e}")
-            raise e
-        finally:
-            print("--- [DEBUG] 5. Menutup Koneksi (Closing)... ---")
-            # menutup koneksi ke database
-            conn.close()
+
+        self.uow.stage(new_id, {
+            "created_at": timestamp,
+            "name": profile_dict.get('name'),
+            "kategori": profile_dict.get('role'),
+            "role_desc": profile_dict.get('role_desc'),
+            "umur": profile_dict.get('age'),
+            "gender": profile_dict.get('gender'),
+            "domisili": profile_dict.get('domicile'),
+        })
+        return new_id # PENTING: Kembalikan ID agar bisa disimpan di session_state
     
     # B. FUNGSI UPDATE JAWABAN (DINAMIS)
     # Dipanggil di akhir Part 1 DAN di akhir Part 2
     def update_user_answers(self, user_id, answers_dict):
-        conn = self.get_connection()
-        # perantara python ke sql
-        cursor = conn.cursor()
-        
         # Jika tidak ada jawaban (kosong), skip saja
         if not answers_dict:
             return
-
-        # Teknik Dynamic Query untuk UPDATE
-        # Kita ingin menyusun: UPDATE mst_tbl SET "INN-CE1" = ?, "SE-M1" = ? WHERE user_id = ?
-        
-        set_clauses = []
-        values = []
-
-        # ambil jawaban user dari answers_dict
-        for key, val in answers_dict.items():
-            set_clauses.append(f'`{key}` = %s') # Pakai tanda kutip dua untuk nama kolom
-            values.append(val)
-            
-        # Tambahkan user_id di urutan terakhir untuk WHERE clause
-        values.append(user_id) 
-        
-        query_str = f"""
-            UPDATE mst_tbl 
-            SET {', '.join(set_clauses)}
-            WHERE user_id = %s
-        """
-        
-        try:
-            cursor.execute(query_str, values)
-            conn.commit()
-            print(f"✅ Berhasil update data untuk User ID: {user_id}")
-        except mysql.connector.Error as e:
-            print(f"❌ Error Update: {e}\nQuery: {query_str}")
-            raise e
-        finally:
-            conn.close()
+        self.update_user_fields(user_id, answers_dict)
+
+    # C. UPDATE KOLOM BEBAS (hasil rekomendasi, feedback, dll)
+    def update_user_fields(self, user_id, fields):
+        self.uow.stage(normalize_user_id(user_id), fields)
+
+    # Sink unit of work: masuk antrian write-behind, lalu cache baca hasil user ini dibuang
+    # (read_user_fields sudah menggabungkan update di antrian -> bacaan berikutnya segar)
+    def _send(self, user_id, fields):
+        self.writes.enqueue(user_id, fields)
+        forget_saved_results(user_id)
+
+    # Dipanggil di tiap langkah; kirim perubahan jika langkah ini flush point
+    def checkpoint(self, point):
+        if point in self.flush_points and self.uow.has_changes():
+            self.uow.flush()
+            return True
+        return False
+
+    # D. BACA KOLOM USER (data DB + update yang masih di antrian)
+    def read_user_fields(self, user_id, columns):
+        user_id = normalize_user_id(user_id)
+        cols = ", ".join(f"`{c}`" for c in columns)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {cols} FROM mst_tbl WHERE user_id = %s", (user_id,))
+            found = cursor.fetchone()
+        pending = {**self.writes.pending_for(user_id), **self.uow.pending_for(user_id)}
+        if found is None and not pending:
+            return None
+        row = dict(zip(columns, found)) if found is not None else dict.fromkeys(columns)
+        row.update({c: v for c, v in pending.items() if c in row})
+        return row
+
+    def flush_writes(self, timeout=10.0):
+        self.uow.flush()
+        return self.writes.flush(timeout)
+
+    def write_stats(self):
+        return self.writes.stats()
 
     # 4. FUNGSI LIHAT DATA (Untuk Admin/Kamu ngecek)
-    def view_all_users(self):
-        conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM mst_tbl ORDER BY id DESC", conn)
-        conn.close()
+    # Hanya user terbaru; untuk seluruh tabel pakai export_users
+    def view_all_users(self, limit=1000):
+        with self.get_connection() as conn:
+            df = pd.read_sql_query(
+                "SELECT * FROM mst_tbl ORDER BY created_at DESC, user_id DESC LIMIT %s",
+                conn, params=(limit,)
+            )
         return df
-    
-    
+
+    # 5. EXPORT PARQUET (bertahap, lihat export_users_parquet)
+    def export_users(self, path, **kwargs):
+        with self.get_connection() as conn:
+            return export_users_parquet(conn, path, **kwargs)
+
+
+def get_db():
+    """
+    DatabaseManager milik session ini, dibuat saat pertama kali dibutuhkan
+    (simpan profil / halaman hasil), bukan saat cover -> cover tidak menunggu koneksi & migrasi DB.
+    """
+    if 'db' not in st.session_state:
+        st.session_state['db'] = DatabaseManager()
+    return st.session_state['db']
+
 
 # ==========================================
 # 1. DATA REFERENSI (DAFTAR KOTA/KAB)
 # ==========================================
 # Daftar lengkap kota & kabupaten di Indonesia
-domisili_input = [
-    # ACEH
-    "Kabupaten Aceh Barat", "Kabupaten Aceh Barat Daya", "Kabupaten Aceh Besar",
-    "Kabupaten Aceh Jaya", "Kabupaten Aceh Selatan", "Kabupaten Aceh Singkil",
-    "Kabupaten Aceh Tamiang", "Kabupaten Aceh Tengah", "Kabupaten Aceh Tenggara",
-    "Kabupaten Aceh Timur", "Kabupaten Aceh Utara", "Kabupaten Bener Meriah",
-    "Kabupaten Bireuen", "Kabupaten Gayo Lues", "Kabupaten Nagan Raya",
-    "Kabupaten Pidie", "Kabupaten Pidie Jaya", "Kabupaten Simeulue",
-    "Kota Banda Aceh", "Kota Langsa", "Kota Lhokseumawe", "Kota Sabang",
-    "Kota Subulussalam",
-    # SUMATERA UTARA
-    "Kabupaten Asahan", "Kabupaten Batubara", "Kabupaten Dairi", "Kabupaten Deli Serdang",
-    "Kabupaten Humbang Hasundutan", "Kabupaten Karo", "Kabupaten Labuhanbatu",
-    "Kabupaten Labuhanbatu Selatan", "Kabupaten Labuhanbatu Utara", "Kabupaten Langkat",
-    "Kabupaten Mandailing Natal", "Kabupaten Nias", "Kabupaten Nias Barat",
-    "Kabupaten Nias Selatan", "Kabupaten Nias Utara", "Kabupaten Padang Lawas",
-    "Kabupaten Padang Lawas Utara", "Kabupaten Pakpak Bharat", "Kabupaten Samosir",
-    "Kabupaten Serdang Bedagai", "Kabupaten Simalungun", "Kabupaten Tapanuli Selatan",
-    "Kabupaten Tapanuli Tengah", "Kabupaten Tapanuli Utara", "Kabupaten Toba",
-    "Kota Binjai", "Kota Gunungsitoli", "Kota Medan", "Kota Padangsidimpuan",
-    "Kota Pematangsiantar", "Kota Sibolga", "Kota Tanjungbalai", "Kota Tebing Tinggi",
-    # SUMATERA BARAT
-    "Kabupaten Agam", "Kabupaten Dharmasraya", "Kabupaten Kepulauan Mentawai",
-    "Kabupaten Lima Puluh Kota", "Kabupaten Padang Pariaman", "Kabupaten Pasaman",
-    "Kabupaten Pasaman Barat", "Kabupaten Pesisir Selatan", "Kabupaten Sijunjung",
-    "Kabupaten Solok", "Kabupaten Solok Selatan", "Kabupaten Tanah Datar",
-    "Kota Bukittinggi", "Kota Padang", "Kota Padangpanjang", "Kota Pariaman",
-    "Kota Payakumbuh", "Kota Sawahlunto", "Kota Solok",
-    # RIAU
-    "Kabupaten Bengkalis", "Kabupaten Indragiri Hilir", "Kabupaten Indragiri Hulu",
-    "Kabupaten Kampar", "Kabupaten Kepulauan Meranti", "Kabupaten Kuantan Singingi",
-    "Kabupaten Pelalawan", "Kabupaten Rokan Hilir", "Kabupaten Rokan Hulu",
-    "Kabupaten Siak", "Kota Dumai", "Kota Pekanbaru",
-    # JAMBI
-    "Kabupaten Batanghari", "Kabupaten Bungo", "Kabupaten Kerinci",
-    "Kabupaten Merangin", "Kabupaten Muaro Jambi", "Kabupaten Sarolangun",
-    "Kabupaten Tanjung Jabung Barat", "Kabupaten Tanjung Jabung Timur",
-    "Kabupaten Tebo", "Kota Jambi", "Kota Sungai Penuh",
-    # SUMATERA SELATAN
-    "Kabupaten Banyuasin", "Kabupaten Empat Lawang", "Kabupaten Lahat",
-    "Kabupaten Muara Enim", "Kabupaten Musi Banyuasin", "Kabupaten Musi Rawas",
-    "Kabupaten Musi Rawas Utara", "Kabupaten Ogan Ilir", "Kabupaten Ogan Komering Ilir",
-    "Kabupaten Ogan Komering Ulu", "Kabupaten Ogan Komering Ulu Selatan",
-    "Kabupaten Ogan Komering Ulu Timur", "Kota Lubuklinggau", "Kota Pagar Alam",
-    "Kota Palembang", "Kota Prabumulih",
-    # BENGKULU
-    "Kabupaten Bengkulu Selatan", "Kabupaten Bengkulu Tengah", "Kabupaten Bengkulu Utara",
-    "Kabupaten Kaur", "Kabupaten Kepahiang", "Kabupaten Lebong",
-    "Kabupaten Mukomuko", "Kabupaten Rejang Lebong", "Kabupaten Seluma",
-    "Kota Bengkulu",
-    # LAMPUNG
-    "Kabupaten Lampung Barat", "Kabupaten Lampung Selatan", "Kabupaten Lampung Tengah",
-    "Kabupaten Lampung Timur", "Kabupaten Lampung Utara", "Kabupaten Mesuji",
-    "Kabupaten Pesawaran", "Kabupaten Pesisir Barat", "Kabupaten Pringsewu",
-    "Kabupaten Tanggamus", "Kabupaten Tulang Bawang", "Kabupaten Tulang Bawang Barat",
-    "Kabupaten Way Kanan", "Kota Bandar Lampung", "Kota Metro",
-    # KEP. BANGKA BELITUNG
-    "Kabupaten Bangka", "Kabupaten Bangka Barat", "Kabupaten Bangka Selatan",
-    "Kabupaten Bangka Tengah", "Kabupaten Belitung", "Kabupaten Belitung Timur",
-    "Kota Pangkalpinang",
-    # KEP. RIAU
-    "Kabupaten Bintan", "Kabupaten Karimun", "Kabupaten Kepulauan Anambas",
-    "Kabupaten Lingga", "Kabupaten Natuna", "Kota Batam", "Kota Tanjungpinang",
-    # DKI JAKARTA
-    "Kota Jakarta Barat", "Kota Jakarta Pusat", "Kota Jakarta Selatan",
-    "Kota Jakarta Timur", "Kota Jakarta Utara", "Kabupaten Kepulauan Seribu",
-    # JAWA BARAT
-    "Kabupaten Bandung", "Kabupaten Bandung Barat", "Kabupaten Bekasi",
-    "Kabupaten Bogor", "Kabupaten Ciamis", "Kabupaten Cianjur", "Kabupaten Cirebon",
-    "Kabupaten Garut", "Kabupaten Indramayu", "Kabupaten Karawang",
-    "Kabupaten Kuningan", "Kabupaten Majalengka", "Kabupaten Pangandaran",
-    "Kabupaten Purwakarta", "Kabupaten Subang", "Kabupaten Sukabumi",
-    "Kabupaten Sumedang", "Kabupaten Tasikmalaya", "Kota Bandung", "Kota Banjar",
-    "Kota Bekasi", "Kota Bogor", "Kota Cimahi", "Kota Cirebon", "Kota Depok",
-    "Kota Sukabumi", "Kota Tasikmalaya",
-    # JAWA TENGAH
-    "Kabupaten Banjarnegara", "Kabupaten Banyumas", "Kabupaten Batang",
-    "Kabupaten Blora", "Kabupaten Boyolali", "Kabupaten Brebes", "Kabupaten Cilacap",
-    "Kabupaten Demak", "Kabupaten Grobogan", "Kabupaten Jepara",
-    "Kabupaten Karanganyar", "Kabupaten Kebumen", "Kabupaten Kendal",
-    "Kabupaten Klaten", "Kabupaten Kudus", "Kabupaten Magelang",
-    "Kabupaten Pati", "Kabupaten Pekalongan", "Kabupaten Pemalang",
-    "Kabupaten Purbalingga", "Kabupaten Purworejo", "Kabupaten Rembang",
-    "Kabupaten Semarang", "Kabupaten Sragen", "Kabupaten Sukoharjo",
-    "Kabupaten Tegal", "Kabupaten Temanggung", "Kabupaten Wonogiri",
-    "Kabupaten Wonosobo", "Kota Magelang", "Kota Pekalongan", "Kota Salatiga",
-    "Kota Semarang", "Kota Surakarta", "Kota Tegal",
-    # DI YOGYAKARTA
-    "Kabupaten Bantul", "Kabupaten Gunungkidul", "Kabupaten Kulon Progo",
-    "Kabupaten Sleman", "Kota Yogyakarta",
-    # JAWA TIMUR
-    "Kabupaten Bangkalan", "Kabupaten Banyuwangi", "Kabupaten Blitar",
-    "Kabupaten Bojonegoro", "Kabupaten Bondowoso", "Kabupaten Gresik",
-    "Kabupaten Jember", "Kabupaten Jombang", "Kabupaten Kediri",
-    "Kabupaten Lamongan", "Kabupaten Lumajang", "Kabupaten Madiun",
-    "Kabupaten Magetan", "Kabupaten Malang", "Kabupaten Mojokerto",
-    "Kabupaten Nganjuk", "Kabupaten Ngawi", "Kabupaten Pacitan",
-    "Kabupaten Pamekasan", "Kabupaten Pasuruan", "Kabupaten Ponorogo",
-    "Kabupaten Probolinggo", "Kabupaten Sampang", "Kabupaten Sidoarjo",
-    "Kabupaten Situbondo", "Kabupaten Sumenep", "Kabupaten Trenggalek",
-    "Kabupaten Tuban", "Kabupaten Tulungagung", "Kota Batu", "Kota Blitar",
-    "Kota Kediri", "Kota Madiun", "Kota Malang", "Kota Mojokerto",
-    "Kota Pasuruan", "Kota Probolinggo", "Kota Surabaya",
-    # BANTEN
-    "Kabupaten Lebak", "Kabupaten Pandeglang",
-    "Kabupaten Serang", "Kabupaten Tangerang",
-    "Kota Cilegon", "Kota Serang", "Kota Tangerang",
-    "Kota Tangerang Selatan",
-    # BALI
-    "Kabupaten Badung", "Kabupaten Bangli", "Kabupaten Buleleng",
-    "Kabupaten Gianyar", "Kabupaten Jembrana", "Kabupaten Karangasem",
-    "Kabupaten Klungkung", "Kabupaten Tabanan", "Kota Denpasar",
-    # NUSA TENGGARA BARAT
-    "Kabupaten Bima", "Kabupaten Dompu", "Kabupaten Lombok Barat",
-    "Kabupaten Lombok Tengah", "Kabupaten Lombok Timur", "Kabupaten Lombok Utara",
-    "Kabupaten Sumbawa", "Kabupaten Sumbawa Barat", "Kota Bima", "Kota Mataram",
-    # NUSA TENGGARA TIMUR
-    "Kabupaten Alor", "Kabupaten Belu", "Kabupaten Ende", "Kabupaten Flores Timur",
-    "Kabupaten Kupang", "Kabupaten Lembata", "Kabupaten Malaka", "Kabupaten Manggarai",
-    "Kabupaten Manggarai Barat", "Kabupaten Manggarai Timur", "Kabupaten Ngada",
-    "Kabupaten Nagekeo", "Kabupaten Rote Ndao", "Kabupaten Sabu Raijua",
-    "Kabupaten Sikka", "Kabupaten Sumba Barat", "Kabupaten Sumba Barat Daya",
-    "Kabupaten Sumba Tengah", "Kabupaten Sumba Timur", "Kabupaten Timor Tengah Selatan",
-    "Kabupaten Timor Tengah Utara", "Kota Kupang",
-    # KALIMANTAN BARAT
-    "Kabupaten Bengkayang", "Kabupaten Kapuas Hulu", "Kabupaten Kayong Utara",
-    "Kabupaten Ketapang", "Kabupaten Kubu Raya", "Kabupaten Landak",
-    "Kabupaten Melawi", "Kabupaten Mempawah", "Kabupaten Sambas",
-    "Kabupaten Sanggau", "Kabupaten Sekadau", "Kabupaten Sintang",
-    "Kota Pontianak", "Kota Singkawang",
-    # KALIMANTAN TENGAH
-    "Kabupaten Barito Selatan", "Kabupaten Barito Timur", "Kabupaten Barito Utara",
-    "Kabupaten Gunung Mas", "Kabupaten Kapuas", "Kabupaten Katingan",
-    "Kabupaten Kotawaringin Barat", "Kabupaten Kotawaringin Timur",
-    "Kabupaten Lamandau", "Kabupaten Murung Raya", "Kabupaten Pulang Pisau",
-    "Kabupaten Seruyan", "Kabupaten Sukamara", "Kota Palangka Raya",
-    # KALIMANTAN SELATAN
-    "Kabupaten Balangan", "Kabupaten Banjar", "Kabupaten Barito Kuala",
-    "Kabupaten Hulu Sungai Selatan", "Kabupaten Hulu Sungai Tengah",
-    "Kabupaten Hulu Sungai Utara", "Kabupaten Kotabaru", "Kabupaten Tabalong",
-    "Kabupaten Tanah Bumbu", "Kabupaten Tanah Laut", "Kabupaten Tapin",
-    "Kota Banjarbaru", "Kota Banjarmasin",
-    # KALIMANTAN TIMUR
-    "Kabupaten Berau", "Kabupaten Kutai Barat", "Kabupaten Kutai Kartanegara",
-    "Kabupaten Kutai Timur", "Kabupaten Mahakam Ulu", "Kabupaten Paser",
-    "Kabupaten Penajam Paser Utara", "Kota Balikpapan", "Kota Bontang",
-    "Kota Samarinda",
-    # KALIMANTAN UTARA
-    "Kabupaten Bulungan", "Kabupaten Malinau", "Kabupaten Nunukan",
-    "Kabupaten Tana Tidung", "Kota Tarakan",
-    # SULAWESI UTARA
-    "Kabupaten Bolaang Mongondow", "Kabupaten Bolaang Mongondow Selatan",
-    "Kabupaten Bolaang Mongondow Timur", "Kabupaten Bolaang Mongondow Utara",
-    "Kabupaten Kepulauan Sangihe", "Kabupaten Kepulauan Siau Tagulandang Biaro",
-    "Kabupaten Kepulauan Talaud", "Kabupaten Minahasa", "Kabupaten Minahasa Selatan",
-    "Kabupaten Minahasa Tenggara", "Kabupaten Minahasa Utara",
-    "Kota Bitung", "Kota Kotamobagu", "Kota Manado", "Kota Tomohon",
-    # SULAWESI TENGAH
-    "Kabupaten Banggai", "Kabupaten Banggai Kepulauan", "Kabupaten Banggai Laut",
-    "Kabupaten Buol", "Kabupaten Donggala", "Kabupaten Morowali",
-    "Kabupaten Morowali Utara", "Kabupaten Parigi Moutong", "Kabupaten Poso",
-    "Kabupaten Sigi", "Kabupaten Tojo Una-Una", "Kabupaten Tolitoli",
-    "Kota Palu",
-    # SULAWESI SELATAN
-    "Kabupaten Bantaeng", "Kabupaten Barru", "Kabupaten Bone", "Kabupaten Bulukumba",
-    "Kabupaten Enrekang", "Kabupaten Gowa", "Kabupaten Jeneponto",
-    "Kabupaten Kepulauan Selayar", "Kabupaten Luwu", "Kabupaten Luwu Timur",
-    "Kabupaten Luwu Utara", "Kabupaten Maros", "Kabupaten Pangkajene Kepulauan",
-    "Kabupaten Pinrang", "Kabupaten Sidenreng Rappang", "Kabupaten Sinjai",
-    "Kabupaten Soppeng", "Kabupaten Takalar", "Kabupaten Tana Toraja",
-    "Kabupaten Toraja Utara", "Kota Makassar", "Kota Palopo", "Kota Parepare",
-    # SULAWESI TENGGARA
-    "Kabupaten Bombana", "Kabupaten Buton", "Kabupaten Buton Selatan",
-    "Kabupaten Buton Tengah", "Kabupaten Buton Utara", "Kabupaten Kolaka",
-    "Kabupaten Kolaka Timur", "Kabupaten Kolaka Utara", "Kabupaten Konawe",
-    "Kabupaten Konawe Kepulauan", "Kabupaten Konawe Selatan",
-    "Kabupaten Konawe Utara", "Kabupaten Muna", "Kabupaten Muna Barat",
-    "Kabupaten Wakatobi", "Kota Baubau", "Kota Kendari",
-    # GORONTALO
-    "Kabupaten Boalemo", "Kabupaten Bone Bolango", "Kabupaten Gorontalo",
-    "Kabupaten Gorontalo Utara", "Kabupaten Pohuwato", "Kota Gorontalo",
-    # SULAWESI BARAT
-    "Kabupaten Majene", "Kabupaten Mamasa", "Kabupaten Mamuju",
-    "Kabupaten Mamuju Tengah", "Kabupaten Pasangkayu", "Kabupaten Polewali Mandar",
-    # MALUKU
-    "Kabupaten Buru", "Kabupaten Buru Selatan", "Kabupaten Kepulauan Aru",
-    "Kabupaten Maluku Barat Daya", "Kabupaten Maluku Tengah",
-    "Kabupaten Maluku Tenggara", "Kabupaten Seram Bagian Barat",
-    "Kabupaten Seram Bagian Timur", "Kota Ambon", "Kota Tual",
-    # MALUKU UTARA
-    "Kabupaten Halmahera Barat", "Kabupaten Halmahera Tengah",
-    "Kabupaten Halmahera Timur", "Kabupaten Halmahera Selatan",
-    "Kabupaten Halmahera Utara", "Kabupaten Kepulauan Sula",
-    "Kabupaten Pulau Morotai", "Kabupaten Pulau Taliabu",
-    "Kota Ternate", "Kota Tidore Kepulauan",
-    # PAPUA (lama)
-    "Kabupaten Asmat", "Kabupaten Biak Numfor", "Kabupaten Boven Digoel",
-    "Kabupaten Deiyai", "Kabupaten Dogiyai", "Kabupaten Intan Jaya",
-    "Kabupaten Jayapura", "Kabupaten Jayawijaya", "Kabupaten Keerom",
-    "Kabupaten Lanny Jaya", "Kabupaten Mamberamo Raya", "Kabupaten Mamberamo Tengah",
-    "Kabupaten Mappi", "Kabupaten Merauke", "Kabupaten Mimika",
-    "Kabupaten Nabire", "Kabupaten Nduga", "Kabupaten Paniai",
-    "Kabupaten Pegunungan Bintang", "Kabupaten Puncak", "Kabupaten Puncak Jaya",
-    "Kabupaten Sarmi", "Kabupaten Supiori", "Kabupaten Tolikara",
-    "Kabupaten Waropen", "Kota Jayapura",
-    # PAPUA TENGAH
-    "Kabupaten Puncak", "Kabupaten Paniai", "Kabupaten Dogiyai", "Kabupaten Deiyai",
-    "Kabupaten Nabire", "Kabupaten Mimika",
-    # PAPUA PEGUNUNGAN
-    "Kabupaten Jayawijaya", "Kabupaten Lanny Jaya", "Kabupaten Mamberamo Tengah",
-    "Kabupaten Nduga", "Kabupaten Tolikara", "Kabupaten Yahukimo",
-    "Kabupaten Yalimo", "Kabupaten Pegunungan Bintang",
-    # PAPUA SELATAN
-    "Kabupaten Merauke", "Kabupaten Mappi", "Kabupaten Asmat",
-    "Kabupaten Boven Digoel",
-    # PAPUA BARAT
-    "Kabupaten Fakfak", "Kabupaten Kaimana", "Kabupaten Manokwari",
-    "Kabupaten Manokwari Selatan", "Kabupaten Pegunungan Arfak",
-    "Kabupaten Teluk Bintuni", "Kabupaten Teluk Wondama",
-    "Kota Sorong",
-    # PAPUA BARAT DAYA (baru)
-    "Kabupaten Sorong", "Kabupaten Sorong Selatan", "Kabupaten Tambrauw",
-    "Kabupaten Maybrat", "Kabupaten Raja Ampat", "Kota Sorong",
-    # lainnya
-    "Lainnya (Input Manual)"
-]
+def domisili_options():
+    """
+    Daftar kota/kab untuk selectbox domisili. Dibungkus fungsi (tuple konstanta)
+    supaya tidak dibangun di setiap rerun halaman yang tidak memakainya.
+    """
+    return (
+        # ACEH
+        "Kabupaten Aceh Barat", "Kabupaten Aceh Barat Daya", "Kabupaten Aceh Besar",
+        "Kabupaten Aceh Jaya", "Kabupaten Aceh Selatan", "Kabupaten Aceh Singkil",
+        "Kabupaten Aceh Tamiang", "Kabupaten Aceh Tengah", "Kabupaten Aceh Tenggara",
+        "Kabupaten Aceh Timur", "Kabupaten Aceh Utara", "Kabupaten Bener Meriah",
+        "Kabupaten Bireuen", "Kabupaten Gayo Lues", "Kabupaten Nagan Raya",
+        "Kabupaten Pidie", "Kabupaten Pidie Jaya", "Kabupaten Simeulue",
+        "Kota Banda Aceh", "Kota Langsa", "Kota Lhokseumawe", "Kota Sabang",
+        "Kota Subulussalam",
+        # SUMATERA UTARA
+        "Kabupaten Asahan", "Kabupaten Batubara", "Kabupaten Dairi", "Kabupaten Deli Serdang",
+        "Kabupaten Humbang Hasundutan", "Kabupaten Karo", "Kabupaten Labuhanbatu",
+        "Kabupaten Labuhanbatu Selatan", "Kabupaten Labuhanbatu Utara", "Kabupaten Langkat",
+        "Kabupaten Mandailing Natal", "Kabupaten Nias", "Kabupaten Nias Barat",
+        "Kabupaten Nias Selatan", "Kabupaten Nias Utara", "Kabupaten Padang Lawas",
+        "Kabupaten Padang Lawas Utara", "Kabupaten Pakpak Bharat", "Kabupaten Samosir",
+        "Kabupaten Serdang Bedagai", "Kabupaten Simalungun", "Kabupaten Tapanuli Selatan",
+        "Kabupaten Tapanuli Tengah", "Kabupaten Tapanuli Utara", "Kabupaten Toba",
+        "Kota Binjai", "Kota Gunungsitoli", "Kota Medan", "Kota Padangsidimpuan",
+        "Kota Pematangsiantar", "Kota Sibolga", "Kota Tanjungbalai", "Kota Tebing Tinggi",
+        # SUMATERA BARAT
+        "Kabupaten Agam", "Kabupaten Dharmasraya", "Kabupaten Kepulauan Mentawai",
+        "Kabupaten Lima Puluh Kota", "Kabupaten Padang Pariaman", "Kabupaten Pasaman",
+        "Kabupaten Pasaman Barat", "Kabupaten Pesisir Selatan", "Kabupaten Sijunjung",
+        "Kabupaten Solok", "Kabupaten Solok Selatan", "Kabupaten Tanah Datar",
+        "Kota Bukittinggi", "Kota Padang", "Kota Padangpanjang", "Kota Pariaman",
+        "Kota Payakumbuh", "Kota Sawahlunto", "Kota Solok",
+        # RIAU
+        "Kabupaten Bengkalis", "Kabupaten Indragiri Hilir", "Kabupaten Indragiri Hulu",
+        "Kabupaten Kampar", "Kabupaten Kepulauan Meranti", "Kabupaten Kuantan Singingi",
+        "Kabupaten Pelalawan", "Kabupaten Rokan Hilir", "Kabupaten Rokan Hulu",
+        "Kabupaten Siak", "Kota Dumai", "Kota Pekanbaru",
+        # JAMBI
+        "Kabupaten Batanghari", "Kabupaten Bungo", "Kabupaten Kerinci",
+        "Kabupaten Merangin", "Kabupaten Muaro Jambi", "Kabupaten Sarolangun",
+        "Kabupaten Tanjung Jabung Barat", "Kabupaten Tanjung Jabung Timur",
+        "Kabupaten Tebo", "Kota Jambi", "Kota Sungai Penuh",
+        # SUMATERA SELATAN
+        "Kabupaten Banyuasin", "Kabupaten Empat Lawang", "Kabupaten Lahat",
+        "Kabupaten Muara Enim", "Kabupaten Musi Banyuasin", "Kabupaten Musi Rawas",
+        "Kabupaten Musi Rawas Utara", "Kabupaten Ogan Ilir", "Kabupaten Ogan Komering Ilir",
+        "Kabupaten Ogan Komering Ulu", "Kabupaten Ogan Komering Ulu Selatan",
+        "Kabupaten Ogan Komering Ulu Timur", "Kota Lubuklinggau", "Kota Pagar Alam",
+        "Kota Palembang", "Kota Prabumulih",
+        # BENGKULU
+        "Kabupaten Bengkulu Selatan", "Kabupaten Bengkulu Tengah", "Kabupaten Bengkulu Utara",
+        "Kabupaten Kaur", "Kabupaten Kepahiang", "Kabupaten Lebong",
+        "Kabupaten Mukomuko", "Kabupaten Rejang Lebong", "Kabupaten Seluma",
+        "Kota Bengkulu",
+        # LAMPUNG
+        "Kabupaten Lampung Barat", "Kabupaten Lampung Selatan", "Kabupaten Lampung Tengah",
+        "Kabupaten Lampung Timur", "Kabupaten Lampung Utara", "Kabupaten Mesuji",
+        "Kabupaten Pesawaran", "Kabupaten Pesisir Barat", "Kabupaten Pringsewu",
+        "Kabupaten Tanggamus", "Kabupaten Tulang Bawang", "Kabupaten Tulang Bawang Barat",
+        "Kabupaten Way Kanan", "Kota Bandar Lampung", "Kota Metro",
+        # KEP. BANGKA BELITUNG
+        "Kabupaten Bangka", "Kabupaten Bangka Barat", "Kabupaten Bangka Selatan",
+        "Kabupaten Bangka Tengah", "Kabupaten Belitung", "Kabupaten Belitung Timur",
+        "Kota Pangkalpinang",
+        # KEP. RIAU
+        "Kabupaten Bintan", "Kabupaten Karimun", "Kabupaten Kepulauan Anambas",
+        "Kabupaten Lingga", "Kabupaten Natuna", "Kota Batam", "Kota Tanjungpinang",
+        # DKI JAKARTA
+        "Kota Jakarta Barat", "Kota Jakarta Pusat", "Kota Jakarta Selatan",
+        "Kota Jakarta Timur", "Kota Jakarta Utara", "Kabupaten Kepulauan Seribu",
+        # JAWA BARAT
+        "Kabupaten Bandung", "Kabupaten Bandung Barat", "Kabupaten Bekasi",
+        "Kabupaten Bogor", "Kabupaten Ciamis", "Kabupaten Cianjur", "Kabupaten Cirebon",
+        "Kabupaten Garut", "Kabupaten Indramayu", "Kabupaten Karawang",
+        "Kabupaten Kuningan", "Kabupaten Majalengka", "Kabupaten Pangandaran",
+        "Kabupaten Purwakarta", "Kabupaten Subang", "Kabupaten Sukabumi",
+        "Kabupaten Sumedang", "Kabupaten Tasikmalaya", "Kota Bandung", "Kota Banjar",
+        "Kota Bekasi", "Kota Bogor", "Kota Cimahi", "Kota Cirebon", "Kota Depok",
+        "Kota Sukabumi", "Kota Tasikmalaya",
+        # JAWA TENGAH
+        "Kabupaten Banjarnegara", "Kabupaten Banyumas", "Kabupaten Batang",
+        "Kabupaten Blora", "Kabupaten Boyolali", "Kabupaten Brebes", "Kabupaten Cilacap",
+        "Kabupaten Demak", "Kabupaten Grobogan", "Kabupaten Jepara",
+        "Kabupaten Karanganyar", "Kabupaten Kebumen", "Kabupaten Kendal",
+        "Kabupaten Klaten", "Kabupaten Kudus", "Kabupaten Magelang",
+        "Kabupaten Pati", "Kabupaten Pekalongan", "Kabupaten Pemalang",
+        "Kabupaten Purbalingga", "Kabupaten Purworejo", "Kabupaten Rembang",
+        "Kabupaten Semarang", "Kabupaten Sragen", "Kabupaten Sukoharjo",
+        "Kabupaten Tegal", "Kabupaten Temanggung", "Kabupaten Wonogiri",
+        "Kabupaten Wonosobo", "Kota Magelang", "Kota Pekalongan", "Kota Salatiga",
+        "Kota Semarang", "Kota Surakarta", "Kota Tegal",
+        # DI YOGYAKARTA
+        "Kabupaten Bantul", "Kabupaten Gunungkidul", "Kabupaten Kulon Progo",
+        "Kabupaten Sleman", "Kota Yogyakarta",
+        # JAWA TIMUR
+        "Kabupaten Bangkalan", "Kabupaten Banyuwangi", "Kabupaten Blitar",
+        "Kabupaten Bojonegoro", "Kabupaten Bondowoso", "Kabupaten Gresik",
+        "Kabupaten Jember", "Kabupaten Jombang", "Kabupaten Kediri",
+        "Kabupaten Lamongan", "Kabupaten Lumajang", "Kabupaten Madiun",
+        "Kabupaten Magetan", "Kabupaten Malang", "Kabupaten Mojokerto",
+        "Kabupaten Nganjuk", "Kabupaten Ngawi", "Kabupaten Pacitan",
+        "Kabupaten Pamekasan", "Kabupaten Pasuruan", "Kabupaten Ponorogo",
+        "Kabupaten Probolinggo", "Kabupaten Sampang", "Kabupaten Sidoarjo",
+        "Kabupaten Situbondo", "Kabupaten Sumenep", "Kabupaten Trenggalek",
+        "Kabupaten Tuban", "Kabupaten Tulungagung", "Kota Batu", "Kota Blitar",
+        "Kota Kediri", "Kota Madiun", "Kota Malang", "Kota Mojokerto",
+        "Kota Pasuruan", "Kota Probolinggo", "Kota Surabaya",
+        # BANTEN
+        "Kabupaten Lebak", "Kabupaten Pandeglang",
+        "Kabupaten Serang", "Kabupaten Tangerang",
+        "Kota Cilegon", "Kota Serang", "Kota Tangerang",
+        "Kota Tangerang Selatan",
+        # BALI
+        "Kabupaten Badung", "Kabupaten Bangli", "Kabupaten Buleleng",
+        "Kabupaten Gianyar", "Kabupaten Jembrana", "Kabupaten Karangasem",
+        "Kabupaten Klungkung", "Kabupaten Tabanan", "Kota Denpasar",
+        # NUSA TENGGARA BARAT
+        "Kabupaten Bima", "Kabupaten Dompu", "Kabupaten Lombok Barat",
+        "Kabupaten Lombok Tengah", "Kabupaten Lombok Timur", "Kabupaten Lombok Utara",
+        "Kabupaten Sumbawa", "Kabupaten Sumbawa Barat", "Kota Bima", "Kota Mataram",
+        # NUSA TENGGARA TIMUR
+        "Kabupaten Alor", "Kabupaten Belu", "Kabupaten Ende", "Kabupaten Flores Timur",
+        "Kabupaten Kupang", "Kabupaten Lembata", "Kabupaten Malaka", "Kabupaten Manggarai",
+        "Kabupaten Manggarai Barat", "Kabupaten Manggarai Timur", "Kabupaten Ngada",
+        "Kabupaten Nagekeo", "Kabupaten Rote Ndao", "Kabupaten Sabu Raijua",
+        "Kabupaten Sikka", "Kabupaten Sumba Barat", "Kabupaten Sumba Barat Daya",
+        "Kabupaten Sumba Tengah", "Kabupaten Sumba Timur", "Kabupaten Timor Tengah Selatan",
+        "Kabupaten Timor Tengah Utara", "Kota Kupang",
+        # KALIMANTAN BARAT
+        "Kabupaten Bengkayang", "Kabupaten Kapuas Hulu", "Kabupaten Kayong Utara",
+        "Kabupaten Ketapang", "Kabupaten Kubu Raya", "Kabupaten Landak",
+        "Kabupaten Melawi", "Kabupaten Mempawah", "Kabupaten Sambas",
+        "Kabupaten Sanggau", "Kabupaten Sekadau", "Kabupaten Sintang",
+        "Kota Pontianak", "Kota Singkawang",
+        # KALIMANTAN TENGAH
+        "Kabupaten Barito Selatan", "Kabupaten Barito Timur", "Kabupaten Barito Utara",
+        "Kabupaten Gunung Mas", "Kabupaten Kapuas", "Kabupaten Katingan",
+        "Kabupaten Kotawaringin Barat", "Kabupaten Kotawaringin Timur",
+        "Kabupaten Lamandau", "Kabupaten Murung Raya", "Kabupaten Pulang Pisau",
+        "Kabupaten Seruyan", "Kabupaten Sukamara", "Kota Palangka Raya",
+        # KALIMANTAN SELATAN
+        "Kabupaten Balangan", "Kabupaten Banjar", "Kabupaten Barito Kuala",
+        "Kabupaten Hulu Sungai Selatan", "Kabupaten Hulu Sungai Tengah",
+        "Kabupaten Hulu Sungai Utara", "Kabupaten Kotabaru", "Kabupaten Tabalong",
+        "Kabupaten Tanah Bumbu", "Kabupaten Tanah Laut", "Kabupaten Tapin",
+        "Kota Banjarbaru", "Kota Banjarmasin",
+        # KALIMANTAN TIMUR
+        "Kabupaten Berau", "Kabupaten Kutai Barat", "Kabupaten Kutai Kartanegara",
+        "Kabupaten Kutai Timur", "Kabupaten Mahakam Ulu", "Kabupaten Paser",
+        "Kabupaten Penajam Paser Utara", "Kota Balikpapan", "Kota Bontang",
+        "Kota Samarinda",
+        # KALIMANTAN UTARA
+        "Kabupaten Bulungan", "Kabupaten Malinau", "Kabupaten Nunukan",
+        "Kabupaten Tana Tidung", "Kota Tarakan",
+        # SULAWESI UTARA
+        "Kabupaten Bolaang Mongondow", "Kabupaten Bolaang Mongondow Selatan",
+        "Kabupaten Bolaang Mongondow Timur", "Kabupaten Bolaang Mongondow Utara",
+        "Kabupaten Kepulauan Sangihe", "Kabupaten Kepulauan Siau Tagulandang Biaro",
+        "Kabupaten Kepulauan Talaud", "Kabupaten Minahasa", "Kabupaten Minahasa Selatan",
+        "Kabupaten Minahasa Tenggara", "Kabupaten Minahasa Utara",
+        "Kota Bitung", "Kota Kotamobagu", "Kota Manado", "Kota Tomohon",
+        # SULAWESI TENGAH
+        "Kabupaten Banggai", "Kabupaten Banggai Kepulauan", "Kabupaten Banggai Laut",
+        "Kabupaten Buol", "Kabupaten Donggala", "Kabupaten Morowali",
+        "Kabupaten Morowali Utara", "Kabupaten Parigi Moutong", "Kabupaten Poso",
+        "Kabupaten Sigi", "Kabupaten Tojo Una-Una", "Kabupaten Tolitoli",
+        "Kota Palu",
+        # SULAWESI SELATAN
+        "Kabupaten Bantaeng", "Kabupaten Barru", "Kabupaten Bone", "Kabupaten Bulukumba",
+        "Kabupaten Enrekang", "Kabupaten Gowa", "Kabupaten Jeneponto",
+        "Kabupaten Kepulauan Selayar", "Kabupaten Luwu", "Kabupaten Luwu Timur",
+        "Kabupaten Luwu Utara", "Kabupaten Maros", "Kabupaten Pangkajene Kepulauan",
+        "Kabupaten Pinrang", "Kabupaten Sidenreng Rappang", "Kabupaten Sinjai",
+        "Kabupaten Soppeng", "Kabupaten Takalar", "Kabupaten Tana Toraja",
+        "Kabupaten Toraja Utara", "Kota Makassar", "Kota Palopo", "Kota Parepare",
+        # SULAWESI TENGGARA
+        "Kabupaten Bombana", "Kabupaten Buton", "Kabupaten Buton Selatan",
+        "Kabupaten Buton Tengah", "Kabupaten Buton Utara", "Kabupaten Kolaka",
+        "Kabupaten Kolaka Timur", "Kabupaten Kolaka Utara", "Kabupaten Konawe",
+        "Kabupaten Konawe Kepulauan", "Kabupaten Konawe Selatan",
+        "Kabupaten Konawe Utara", "Kabupaten Muna", "Kabupaten Muna Barat",
+        "Kabupaten Wakatobi", "Kota Baubau", "Kota Kendari",
+        # GORONTALO
+        "Kabupaten Boalemo", "Kabupaten Bone Bolango", "Kabupaten Gorontalo",
+        "Kabupaten Gorontalo Utara", "Kabupaten Pohuwato", "Kota Gorontalo",
+        # SULAWESI BARAT
+        "Kabupaten Majene", "Kabupaten Mamasa", "Kabupaten Mamuju",
+        "Kabupaten Mamuju Tengah", "Kabupaten Pasangkayu", "Kabupaten Polewali Mandar",
+        # MALUKU
+        "Kabupaten Buru", "Kabupaten Buru Selatan", "Kabupaten Kepulauan Aru",
+        "Kabupaten Maluku Barat Daya", "Kabupaten Maluku Tengah",
+        "Kabupaten Maluku Tenggara", "Kabupaten Seram Bagian Barat",
+        "Kabupaten Seram Bagian Timur", "Kota Ambon", "Kota Tual",
+        # MALUKU UTARA
+        "Kabupaten Halmahera Barat", "Kabupaten Halmahera Tengah",
+        "Kabupaten Halmahera Timur", "Kabupaten Halmahera Selatan",
+        "Kabupaten Halmahera Utara", "Kabupaten Kepulauan Sula",
+        "Kabupaten Pulau Morotai", "Kabupaten Pulau Taliabu",
+        "Kota Ternate", "Kota Tidore Kepulauan",
+        # PAPUA (lama)
+        "Kabupaten Asmat", "Kabupaten Biak Numfor", "Kabupaten Boven Digoel",
+        "Kabupaten Deiyai", "Kabupaten Dogiyai", "Kabupaten Intan Jaya",
+        "Kabupaten Jayapura", "Kabupaten Jayawijaya", "Kabupaten Keerom",
+        "Kabupaten Lanny Jaya", "Kabupaten Mamberamo Raya", "Kabupaten Mamberamo Tengah",
+        "Kabupaten Mappi", "Kabupaten Merauke", "Kabupaten Mimika",
+        "Kabupaten Nabire", "Kabupaten Nduga", "Kabupaten Paniai",
+        "Kabupaten Pegunungan Bintang", "Kabupaten Puncak", "Kabupaten Puncak Jaya",
+        "Kabupaten Sarmi", "Kabupaten Supiori", "Kabupaten Tolikara",
+        "Kabupaten Waropen", "Kota Jayapura",
+        # PAPUA TENGAH
+        "Kabupaten Puncak", "Kabupaten Paniai", "Kabupaten Dogiyai", "Kabupaten Deiyai",
+        "Kabupaten Nabire", "Kabupaten Mimika",
+        # PAPUA PEGUNUNGAN
+        "Kabupaten Jayawijaya", "Kabupaten Lanny Jaya", "Kabupaten Mamberamo Tengah",
+        "Kabupaten Nduga", "Kabupaten Tolikara", "Kabupaten Yahukimo",
+        "Kabupaten Yalimo", "Kabupaten Pegunungan Bintang",
+        # PAPUA SELATAN
+        "Kabupaten Merauke", "Kabupaten Mappi", "Kabupaten Asmat",
+        "Kabupaten Boven Digoel",
+        # PAPUA BARAT
+        "Kabupaten Fakfak", "Kabupaten Kaimana", "Kabupaten Manokwari",
+        "Kabupaten Manokwari Selatan", "Kabupaten Pegunungan Arfak",
+        "Kabupaten Teluk Bintuni", "Kabupaten Teluk Wondama",
+        "Kota Sorong",
+        # PAPUA BARAT DAYA (baru)
+        "Kabupaten Sorong", "Kabupaten Sorong Selatan", "Kabupaten Tambrauw",
+        "Kabupaten Maybrat", "Kabupaten Raja Ampat", "Kota Sorong",
+        # lainnya
+        "Lainnya (Input Manual)"
+    )
 
 # ==========================================
 # 2. FUNGSI TAMPILAN PROFILE
@@ -522,8 +1887,6 @@ def render_cover_page():
 
     # TOMBOL START
     if st.button("Start"):
-        with st.spinner('Loading...'):
-                    time.sleep(2)
         st.session_state['halaman_sekarang'] = "profil"
         st.rerun()
     
@@ -658,7 +2021,7 @@ def render_profile():
     # Di Streamlit, st.selectbox secara default sudah bisa di-search (seperti Combobox)
     domicile_selection = st.selectbox(
         "Pilih Domisili",
-        options=domisili_input,
+        options=domisili_options(),
         index=None, # Kosongkan default agar user memilih
         placeholder="Cari Kota/Kabupaten...",
         label_visibility="collapsed"
@@ -676,9 +2039,6 @@ def render_profile():
     # --- BAGIAN TOMBOL NEXT ---
     # Menggunakan st.button biasa (bukan form_submit karena ini bukan di dalam st.form)
     if st.button("Lanjut ke Kuesioner ➡️", type="primary"):
-        with st.spinner('Loading..'):
-        # Pura-pura proses berat (hapus baris ini nanti)
-            time.sleep(2)
         # 1. Validasi Input (Cek apakah domisili kosong?)
         
         if not name:
@@ -708,21 +2068,20 @@ def render_profile():
                 st.session_state['temp_profile'] = profil_data
                 # 2. PANGGIL DATABASE MANAGER
                 # 3. Panggil Database Manager
-                if 'db' not in st.session_state:
-                    st.session_state['db'] = DatabaseManager()
-
-                db = st.session_state['db']
+                db = get_db()
 
                 # DEBUG: Print ke terminal (Lihat di VS Code / CMD Anda saat klik)
                 print(f"Sedang menyimpan profil: {profil_data}")
 
                 # --- OPERAN 1: Menerima ID dari Database ---
                 id_baru = db.save_user_profile(profil_data)
+                db.checkpoint("profil")
                 
                 # --- OPERAN 2: Menyimpan ID ke "Tas" (Session State) ---
                 st.session_state['current_user_id'] = id_baru 
                 
                 st.success("Profil tersimpan! Lanjut...")
+                pin_questionnaire()
                 st.session_state['halaman_sekarang'] = "part_1"
                 st.rerun()
             
@@ -733,14 +2092,9 @@ def render_profile():
             st.rerun()
     
 
-def likert_item(question_text, key_name, default_value=3):
-    """
-    Komponen Likert Scale Responsif:
-    - Desktop: Label di samping kiri-kanan.
-    - Mobile: Label pindah ke atas (kiri & kanan) agar tidak hilang & muat.
-    """
-    
-    st.markdown("""
+# CSS komponen Likert (dipakai likert_item). Diinjeksi sekali di luar fragment
+# kuesioner, jadi tidak dikirim ulang setiap pindah soal.
+LIKERT_CSS = """
     <style>
     /* 1. CONTAINER UTAMA (STREAMLIT RADIO) */
     div.row-widget.stRadio {
@@ -858,7 +2212,18 @@ def likert_item(question_text, key_name, default_value=3):
         }
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def inject_likert_css():
+    st.markdown(LIKERT_CSS, unsafe_allow_html=True)
+
+def likert_item(question_text, key_name, default_value=3):
+    """
+    Komponen Likert Scale Responsif:
+    - Desktop: Label di samping kiri-kanan.
+    - Mobile: Label pindah ke atas (kiri & kanan) agar tidak hilang & muat.
+    CSS-nya (LIKERT_CSS) diinjeksi sekali per halaman lewat inject_likert_css().
+    """
 
     # 2. TAMPILKAN PERTANYAAN (Center)
     st.markdown(
@@ -885,71 +2250,85 @@ def likert_item(question_text, key_name, default_value=3):
     
     return selected_value
 
-questions_A = {
-    "INN-CE1": "Saya tertantang oleh ketidakpastian dan masalah yang belum terpecahkan.",
-    "SE-M1":   "Saya percaya diri dapat melakukan networking, yaitu membangun hubungan dan bertukar informasi yang bermanfaat dengan berbagai pihak untuk mendukung kegiatan atau proyek saya.",
-    "NACH-FF2": "Jika saya tidak langsung mengerti sebuah masalah, saya mulai merasa cemas.",
-    "LOC-I1":   "Jika saya bekerja dengan sungguh-sungguh, saya bisa mencapai hasil yang saya inginkan.",
-    "SE-P2":    "Saya percaya diri dapat memperkirakan jumlah modal awal dan modal kerja yang diperlukan.",
-    "INN-O2":   "Saya terbuka untuk menggunakan cara baru meskipun belum umum dipraktikkan orang lain.",
-    "SE-IP1":   "Saya percaya diri dapat memotivasi dan mendorong anggota tim agar semangat dalam bekerja.",
-    "NACH-HS1": "Saya termotivasi untuk segera bertindak ketika menghadapi tantangan yang bisa saya selesaikan.",
-    "SE-IF1":   "Saya percaya diri dapat mengorganisir dan memelihara catatan keuangan untuk usaha, proyek, atau kegiatan yang saya jalankan.",
-    "LOC-E2":   "Saya percaya bahwa hasil kerja saya banyak dipengaruhi oleh keadaan atau orang lain, bukan sepenuhnya oleh usaha saya.",
-    "SE-S1":    "Saya percaya diri dapat mengidentifikasi kebutuhan atau peluang baru yang bisa diwujudkan menjadi solusi.",
-    "INN-W1":   "Saya bersedia untuk mencoba cara baru meskipun berbeda dari kebiasaan saya sebelumnya.",
-    "NACH-HS2": "Saya menikmati situasi di mana saya bisa menggunakan dan mengembangkan kemampuan saya.",
-    "SE-IF2":   "Saya percaya diri dapat mengelola aset atau sumber daya keuangan secara efektif dalam usaha, proyek, atau kegiatan saya.",
-    "INN-CE2":  "Saya sering mengimprovisasi metode untuk memecahkan masalah.",
-    "LOC-E1":   "Saya merasa keberhasilan dalam pekerjaan banyak ditentukan oleh faktor di luar kendali saya.",
-    "SE-M2":    "Saya percaya diri dapat meyakinkan orang lain untuk memahami, mendukung, dan ikut berkomitmen pada visi serta rencana yang saya buat.",
-    "SE-S2":    "Saya percaya diri dapat merancang ide atau solusi baru yang sesuai dengan kebutuhan pasar.",
-    "LOC-I2":   "Saya percaya bahwa hasil pekerjaan saya bergantung pada usaha dan cara saya bekerja.",
-    "INN-W2":   "Saya merasa antusias ketika harus beradaptasi dengan situasi baru.",
-    "SE-P1":    "Saya percaya diri dapat menyusun rencana bisnis, termasuk memperkirakan permintaan pasar dan strategi pemasaran.",
-    "INN-O1":   "Saya menikmati mencoba ide-ide baru.",
-    "SE-IP2":   "Saya percaya diri dapat memilih orang yang tepat untuk bekerja sama dan membantu mereka mengembangkan kemampuan yang dibutuhkan.",
-    "NACH-FF1": "Saya takut gagal dalam situasi agak sulit, ketika banyak hal bergantung pada saya."
-}
-
-KEYS_ENTRE = [
-    'INN-CE1', 'SE-M1', 'NACH-FF2', 'LOC-I1', 'SE-P2', 'INN-O2', 
-    'SE-IP1', 'NACH-HS1', 'SE-IF1', 'LOC-E2', 'SE-S1', 'INN-W1', 
-    'NACH-HS2', 'SE-IF2', 'INN-CE2', 'LOC-E1', 'SE-M2', 'SE-S2', 
-    'LOC-I2', 'INN-W2', 'SE-P1', 'INN-O1', 'SE-IP2', 'NACH-FF1'
-]
-
-
-domain_cols = {
-    "innovativeness":  ["INN-CE1", "INN-O2", "INN-W1", "INN-CE2", "INN-W2", "INN-O1"],
-    "self_efficacy":   ["SE-M1", "SE-P2", "SE-IP1", "SE-IF1", "SE-S1", "SE-IF2", "SE-M2", "SE-S2", "SE-P1", "SE-IP2"],
-    "need_achievement": ["NACH-FF2", "NACH-HS1", "NACH-HS2", "NACH-FF1"],
-    "loc_internal":  ["LOC-I1", "LOC-I2"],
-    "loc_external": ["LOC-E1", "LOC-E2"]
-}
-
+def question_bank_A():
+    """Teks soal Part 1 (entrepreneurial), hanya dibangun saat halaman part_1."""
+    return {
+        "INN-CE1": "Saya tertantang oleh ketidakpastian dan masalah yang belum terpecahkan.",
+        "SE-M1":   "Saya percaya diri dapat melakukan networking, yaitu membangun hubungan dan bertukar informasi yang bermanfaat dengan berbagai pihak untuk mendukung kegiatan atau proyek saya.",
+        "NACH-FF2": "Jika saya tidak langsung mengerti sebuah masalah, saya mulai merasa cemas.",
+        "LOC-I1":   "Jika saya bekerja dengan sungguh-sungguh, saya bisa mencapai hasil yang saya inginkan.",
+        "SE-P2":    "Saya percaya diri dapat memperkirakan jumlah modal awal dan modal kerja yang diperlukan.",
+        "INN-O2":   "Saya terbuka untuk menggunakan cara baru meskipun belum umum dipraktikkan orang lain.",
+        "SE-IP1":   "Saya percaya diri dapat memotivasi dan mendorong anggota tim agar semangat dalam bekerja.",
+        "NACH-HS1": "Saya termotivasi untuk segera bertindak ketika menghadapi tantangan yang bisa saya selesaikan.",
+        "SE-IF1":   "Saya percaya diri dapat mengorganisir dan memelihara catatan keuangan untuk usaha, proyek, atau kegiatan yang saya jalankan.",
+        "LOC-E2":   "Saya percaya bahwa hasil kerja saya banyak dipengaruhi oleh keadaan atau orang lain, bukan sepenuhnya oleh usaha saya.",
+        "SE-S1":    "Saya percaya diri dapat mengidentifikasi kebutuhan atau peluang baru yang bisa diwujudkan menjadi solusi.",
+        "INN-W1":   "Saya bersedia untuk mencoba cara baru meskipun berbeda dari kebiasaan saya sebelumnya.",
+        "NACH-HS2": "Saya menikmati situasi di mana saya bisa menggunakan dan mengembangkan kemampuan saya.",
+        "SE-IF2":   "Saya percaya diri dapat mengelola aset atau sumber daya keuangan secara efektif dalam usaha, proyek, atau kegiatan saya.",
+        "INN-CE2":  "Saya sering mengimprovisasi metode untuk memecahkan masalah.",
+        "LOC-E1":   "Saya merasa keberhasilan dalam pekerjaan banyak ditentukan oleh faktor di luar kendali saya.",
+        "SE-M2":    "Saya percaya diri dapat meyakinkan orang lain untuk memahami, mendukung, dan ikut berkomitmen pada visi serta rencana yang saya buat.",
+        "SE-S2":    "Saya percaya diri dapat merancang ide atau solusi baru yang sesuai dengan kebutuhan pasar.",
+        "LOC-I2":   "Saya percaya bahwa hasil pekerjaan saya bergantung pada usaha dan cara saya bekerja.",
+        "INN-W2":   "Saya merasa antusias ketika harus beradaptasi dengan situasi baru.",
+        "SE-P1":    "Saya percaya diri dapat menyusun rencana bisnis, termasuk memperkirakan permintaan pasar dan strategi pemasaran.",
+        "INN-O1":   "Saya menikmati mencoba ide-ide baru.",
+        "SE-IP2":   "Saya percaya diri dapat memilih orang yang tepat untuk bekerja sama dan membantu mereka mengembangkan kemampuan yang dibutuhkan.",
+        "NACH-FF1": "Saya takut gagal dalam situasi agak sulit, ketika banyak hal bergantung pada saya."
+    }
 
+def pin_questionnaire():
+    """
+    Pin engine aktif + urutan soal Part 1/2 di session saat kuesioner dimulai. Katalog bisa
+    di-hot reload di tengah pengisian; soal yang ditanyakan & scoring tetap memakai versi ini.
+    """
+    engine = get_engine()
+    st.session_state['kuesioner'] = {
+        'engine': engine,
+        'keys': {part: _question_keys(engine, part) for part in ("A", "B")},
+    }
+    return st.session_state['kuesioner']
 
-questions_B = {
-    "CON-2": "Saya adalah seseorang yang cenderung malas (atau agak malas).",
-    "OPE-3": "Saya adalah seseorang yang memiliki imajinasi yang jelas/hidup dan penuh fantasi.",
-    "NEU-1": "Saya adalah seseorang yang sering khawatir.",
-    "AGR-2": "Saya adalah seseorang yang mudah memaafkan (atau bisa memaafkan).",
-    "EXT-2": "Saya adalah seseorang yang bisa keluar sendiri dan bersosialisasi (atau mudah bergaul).",
-    "CON-1": "Saya adalah seseorang yang bekerja secara teliti (atau menyeluruh).",
-    "OPE-1": "Saya adalah seseorang yang orisinil dan membawa ide-ide baru.",
-    "AGR-1": "Saya adalah seseorang yang kadang-kadang agak kasar kepada orang lain.",
-    "NEU-3": "Saya adalah seseorang yang santai dan dapat mengatasi stres dengan baik.",
-    "EXT-3": "Saya adalah seseorang yang pendiam (atau tertutup).",
-    "OPE-2": "Saya adalah seseorang yang menghargai pengalaman artistik.",
-    "AGR-3": "Saya adalah seseorang yang penuh perhatian dan baik hati terhadap orang lain.",
-    "NEU-2": "Saya adalah seseorang yang mudah gugup.",
-    "CON-3": "Saya adalah seseorang yang menyelesaikan tugas secara efektif dan efisien.",
-    "EXT-1": "Saya adalah seseorang yang komunikatif dan banyak bicara (atau cerewet)."
-}
+def session_engine():
+    """Engine yang dipin untuk session ini (belum ada pin -> pin sekarang)."""
+    return (st.session_state.get('kuesioner') or pin_questionnaire())['engine']
 
-# Membuat list keys agar urutan soal konsisten
-KEYS_BIG5 = list(questions_B.keys())
+def question_keys(part):
+    """
+    Urutan soal Part 1 ("A") / Part 2 ("B") dari engine yang dipin (pin_questionnaire):
+    item Part A = soal domain_cols, Part B = soal big5.
+    Urutan tampil mengikuti question_bank_A/B; item katalog yang belum punya teks ditaruh di akhir.
+    """
+    return (st.session_state.get('kuesioner') or pin_questionnaire())['keys'][part]
+
+def _question_keys(engine, part):
+    domain_items = {c for cols in engine.domain_cols.values() for c in cols}
+    items = [c for c in engine.score_items if (c in domain_items) == (part == "A")]
+    order = {k: i for i, k in enumerate(question_bank_A() if part == "A" else question_bank_B())}
+    return tuple(sorted(items, key=lambda c: order.get(c, len(order))))
+
+
+def question_bank_B():
+    """Teks soal Part 2 (Big Five), hanya dibangun saat halaman part_2."""
+    return {
+        "CON-2": "Saya adalah seseorang yang cenderung malas (atau agak malas).",
+        "OPE-3": "Saya adalah seseorang yang memiliki imajinasi yang jelas/hidup dan penuh fantasi.",
+        "NEU-1": "Saya adalah seseorang yang sering khawatir.",
+        "AGR-2": "Saya adalah seseorang yang mudah memaafkan (atau bisa memaafkan).",
+        "EXT-2": "Saya adalah seseorang yang bisa keluar sendiri dan bersosialisasi (atau mudah bergaul).",
+        "CON-1": "Saya adalah seseorang yang bekerja secara teliti (atau menyeluruh).",
+        "OPE-1": "Saya adalah seseorang yang orisinil dan membawa ide-ide baru.",
+        "AGR-1": "Saya adalah seseorang yang kadang-kadang agak kasar kepada orang lain.",
+        "NEU-3": "Saya adalah seseorang yang santai dan dapat mengatasi stres dengan baik.",
+        "EXT-3": "Saya adalah seseorang yang pendiam (atau tertutup).",
+        "OPE-2": "Saya adalah seseorang yang menghargai pengalaman artistik.",
+        "AGR-3": "Saya adalah seseorang yang penuh perhatian dan baik hati terhadap orang lain.",
+        "NEU-2": "Saya adalah seseorang yang mudah gugup.",
+        "CON-3": "Saya adalah seseorang yang menyelesaikan tugas secara efektif dan efisien.",
+        "EXT-1": "Saya adalah seseorang yang komunikatif dan banyak bicara (atau cerewet)."
+    }
 
 
 
@@ -1059,8 +2438,6 @@ def render_part_1():
     if 'temp_profile' not in st.session_state:
         st.warning("Silakan isi profil terlebih dahulu.")
         if st.button("Kembali ke Profil"):
-            with st.spinner('Loading..'):
-                time.sleep(2)
             st.session_state['halaman_sekarang'] = "profil"
             st.rerun()
         return
@@ -1068,21 +2445,41 @@ def render_part_1():
     if 'temp_answers_1' not in st.session_state: st.session_state['temp_answers_1'] = {}
     if 'q_index' not in st.session_state: st.session_state['q_index'] = 0
 
+    # --- B-D. SOAL & NAVIGASI (fragment: pindah soal hanya merender ulang bagian ini) ---
+    inject_likert_css()
+    questionnaire_part_1()
+
+def geser_soal(langkah, answers_key=None, current_key=None):
+    """
+    Callback Back/Next kuesioner. Klik tombol di dalam fragment otomatis
+    hanya merender ulang fragment itu, jadi tidak perlu st.rerun().
+    """
+    if answers_key:
+        st.session_state[answers_key][current_key] = st.session_state[f"radio_{current_key}"]
+    st.session_state['q_index'] += langkah
+
+@st.fragment
+def questionnaire_part_1():
+    """
+    Satu soal Part 1 + progress & tombol Back/Next, dirender sebagai fragment.
+    Back/Next hanya rerun fragment ini; tombol terakhir rerun seluruh app (pindah halaman).
+    """
     # --- B. PERSIAPAN DATA SOAL ---
     current_idx = st.session_state['q_index']
-    total_soal = len(KEYS_ENTRE)
-    current_key = KEYS_ENTRE[current_idx]
+    keys = question_keys("A")
+    total_soal = len(keys)
+    current_key = keys[current_idx]
     
     # Progress Bar
     progress_val = (current_idx + 1) / total_soal
     st.progress(progress_val, text=f"Pertanyaan {current_idx + 1} dari {total_soal}")
 
     # Ambil Teks & Nilai Default
-    teks_soal = questions_A.get(current_key, f"Pertanyaan {current_key} belum diset.")
+    teks_soal = question_bank_A().get(current_key, f"Pertanyaan {current_key} belum diset.")
     default_val = st.session_state['temp_answers_1'].get(current_key, 3)
     soal_html = f'<div class="custom-soal">{current_idx + 1}. {teks_soal}</div>'
     # --- C. TAMPILKAN ITEM KUESIONER (Panggil Fungsi Helper) ---
-    # Di sini CSS dan UI dirender otomatis
+    # Di sini UI soal dirender (CSS sudah diinjeksi di luar fragment)
     jawaban = likert_item(
         question_text=f"{soal_html}",
         key_name=f"radio_{current_key}",
@@ -1098,28 +2495,21 @@ def render_part_1():
     # 1. TOMBOL PREV
     with col_prev:
         if current_idx > 0:
-            if st.button("⬅️ Back", use_container_width=True):
-                st.session_state['q_index'] -= 1
-                st.rerun()
+            st.button("⬅️ Back", use_container_width=True,
+                      on_click=geser_soal, args=(-1,))
 
     # 2. TOMBOL NEXT / FINISH
     with col_next:
         # Jika BELUM soal terakhir
         if current_idx < total_soal - 1:
-            if st.button("Next ➡️", type="primary", use_container_width=True):
-                # Simpan jawaban sementara ke Session State
-                st.session_state['temp_answers_1'][current_key] = jawaban
-                st.session_state['q_index'] += 1
-                st.rerun()
+            # Simpan jawaban sementara ke Session State (lewat callback)
+            st.button("Next ➡️", type="primary", use_container_width=True,
+                      on_click=geser_soal, args=(1, 'temp_answers_1', current_key))
         
         # Jika SOAL TERAKHIR (Finish)
         else:
             if st.button("Next to second questionnaire 🚀", type="primary", use_container_width=True):
                 # 1. Simpan jawaban soal terakhir ini
-                # interface loading muter
-                with st.spinner('Loading...'):
-                    # memberi waktu untuk tahapan selanjutnya
-                    time.sleep(2)
                 st.session_state['temp_answers_1'][current_key] = jawaban
                 
                 # 2. Ambil ID User dari Session State
@@ -1135,9 +2525,10 @@ def render_part_1():
 
                 # 3. UPDATE DATABASE
                 try:
-                    db = st.session_state['db']
+                    db = get_db()
                     # Update jawaban berdasarkan ID
                     db.update_user_answers(user_id_saya, st.session_state['temp_answers_1'])
+                    db.checkpoint("part_1")
                     
                     st.success("Jawaban Tersimpan!")
                     
@@ -1254,8 +2645,6 @@ def render_part_2():
     if 'temp_profile' not in st.session_state:
         st.warning("Silakan isi profil terlebih dahulu.")
         if st.button("Kembali ke Profil"):
-            with st.spinner('Loading...'):
-                    time.sleep(2)
             st.session_state['halaman_sekarang'] = "profil"
             st.rerun()
         return
@@ -1266,23 +2655,31 @@ def render_part_2():
     # Pastikan q_index ada (biasanya sudah di-reset di akhir Part 1)
     if 'q_index' not in st.session_state: st.session_state['q_index'] = 0
 
+    # --- B-D. SOAL & NAVIGASI (fragment: pindah soal hanya merender ulang bagian ini) ---
+    inject_likert_css()
+    questionnaire_part_2()
+
+@st.fragment
+def questionnaire_part_2():
+    """Seperti questionnaire_part_1, untuk soal Big Five (Part 2)."""
     # --- B. PERSIAPAN DATA SOAL ---
     current_idx = st.session_state['q_index']
-    total_soal = len(KEYS_BIG5)
+    keys = question_keys("B")
+    total_soal = len(keys)
     
     # Safety check jika index melebihi total soal (misal refresh browser)
     if current_idx >= total_soal:
         current_idx = total_soal - 1
         st.session_state['q_index'] = current_idx
 
-    current_key = KEYS_BIG5[current_idx]
+    current_key = keys[current_idx]
     
     # Progress Bar
     progress_val = (current_idx + 1) / total_soal
     st.progress(progress_val, text=f"Pertanyaan {current_idx + 1} dari {total_soal}")
 
     # Ambil Teks & Nilai Default
-    teks_soal = questions_B.get(current_key, f"Pertanyaan {current_key} belum diset.")
+    teks_soal = question_bank_B().get(current_key, f"Pertanyaan {current_key} belum diset.")
     
     # Ambil nilai dari temp_answers_2, default 3
     default_val = st.session_state['temp_answers_2'].get(current_key, 3)
@@ -1304,27 +2701,21 @@ def render_part_2():
     # 1. TOMBOL PREV
     with col_prev:
         if current_idx > 0:
-            if st.button("⬅️ Back", use_container_width=True):
-                st.session_state['q_index'] -= 1
-                st.rerun()
+            st.button("⬅️ Back", use_container_width=True,
+                      on_click=geser_soal, args=(-1,))
 
     # 2. TOMBOL NEXT / FINISH
     with col_next:
         # Jika BELUM soal terakhir
         if current_idx < total_soal - 1:
-            if st.button("Next ➡️", type="primary", use_container_width=True):
-                # Simpan jawaban sementara ke temp_answers_2
-                st.session_state['temp_answers_2'][current_key] = jawaban
-                st.session_state['q_index'] += 1
-                st.rerun()
+            # Simpan jawaban sementara ke temp_answers_2 (lewat callback)
+            st.button("Next ➡️", type="primary", use_container_width=True,
+                      on_click=geser_soal, args=(1, 'temp_answers_2', current_key))
         
         # Jika SOAL TERAKHIR (Finish)
         else:
             # Tombol Finalisasi
             if st.button("Lihat Hasil 🏁", type="primary", use_container_width=True):
-                with st.spinner('Loading...'):
-                    # untuk loading terlebih dahulu selama 2 detik, agar memberi waktu tahap selanjutnya untuk load
-                    time.sleep(2)
                 # 1. Simpan jawaban soal terakhir ini
                 st.session_state['temp_answers_2'][current_key] = jawaban
                 
@@ -1342,10 +2733,11 @@ def render_part_2():
 
                 # 3. UPDATE DATABASE (Simpan Jawaban Part 2)
                 try:
-                    db = st.session_state['db']
+                    db = get_db()
                     
                     # Update database dengan jawaban Part 2
                     db.update_user_answers(user_id_saya, st.session_state['temp_answers_2'])
+                    db.checkpoint("part_2")
                     
                     st.success("Semua Jawaban Tersimpan!")
                     
@@ -1459,490 +2851,900 @@ def render_feedback_section(user_id, db, sectors_single, sectors_hybrid):
                     
                 else:
                     try:
-                        # --- Konversi List menjadi String ---
-                        str_chosen_s = ", ".join(chosen_s_list) if chosen_s_list else ""
-                        str_chosen_h = ", ".join(chosen_h_list) if chosen_h_list else ""
-                        conn = db.get_connection()
-                        cursor = conn.cursor()
-                        
-                        # Update tabel mst_tbl
-                        cursor.execute("""
-                            UPDATE mst_tbl 
-                            SET rate_single = %s, 
-                                chosen_s_list = %s,
-                                feedback_single = %s, 
-                                rate_hybrid = %s, 
-                                chosen_h_list = %s,
-                                feedback_hybrid = %s
-                            WHERE user_id = %s
-                        """, (rate_single, str_chosen_s, feedback_single, rate_hybrid, str_chosen_h, feedback_hybrid, user_id))
-                        
-                        conn.commit()
-                        conn.close()
+                        # Update tabel mst_tbl (flush point "feedback")
+                        db.update_user_fields(user_id, {
+                            "rate_single": rate_single,
+                            "chosen_s_list": list(chosen_s_list),
+                            "feedback_single": feedback_single,
+                            "rate_hybrid": rate_hybrid,
+                            "chosen_h_list": list(chosen_h_list),
+                            "feedback_hybrid": feedback_hybrid,
+                        })
+                        db.checkpoint("feedback")
                         st.success("✅ Terima kasih! Feedback Anda berhasil disimpan.")
                         st.balloons()
                     except Exception as e:
                         st.error(f"Gagal menyimpan feedback: {e}")
 
 # deskripsi
-@st.cache_data
-def load_cluster_descriptions(file_path='deskripsi.xlsx'):
+# Dibaca dari katalog terkompilasi (lihat DescriptionCatalogStore), bukan read_excel per panggilan
+def load_cluster_descriptions(file_path='deskripsi.xlsx', engine=None):
+    # {'Nama Cluster': 'Deskripsi...'} (key di-strip, apa adanya karena nama cluster spesifik)
+    return get_description_catalog(file_path, engine).clusters
+
+def load_sector_descriptions(file_path='deskripsi.xlsx', engine=None):
+    # {'Nama Sektor': 'Deskripsi Panjang...'} (key .title() agar seragam formatnya)
+    catalog = get_description_catalog(file_path, engine)
+    if "sektor" in catalog.errors:
+        st.error(f"Gagal membaca file deskripsi: {catalog.errors['sektor']}")
+    return catalog.sectors
+
+def read_description_workbook(file_path='deskripsi.xlsx'):
+    """
+    Baca deskripsi.xlsx sekali (satu ExcelFile untuk kedua sheet).
+    Output: (sector_dict, cluster_dict, errors); sheet yang gagal dibaca -> dict kosong + pesan di errors.
+    """
+    sectors, clusters, errors = {}, {}, {}
     try:
-        # Hanya baca sheet 'Cluster_Desc'
-        df = pd.read_excel(file_path, sheet_name='cluster')
-        
-        # Bersihkan nama kolom
-        df.columns = [c.strip() for c in df.columns]
-        
-        # Ubah ke Dictionary
-        # Key biarkan apa adanya (Sensitive) atau strip saja, karena nama cluster spesifik
-        cluster_dict = dict(zip(
-            df['Cluster'].astype(str).str.strip(), 
-            df['Description']
-        ))
-        return cluster_dict
-        
+        xls = pd.ExcelFile(file_path)
     except Exception as e:
-        # st.error(f"Gagal load cluster: {e}")
-        return {}
+        return sectors, clusters, {"sektor": str(e), "cluster": str(e)}
+
+    with xls:
+        try:
+            df = xls.parse('sektor')
+            df.columns = [c.strip() for c in df.columns]
+            sectors = dict(zip(df['Sector'].astype(str).str.title().str.strip(), df['Description']))
+        except Exception as e:
+            errors["sektor"] = str(e)
+        try:
+            df = xls.parse('cluster')
+            df.columns = [c.strip() for c in df.columns]
+            clusters = dict(zip(df['Cluster'].astype(str).str.strip(), df['Description']))
+        except Exception as e:
+            errors["cluster"] = str(e)
+    return sectors, clusters, errors
+
+class TfidfCatalog:
+    """
+    Model TF-IDF yang di-fit SEKALI dari deskripsi sektor & cluster (deskripsi.xlsx).
+    - Vocabulary & matriks dokumen dibangun sekali, per request hanya transform narasi user.
+    - IDF tetap dihitung dari korpus [user] + kandidat (rumus smooth_idf TfidfVectorizer),
+      jadi hasil ranking sama persis dengan fit_transform per user di compute_tfidf_ranking.
+    """
+    def __init__(self, sector_docs, cluster_docs, narratives=None):
+        # narratives = {'A': likert_text_map, 'B': qb_text_mapping} -> kalimat narasi per (soal, nilai)
+        narratives = narratives or {}
+        sentences = [txt for mapping in narratives.values()
+                     for per_val in mapping.values() for txt in per_val.values()]
+
+        # Vocabulary = semua deskripsi + kalimat narasi (agar kata khas narasi ikut terhitung di norma user)
+        self._vectorizer = sk_text.CountVectorizer()
+        self._vectorizer.fit(list(sector_docs.values()) + list(cluster_docs.values()) + sentences)
+        self._analyzer = None
+        self.vocabulary = self._vectorizer.vocabulary_
+
+        self.docs = {}
+        for kind, docs in (("sector", sector_docs), ("cluster", cluster_docs)):
+            names = list(docs.keys())
+            texts = list(docs.values())
+            self._set_docs(kind, names, texts, self._vectorizer.transform(texts).toarray())
+
+        # Tabel jumlah kata per kalimat narasi: satu baris per (soal, nilai).
+        # Vektor narasi user = jumlah baris kalimat yang terpilih (tanpa join string & tokenisasi).
+        self.narratives = {}
+        for part, mapping in narratives.items():
+            rows, texts = {}, []
+            for col, per_val in mapping.items():
+                for val, txt in per_val.items():
+                    rows[(col, val)] = len(texts)
+                    texts.append(txt)
+            counts = self._vectorizer.transform(texts).toarray() if texts else np.zeros((0, len(self.vocabulary)))
+            self._set_narratives(part, list(mapping.keys()), rows, counts)
+
+    def _set_docs(self, kind, names, texts, counts):
+        counts = counts.astype(np.float64)
+        self.docs[kind] = {
+            "names": names,
+            "texts": texts,
+            "index": {name: i for i, name in enumerate(names)},
+            "counts": counts,
+            "presence": (counts > 0).astype(np.float64),
+            "counts_sq": counts ** 2,
+        }
+
+    def _set_narratives(self, part, cols, rows, counts):
+        tf_dense = counts.astype(np.float64)
+        self.narratives[part] = {
+            "cols": cols,
+            "rows": rows,
+            "tf": sparse.csr_matrix(tf_dense),
+            "tf_dense": tf_dense,
+        }
+
+    @property
+    def vectorizer(self):
+        """CountVectorizer ber-vocabulary tetap; dibuat ulang dari vocabulary jika katalog dimuat dari file."""
+        if self._vectorizer is None:
+            self._vectorizer = sk_text.CountVectorizer(vocabulary=self.vocabulary)
+        return self._vectorizer
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = self.vectorizer.build_analyzer()
+        return self._analyzer
+
+    # --- ARTIFACT (lihat DescriptionCatalog.save) ---
+    def to_arrays(self):
+        """Output: (meta JSON: vocabulary, nama & teks dokumen, baris narasi; {nama: array jumlah kata})."""
+        meta = {
+            "vocabulary": sorted(self.vocabulary, key=self.vocabulary.get),
+            "docs": {kind: {"names": d["names"], "texts": d["texts"]} for kind, d in self.docs.items()},
+            "narratives": {part: {"cols": nar["cols"], "rows": [list(k) for k in nar["rows"]]}
+                           for part, nar in self.narratives.items()},
+        }
+        arrays = {f"docs_{kind}": d["counts"].astype(np.int32) for kind, d in self.docs.items()}
+        arrays.update({f"narratives_{part}": nar["tf_dense"].astype(np.int32)
+                       for part, nar in self.narratives.items()})
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, meta, arrays):
+        self = cls.__new__(cls)
+        self._vectorizer = None
+        self._analyzer = None
+        self.vocabulary = {term: i for i, term in enumerate(meta["vocabulary"])}
+        self.docs = {}
+        for kind, d in meta["docs"].items():
+            self._set_docs(kind, d["names"], d["texts"], arrays[f"docs_{kind}"])
+        self.narratives = {}
+        for part, nar in meta["narratives"].items():
+            rows = {(col, val): i for i, (col, val) in enumerate(nar["rows"])}
+            self._set_narratives(part, nar["cols"], rows, arrays[f"narratives_{part}"])
+        return self
+
+    def kind_of(self, candidates_dict):
+        """Cek apakah kandidat {nama: deskripsi} semuanya dokumen katalog ('sector'/'cluster')."""
+        for kind, d in self.docs.items():
+            if all(d["index"].get(name) is not None and d["texts"][d["index"][name]] == text
+                   for name, text in candidates_dict.items()):
+                return kind
+        return None
+
+    def doc_indices(self, kind, names):
+        """Nama dokumen -> indeks baris matriks dokumen (-1 jika tidak ada)."""
+        index = self.docs[kind]["index"]
+        return np.array([index.get(name, -1) for name in names], dtype=np.int64)
+
+    def transform(self, texts):
+        """Teks -> matriks sparse jumlah kata (tanpa fit ulang)."""
+        return self.vectorizer.transform(texts)
+
+    def cosine(self, U, kind, cand_idx, oov_sq=None, chunk_size=20000):
+        """
+        Cosine TF-IDF user vs dokumen kandidat.
+        - U        : matriks sparse user x term (jumlah kata narasi).
+        - cand_idx : array N x K berisi indeks dokumen kandidat per user (-1 = kosong).
+        - oov_sq   : (opsional) jumlah kuadrat frekuensi kata user di luar vocabulary.
+        Output: array N x K (NaN untuk slot kosong).
+        """
+        d = self.docs[kind]
+        n_docs_total = d["counts"].shape[0]
+        out = np.full(cand_idx.shape, np.nan)
+        if not (cand_idx >= 0).any():
+            return out
+
+        for start in range(0, U.shape[0], chunk_size):
+            stop = min(start + chunk_size, U.shape[0])
+            Uc = U[start:stop]
+            ci = cand_idx[start:stop]
+            valid = ci >= 0
+            rows = np.nonzero(valid)[0]
+
+            # Mask kandidat per user -> document frequency per term
+            kmask = np.zeros((stop - start, n_docs_total))
+            kmask[rows, ci[valid]] = 1.0
+            n_docs = valid.sum(axis=1) + 1
+            dfreq = (Uc > 0).toarray() + kmask @ d["presence"]
+            idf = np.log((1 + n_docs)[:, None] / (1 + dfreq)) + 1
+            idf2 = idf ** 2
+
+            num = np.asarray(Uc.multiply(idf2) @ d["counts"].T)
+            user_sq = np.asarray(Uc.power(2).multiply(idf2).sum(axis=1)).reshape(-1)
+            if oov_sq is not None:
+                # Kata di luar vocabulary hanya muncul di user -> df = 1
+                user_sq = user_sq + oov_sq[start:stop] * (np.log((1 + n_docs) / 2) + 1) ** 2
+            doc_sq = idf2 @ d["counts_sq"].T
+            denom = np.sqrt(user_sq[:, None] * doc_sq)
+            cos = np.divide(num, denom, out=np.zeros_like(num), where=denom > 0)
+
+            safe = np.where(valid, ci, 0)
+            out[start:stop] = np.where(valid, np.take_along_axis(cos, safe, axis=1), np.nan)
+        return out
+
+    def narrative_vector(self, row, part):
+        """
+        Jawaban satu user -> vektor jumlah kata narasi (sama dengan tokenisasi build_narrative_text).
+        Output: array 1D (panjang vocabulary), atau None jika tidak ada kalimat yang terpilih.
+        """
+        nar = self.narratives[part]
+        picked = []
+        for col in nar["cols"]:
+            val = row.get(col)
+            if val is not None:
+                try:
+                    r = nar["rows"].get((col, int(val)))
+                except ValueError:
+                    continue
+                if r is not None:
+                    picked.append(r)
+        if not picked:
+            return None
+        return nar["tf_dense"][picked].sum(axis=0)
+
+    def narrative_matrix(self, df, part):
+        """
+        Versi batch narrative_vector: DataFrame N x soal -> matriks sparse N x term.
+        Matriks seleksi one-hot (user x kalimat) dikalikan tabel jumlah kata kalimat.
+        """
+        nar = self.narratives[part]
+        n = len(df)
+        user_idx, sent_idx = [], []
+        for col in nar["cols"]:
+            if col not in df.columns:
+                continue
+            vals = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+            ok = np.isfinite(vals)
+            vi = np.trunc(vals[ok]).astype(np.int64)
+            users = np.nonzero(ok)[0]
+            for v in np.unique(vi):
+                r = nar["rows"].get((col, int(v)))
+                if r is not None:
+                    sel = users[vi == v]
+                    user_idx.append(sel)
+                    sent_idx.append(np.full(len(sel), r, dtype=np.int64))
+        if user_idx:
+            user_idx = np.concatenate(user_idx)
+            sent_idx = np.concatenate(sent_idx)
+        else:
+            user_idx = sent_idx = np.zeros(0, dtype=np.int64)
+        S = sparse.csr_matrix((np.ones(len(user_idx)), (user_idx, sent_idx)),
+                       shape=(n, nar["tf"].shape[0]))
+        return (S @ nar["tf"]).tocsr()
+
+    def rank(self, user_text, kind, names, top_n=None):
+        """
+        Ranking satu user terhadap kandidat 'names' (urutan = urutan kandidat).
+        Output: [('Nama A', 0.95), ('Nama B', 0.80), ...] yang SUDAH URUT.
+        """
+        vocab = self.vocabulary
+
+        # Tokenisasi sekali -> vektor jumlah kata (kata di luar vocabulary dihitung terpisah)
+        idx, oov = [], {}
+        for tok in self.analyzer(user_text):
+            j = vocab.get(tok)
+            if j is None:
+                oov[tok] = oov.get(tok, 0) + 1
+            else:
+                idx.append(j)
+        u = np.bincount(np.array(idx, dtype=np.int64), minlength=len(vocab)).astype(np.float64)
+        return self.rank_vector(u, kind, names, top_n=top_n, oov_sq=sum(c * c for c in oov.values()))
+
+    def rank_vector(self, u, kind, names, top_n=None, oov_sq=0):
+        """
+        Ranking dari vektor jumlah kata user (hasil narrative_vector / rank).
+        Hanya baris dokumen kandidat yang dihitung (dot product vektor user x dokumen kandidat).
+        """
+        d = self.docs[kind]
+
+        # 1. IDF dari korpus [user] + kandidat
+        rows = self.doc_indices(kind, names)
+        docs = d["counts"][rows]
+        n_docs = len(rows) + 1
+        idf = np.log((1 + n_docs) / (1 + (u > 0) + d["presence"][rows].sum(axis=0))) + 1
+
+        # 2. Cosine similarity
+        x = u * idf
+        y = docs * idf
+        user_sq = x @ x + oov_sq * (np.log((1 + n_docs) / 2) + 1) ** 2
+        denom = np.sqrt(user_sq * (y ** 2).sum(axis=1))
+        scores = np.divide(y @ x, denom, out=np.zeros(len(rows)), where=denom > 0)
+
+        results = list(zip(names, scores))
+        results.sort(key=lambda x: x[1], reverse=True)
+        if top_n:
+            results = results[:top_n]
+        return results
+
+
+def get_tfidf_catalog(engine=None, file_path='deskripsi.xlsx'):
+    """TfidfCatalog (sudah di-fit) dari katalog deskripsi terkompilasi, dipakai bersama semua session."""
+    return get_description_catalog(file_path, engine).tfidf
+
+
+# ==========================================
+# KATALOG DESKRIPSI TERKOMPILASI
+# ==========================================
+# Naikkan jika isi/struktur DescriptionCatalog atau TfidfCatalog berubah
+DESCRIPTION_CATALOG_FORMAT = 2
+
+class DescriptionCatalog:
+    """
+    Hasil kompilasi deskripsi.xlsx: deskripsi sektor & cluster + TfidfCatalog yang sudah di-fit.
+    version = hash (format, isi xlsx, narasi engine) -> ikut masuk kunci ResultCache.
+    """
+    def __init__(self, sectors, clusters, errors, tfidf, source_stamp, source_sha1, narratives_hash):
+        self.format = DESCRIPTION_CATALOG_FORMAT
+        self.sectors = sectors
+        self.clusters = clusters
+        self.errors = errors
+        self.tfidf = tfidf
+        self.source_stamp = source_stamp
+        self.source_sha1 = source_sha1
+        self.narratives_hash = narratives_hash
+        h = hashlib.sha1(f"catalog-{self.format}".encode())
+        _digest_update(h, (source_sha1, narratives_hash))
+        self.version = h.hexdigest()[:16]
+
+    def save(self, f):
+        """
+        Simpan ke .npz: metadata & vocabulary sebagai teks JSON + matriks jumlah kata (int).
+        Tanpa pickle & tanpa objek sklearn -> tidak terikat versi sklearn, aman dibaca dari path mana pun.
+        """
+        tfidf_meta, arrays = self.tfidf.to_arrays()
+        meta = {
+            "format": self.format,
+            "sectors": self.sectors,
+            "clusters": self.clusters,
+            "errors": self.errors,
+            "tfidf": tfidf_meta,
+            "source_stamp": self.source_stamp,
+            "source_sha1": self.source_sha1,
+            "narratives_hash": self.narratives_hash,
+        }
+        np.savez_compressed(f, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+
+    @staticmethod
+    def read(f):
+        """File katalog -> (meta, {nama: array}); cek meta["format"] sebelum from_file()."""
+        with np.load(f, allow_pickle=False) as z:
+            return json.loads(str(z["meta"])), {k: z[k] for k in z.files if k != "meta"}
+
+    @classmethod
+    def from_file(cls, meta, arrays):
+        stamp = meta["source_stamp"]
+        return cls(meta["sectors"], meta["clusters"], meta["errors"],
+                   TfidfCatalog.from_arrays(meta["tfidf"], arrays),
+                   tuple(stamp) if stamp is not None else None, meta["source_sha1"], meta["narratives_hash"])
+
+
+class DescriptionCatalogStore:
+    """
+    Katalog deskripsi per proses, dikompilasi sekali ke file .npz (default .deskripsi.catalog.npz
+    di samping xlsx) sehingga proses berikutnya tidak perlu openpyxl maupun fit CountVectorizer.
+    - File katalog dipakai jika format & hash narasi engine cocok dan stempel xlsx (mtime_ns, ukuran)
+      sama; stempel beda tapi sha1 isi sama (mis. checkout/touch) -> tetap dipakai.
+    - xlsx diedit -> build ulang & tulis atomik (tmp + os.replace), tanpa restart. Stat file paling
+      sering tiap check_interval detik; pembaca lama tetap memakai objek katalog lama (tidak diubah).
+    - xlsx tidak ada tapi file katalog ada -> katalog dipakai apa adanya (deploy tanpa xlsx).
+    """
+    def __init__(self, xlsx_path, catalog_path, narratives, check_interval=2.0):
+        self.xlsx_path = xlsx_path
+        self.catalog_path = catalog_path
+        self.narratives = narratives
+        self.check_interval = check_interval
+        h = hashlib.sha1()
+        _digest_update(h, narratives)
+        self.narratives_hash = h.hexdigest()
+        self._lock = threading.Lock()
+        self._current = None
+        self._checked_at = 0.0
+        self._stats = {"loads": 0, "builds": 0, "reloads": 0, "write_errors": 0}
+
+    def get(self):
+        current = self._current
+        if current is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return current
+        with self._lock:
+            if self._current is None or time.monotonic() - self._checked_at >= self.check_interval:
+                stamp = self._stamp()
+                if self._current is None or self._current.source_stamp != stamp:
+                    if self._current is not None:
+                        self._stats["reloads"] += 1
+                    self._current = self._refresh(stamp)
+                self._checked_at = time.monotonic()
+            return self._current
+
+    def stats(self):
+        with self._lock:
+            current = self._current
+            return {
+                "version": current.version if current else None,
+                "sectors": len(current.sectors) if current else 0,
+                "clusters": len(current.clusters) if current else 0,
+                **self._stats,
+            }
+
+    def _stamp(self):
+        try:
+            info = os.stat(self.xlsx_path)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _source_sha1(self):
+        try:
+            with open(self.xlsx_path, "rb") as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def _refresh(self, stamp):
+        cached = self._read()
+        if cached is not None and (stamp is None or cached.source_stamp == stamp):
+            self._stats["loads"] += 1
+            return cached
+
+        sha1 = self._source_sha1()
+        for known in (self._current, cached):
+            if known is not None and sha1 is not None and known.source_sha1 == sha1:
+                # Isi sama, hanya stempel yang berubah -> salinan dengan stempel baru
+                fresh = DescriptionCatalog(known.sectors, known.clusters, known.errors, known.tfidf,
+                                           stamp, sha1, known.narratives_hash)
+                self._write(fresh)
+                return fresh
+
+        with startup_timer("init", "katalog deskripsi (build)"):
+            sectors, clusters, errors = read_description_workbook(self.xlsx_path)
+            tfidf = TfidfCatalog(sectors, clusters, self.narratives)
+        built = DescriptionCatalog(sectors, clusters, errors, tfidf, stamp, sha1, self.narratives_hash)
+        self._stats["builds"] += 1
+        if not errors:
+            self._write(built)
+        return built
+
+    def _read(self):
+        try:
+            with open(self.catalog_path, "rb") as f:
+                meta, arrays = DescriptionCatalog.read(f)
+            if (meta.get("format") != DESCRIPTION_CATALOG_FORMAT
+                    or meta.get("narratives_hash") != self.narratives_hash):
+                return None
+            return DescriptionCatalog.from_file(meta, arrays)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ File katalog {self.catalog_path} tidak bisa dibaca, build ulang: {e}")
+            return None
+
+    def _write(self, catalog):
+        tmp = f"{self.catalog_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                catalog.save(f)
+            os.replace(tmp, self.catalog_path)
+        except OSError as e:
+            # Folder read-only dll: katalog tetap dipakai dari memori
+            self._stats["write_errors"] += 1
+            print(f"⚠️ Gagal menulis katalog {self.catalog_path}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def get_description_store(file_path='deskripsi.xlsx', engine=None):
+    """
+    Satu DescriptionCatalogStore per file xlsx per versi katalog engine (narasi TF-IDF ikut engine).
+    Atur lewat secrets [description_catalog]: path (file katalog), check_interval (detik).
+    """
+    engine = engine or get_engine()
+
+    def build():
+        cfg = _secrets_section("description_catalog")
+        base, _ = os.path.splitext(os.path.basename(file_path))
+        default_path = os.path.join(os.path.dirname(os.path.abspath(file_path)), f".{base}.catalog.npz")
+        return DescriptionCatalogStore(
+            file_path,
+            cfg.get("path", default_path),
+            {"A": engine.likert_text_map, "B": engine.qb_text_mapping},
+            check_interval=float(cfg.get("check_interval", 2.0)),
+        )
+    return get_engine_registry().resource(engine, f"description_store:{file_path}", build)
+
+
+def get_description_catalog(file_path='deskripsi.xlsx', engine=None):
+    return get_description_store(file_path, engine).get()
+
+def _freeze_config(obj):
+    """dict -> MappingProxyType, list -> tuple (rekursif) agar config engine read-only."""
+    if isinstance(obj, Mapping):
+        return MappingProxyType({k: _freeze_config(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze_config(v) for v in obj)
+    if isinstance(obj, set):
+        return frozenset(obj)
+    if isinstance(obj, np.ndarray):
+        obj = obj.copy()
+        obj.flags.writeable = False
+    return obj
+
+def _popcount(x):
+    """Jumlah bit 1 (SWAR, 32-bit) -- bisa untuk int Python maupun array integer NumPy."""
+    x = x - ((x >> 1) & 0x55555555)
+    x = (x & 0x33333333) + ((x >> 2) & 0x33333333)
+    x = (x + (x >> 4)) & 0x0F0F0F0F
+    return ((x * 0x01010101) & 0xFFFFFFFF) >> 24
+
+# ==========================================
+# KATALOG ENGINE (engine_catalog.json)
+# ==========================================
+# Naikkan jika struktur engine_catalog.json berubah (bukan isinya)
+ENGINE_CATALOG_SCHEMA = 1
+ENGINE_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine_catalog.json")
+
+# Nama-nama yang dipakai langsung oleh kode engine -> katalog wajib memakai nama yang sama
+SCORE_LEVELS = ("low", "mid-low", "mid-high", "high")
+LOC_LEVELS = ("external", "internal")
+ENGINE_DOMAINS = ("innovativeness", "self_efficacy", "need_achievement", "loc_internal", "loc_external")
+RULE_DOMAINS = {"self_efficacy": SCORE_LEVELS, "innovativeness": SCORE_LEVELS,
+                "need_achievement": SCORE_LEVELS, "loc": LOC_LEVELS}
+BIG5_TRAITS = ("openess", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+B5_DIMS = ("O", "C", "E", "A", "N")
+B5_SYMBOLS = ("--", "-", "0", "+", "++")
+LIKERT_VALUES = (1, 2, 3, 4, 5)
+
+
+class EngineCatalogError(ValueError):
+    """Katalog engine tidak valid; .problems berisi semua pelanggaran (bukan hanya yang pertama)."""
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("Katalog engine tidak valid:\n- " + "\n- ".join(self.problems))
+
+
+def validate_engine_catalog(data):
+    """
+    Cek struktur & isi katalog (hasil json.load) lalu kembalikan salinan yang sudah dinormalisasi
+    (kunci nilai Likert "1".."5" -> int). Semua masalah dikumpulkan -> EngineCatalogError.
+    """
+    problems = []
+
+    def names(value, where):
+        if not isinstance(value, list) or not all(isinstance(v, str) and v for v in value):
+            problems.append(f"{where}: harus list nama (string)")
+            return []
+        return value
+
+    def section(key, kind=dict):
+        value = data.get(key)
+        if not isinstance(value, kind):
+            problems.append(f"{key}: wajib ada ({kind.__name__})")
+            return kind()
+        return value
+
+    if not isinstance(data, dict):
+        raise EngineCatalogError(["isi file harus object JSON"])
+    if data.get("schema") != ENGINE_CATALOG_SCHEMA:
+        problems.append(f"schema: harus {ENGINE_CATALOG_SCHEMA}, bukan {data.get('schema')!r}")
+    if not isinstance(data.get("version"), str) or not data.get("version"):
+        problems.append("version: wajib diisi (string)")
+
+    # Part A: domain -> soal
+    domain_cols = section("domain_cols")
+    if list(domain_cols) != list(ENGINE_DOMAINS):
+        problems.append(f"domain_cols: domain harus {list(ENGINE_DOMAINS)} (urutan sama)")
+    items_A = set()
+    for domain, cols in domain_cols.items():
+        items_A.update(names(cols, f"domain_cols.{domain}") or [])
+        if not cols:
+            problems.append(f"domain_cols.{domain}: tidak boleh kosong")
+
+    # Rules fuzzy: domain -> level -> sektor
+    rules = section("rules")
+    if set(rules) != set(RULE_DOMAINS):
+        problems.append(f"rules: domain harus {sorted(RULE_DOMAINS)}")
+    for domain, levels in rules.items():
+        expected = RULE_DOMAINS.get(domain, ())
+        if not isinstance(levels, dict) or set(levels) != set(expected):
+            problems.append(f"rules.{domain}: level harus {list(expected)}")
+            continue
+        for lvl, lst in levels.items():
+            names(lst, f"rules.{domain}.{lvl}")
+
+    # Prototype sektor [SE, INN, NACH, LOC]
+    sector_proto = section("sector_proto")
+    for sector, vec in sector_proto.items():
+        if (not isinstance(vec, list) or len(vec) != 4
+                or not all(isinstance(v, int) and not isinstance(v, bool) for v in vec)
+                or not all(0 <= v < len(SCORE_LEVELS) for v in vec[:3])
+                or vec[3] not in range(len(LOC_LEVELS))):
+            problems.append(f"sector_proto.{sector}: harus [SE, INN, NACH, LOC] "
+                            f"(0-{len(SCORE_LEVELS) - 1}, LOC 0-{len(LOC_LEVELS) - 1})")
+
+    cluster_mapping = section("cluster_mapping")
+    if not cluster_mapping:
+        problems.append("cluster_mapping: minimal satu cluster")
+    for cluster, lst in cluster_mapping.items():
+        names(lst, f"cluster_mapping.{cluster}")
+    sectors = (set(sector_proto)
+               | {s for levels in rules.values() if isinstance(levels, dict)
+                  for lst in levels.values() if isinstance(lst, list) for s in lst}
+               | {s for lst in cluster_mapping.values() if isinstance(lst, list) for s in lst})
+    if len(sectors) > 62:
+        problems.append(f"total sektor {len(sectors)} > 62 (batas bitmask int64)")
+
+    rank_weights = data.get("rank_weights")
+    if (not isinstance(rank_weights, list) or not rank_weights
+            or not all(isinstance(w, int) and not isinstance(w, bool) and w > 0 for w in rank_weights)):
+        problems.append("rank_weights: harus list bilangan bulat positif")
+
+    # Part B: trait -> soal (list = normal semua, atau {"normal": [...], "reverse": [...]})
+    big5 = section("big5")
+    if list(big5) != list(BIG5_TRAITS):
+        problems.append(f"big5: trait harus {list(BIG5_TRAITS)} (urutan sama)")
+    items_B = set()
+    for trait, config in big5.items():
+        if isinstance(config, list):
+            items_B.update(names(config, f"big5.{trait}"))
+        elif isinstance(config, dict) and set(config) <= {"normal", "reverse"} and config:
+            for kind, cols in config.items():
+                items_B.update(names(cols, f"big5.{trait}.{kind}"))
+        else:
+            problems.append(f"big5.{trait}: harus list soal atau {{normal, reverse}}")
+
+    # Rule cluster Big 5: cluster -> dimensi -> simbol ('0/+' = salah satu)
+    b5_rules = section("big5_cluster_rules")
+    for cluster, sig in b5_rules.items():
+        if cluster not in cluster_mapping:
+            problems.append(f"big5_cluster_rules.{cluster}: tidak ada di cluster_mapping")
+        if not isinstance(sig, dict) or set(sig) != set(B5_DIMS):
+            problems.append(f"big5_cluster_rules.{cluster}: dimensi harus {list(B5_DIMS)}")
+            continue
+        for dim, sym in sig.items():
+            if not isinstance(sym, str) or not all(opt in B5_SYMBOLS for opt in sym.split("/")):
+                problems.append(f"big5_cluster_rules.{cluster}.{dim}: simbol {sym!r} tidak dikenal")
+
+    # Teks narasi: soal -> nilai 1-5 -> kalimat
+    text_maps = {}
+    for key, items in (("likert_text_map", items_A), ("qb_text_mapping", items_B)):
+        text_maps[key] = {}
+        for col, per_val in section(key).items():
+            if col not in items:
+                problems.append(f"{key}.{col}: bukan soal di {'domain_cols' if key == 'likert_text_map' else 'big5'}")
+            if not isinstance(per_val, dict):
+                problems.append(f"{key}.{col}: harus object nilai -> kalimat")
+                continue
+            try:
+                texts = {int(v): txt for v, txt in per_val.items()}
+            except ValueError:
+                problems.append(f"{key}.{col}: kunci harus nilai Likert 1-5")
+                continue
+            if set(texts) != set(LIKERT_VALUES) or not all(isinstance(t, str) and t for t in texts.values()):
+                problems.append(f"{key}.{col}: wajib kalimat untuk nilai 1-5")
+            text_maps[key][col] = dict(sorted(texts.items()))
+
+    if problems:
+        raise EngineCatalogError(problems)
+    return {
+        "schema": data["schema"],
+        "version": data["version"],
+        "domain_cols": domain_cols,
+        "rules": rules,
+        "sector_proto": sector_proto,
+        "cluster_mapping": cluster_mapping,
+        "rank_weights": rank_weights,
+        "big5": big5,
+        "big5_cluster_rules": b5_rules,
+        **text_maps,
+    }
+
+
+def load_engine_catalog(path=ENGINE_CATALOG_PATH):
+    """
+    Baca & validasi engine_catalog.json.
+    catalog_version = "<version>+<hash isi>" -> ikut kunci cache hasil, jadi edit yang lupa
+    menaikkan "version" tetap tidak memakai hasil lama. Bagian "notes" tidak ikut di-hash.
+    """
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise EngineCatalogError([f"JSON tidak valid: {e}"])
+    catalog = validate_engine_catalog(data)
+    h = hashlib.sha1()
+    _digest_update(h, catalog)
+    catalog["catalog_version"] = f"{catalog['version']}+{h.hexdigest()[:10]}"
+    return catalog
 
-@st.cache_data # supaya file tidak dibaca berulang kali saat klik
-def load_sector_descriptions(file_path='deskripsi.xlsx'):
-    try:
-        # Baca Excel
-        df = pd.read_excel(file_path, sheet_name='sektor')
-        
-        # Pastikan nama kolom sesuai (bersihkan spasi jika ada)
-        df.columns = [c.strip() for c in df.columns]
-        
-        # Ubah menjadi Dictionary: {'Nama Sektor': 'Deskripsi Panjang...'}
-        # Kita gunakan .title() pada Key agar seragam formatnya
-        sector_dict = dict(zip(
-        df['Sector'].astype(str).str.title().str.strip(), 
-        df['Description']
-    ))
-        
-        return sector_dict
-    except Exception as e:
-        st.error(f"Gagal membaca file deskripsi: {e}")
-        return {}
 
 class RecommenderEngine:
-    """Class untuk menangani perhitungan skor & dimensi"""
-    def __init__(self):
+    """
+    Class untuk menangani perhitungan skor & dimensi.
+    Setelah __init__ semua config dibekukan (read-only), jadi satu instance aman
+    dipakai bersama oleh semua session/thread (lihat get_engine()).
+    """
+    def __init__(self, catalog=None):
+        # Config penelitian (rules, prototype, mapping, teks narasi) dari engine_catalog.json,
+        # sudah divalidasi load_engine_catalog(); di sini hanya dikompilasi jadi array internal.
+        if catalog is None:
+            catalog = load_engine_catalog()
+        self.catalog_version = catalog["catalog_version"]
+
         # --- 1. CONFIG PART A (ENTREPRENEUR) ---
-        self.domain_cols = {
-        "innovativeness":  ["INN-CE1", "INN-O2", "INN-W1", "INN-CE2", "INN-W2", "INN-O1"],
-        "self_efficacy":   ["SE-M1", "SE-P2", "SE-IP1", "SE-IF1", "SE-S1", "SE-IF2", "SE-M2", "SE-S2", "SE-P1", "SE-IP2"],
-        "need_achievement": ["NACH-FF2", "NACH-HS1", "NACH-HS2", "NACH-FF1"],
-        "loc_internal":  ["LOC-I1", "LOC-I2"],
-        "loc_external": ["LOC-E1", "LOC-E2"]
-    }
+        self.domain_cols = catalog["domain_cols"]
         # Mapping Score Kategori ke Angka (0-3) untuk Euclidean Distance Part A
-        self.score_map = {"low": 0, "mid-low": 1, "mid-high": 2, "high": 3}
-        self.loc_map = {"external": 0, "internal": 1}
+        self.score_map = {lvl: i for i, lvl in enumerate(SCORE_LEVELS)}   # low=0 ... high=3
+        self.loc_map = {lvl: i for i, lvl in enumerate(LOC_LEVELS)}       # external=0, internal=1
         
         # Rules Fuzzy Matching (Sektor Kandidat)
-        self.rules = {
-            "self_efficacy": {
-                "high": ["Consumer Oriented Services", "Construction", "Non-High Tech Manufacturing", "Software", "Other Business Services", "Cutting-Edge Technology Manufacturing", "High Technology Manufacturing"],
-                "mid-high": ["Skill-Intensive Services"],
-                "mid-low": ["Wholesale And Retail Market", "Technology Intensive Services"],
-                "low": []
-            },
-            "innovativeness": {
-                "high": ["Non-High Tech Manufacturing", "High Technology Manufacturing", "Software", "Technology Intensive Services", "Cutting-Edge Technology Manufacturing"],
-                "mid-high": ["Consumer Oriented Services"],
-                "mid-low": ["Construction", "Wholesale And Retail Market", "Skill-Intensive Services", "Other Business Services"],
-                "low": []
-            },
-            "need_achievement": {
-                "high": ["Consumer Oriented Services", "Skill-Intensive Services", "Software", "Technology Intensive Services", "Cutting-Edge Technology Manufacturing", "High Technology Manufacturing"],
-                "mid-high": ["Construction", "Non-High Tech Manufacturing", "Other Business Services"],
-                "mid-low": [],
-                "low": ["Wholesale And Retail Market"]
-            },
-            "loc": {
-                "internal": ["Consumer Oriented Services", "Non-High Tech Manufacturing", "High Technology Manufacturing", "Software", "Technology Intensive Services", "Skill-Intensive Services", "Other Business Services", "Cutting-Edge Technology Manufacturing"],
-                "external": ["Construction", "Wholesale And Retail Market"]
-            }
-        }
+        self.rules = catalog["rules"]
         # Prototype Sektor (Target Vector Part A)
         # Urutan Vector: [SE, INN, NACH, LOC]
-        self.sector_proto = {
-        "Consumer Oriented Services":           [3, 2, 3, 1],
-        "Construction":                        [3, 1, 2, 0],
-        "Wholesale And Retail Market":         [1, 1, 0, 0],
-        "Non-High Tech Manufacturing":         [3, 3, 2, 1],
-        "Skill-Intensive Services":            [2, 1, 3, 1],
-        "Other Business Services":             [3, 1, 2, 1],
-        "High Technology Manufacturing":       [3, 3, 3, 1],
-        "Software":                            [3, 3, 3, 1],
-        "Technology Intensive Services":       [1, 3, 3, 1],
-        "Cutting-Edge Technology Manufacturing":[3, 3, 3, 1]
-        }
-    
+        self.sector_proto = catalog["sector_proto"]
+
         # Cluster Mapping (Sektor -> Cluster)
-        self.cluster_mapping = {
-        "Adaptive Services": [
-            "Wholesale And Retail Market", "Consumer Oriented Services",
-            "Non-High Tech Manufacturing", "Other Business Services"
-        ],
-        "Dynamic Knowledge Innovators": [
-            "Skill-Intensive Services", "Technology Intensive Services",
-            "Software", "High Technology Manufacturing"
-        ],
-        "Strategic Risk Navigators": [
-            "Technology Intensive Services", "Skill-Intensive Services",
-            "Other Business Services"
-        ],
-        "Multidimensional Service Innovators": [
-            "Consumer Oriented Services", "Skill-Intensive Services",
-            "Construction", "Wholesale And Retail Market",
-            "Technology Intensive Services"
-        ],
-        "Focused Tech Innovators": [
-            "Non-High Tech Manufacturing", "Other Business Services",
-            "Software", "High Technology Manufacturing"
-        ]
-    }
+        self.cluster_mapping = catalog["cluster_mapping"]
+        # Relasi Sektor <-> Cluster dikompilasi sekali jadi matriks incidence [sektor, cluster]
+        # Indeks sektor = urutan alfabetis (sama dengan sorted() di rekomendasi_per_domain)
+        self.sector_names = sorted(
+            set(self.sector_proto)
+            | {s for levels in self.rules.values() for lst in levels.values() for s in lst}
+            | {s for lst in self.cluster_mapping.values() for s in lst}
+        )
+        self.sector_index = {s: i for i, s in enumerate(self.sector_names)}
+        self.cluster_names = list(self.cluster_mapping)
+        self.cluster_index = {c: i for i, c in enumerate(self.cluster_names)}
+        self.sector_cluster_incidence = np.zeros((len(self.sector_names), len(self.cluster_names)), dtype=np.int64)
+        for cluster, sectors in self.cluster_mapping.items():
+            for s in sectors:
+                self.sector_cluster_incidence[self.sector_index[s], self.cluster_index[cluster]] += 1
+
+        # Bobot ranking sektor (Juara 1 dapat poin 5, dst)
+        self.rank_weights = np.array(catalog["rank_weights"], dtype=np.int64)
+
+        # Rules fuzzy sebagai bitmask id sektor: bit ke-i = sektor_names[i]
+        # kandidat user = OR 4 mask (SE, INN, NACH, LOC), tanpa set/string nama sektor
+        self.rule_masks = {
+            domain: {lvl: sum(1 << self.sector_index[s] for s in set(lst)) for lvl, lst in levels.items()}
+            for domain, levels in self.rules.items()
+        }
+        # Prototype sektor [SE, INN, NACH, LOC] sebagai matriks [id sektor, 4]
+        self.sector_proto_matrix = np.zeros((len(self.sector_names), 4), dtype=np.int64)
+        for s, vec in self.sector_proto.items():
+            self.sector_proto_matrix[self.sector_index[s]] = vec
+        self.proto_mask = sum(1 << self.sector_index[s] for s in self.sector_proto)
+
         # --- 2. CONFIG PART B (BIG 5) ---
         # Definisi soal mana yang Normal dan mana yang Reverse
-        self.big5 = {
-            "openess": ["OPE-1", "OPE-2", "OPE-3"], # Semua normal di notebook Anda
-            "conscientiousness": {"normal": ["CON-1", "CON-3"], "reverse": ["CON-2"]},
-            "extraversion": {"normal": ["EXT-1", "EXT-2"], "reverse": ["EXT-3"]},
-            "agreeableness": {"normal": ["AGR-2", "AGR-3"], "reverse": ["AGR-1"]},
-            "neuroticism": {"normal": ["NEU-1", "NEU-2"], "reverse": ["NEU-3"]}
-        }
+        self.big5 = catalog["big5"]
 
          # Konversi Simbol ke Angka
         self.symbol_to_num = {'++': 2.0, '+': 1.0, '0': 0.0, '-': -1.0, '--': -2.0}
 
         # Rule Cluster Big 5 (Simbol Target)
-        self.big5_cluster_rules = {
-            'Adaptive Services': {
-                'O':'++', 'C':'0/+', 'E':'+',  'A':'0',    'N':'--'
-            },
-            'Dynamic Knowledge Innovators': {
-                'O':'++', 'C':'-',   'E':'++', 'A':'-',    'N':'--'
-            },
-            'Strategic Risk Navigators': {
-                'O':'++', 'C':'-',   'E':'+',  'A':'-',    'N':'--'
-            },
-            'Multidimensional Service Innovators': {
-                'O':'++','C':'-/+','E':'0/++', 'A':'--/0','N':'--/+'
-            },
-            'Focused Tech Innovators': {
-                'O':'++','C':'-','E':'-/+','A':'0/+','N':'-'
-            }
-        }
+        self.big5_cluster_rules = catalog["big5_cluster_rules"]
         
         self.cluster_protos = {
             name: self.cluster_proto_numeric(sig) 
             for name, sig in self.big5_cluster_rules.items()
         }
+
+        # Rule Big 5 dikompilasi jadi bitmask: 1 bit per simbol, 5 bit per dimensi (total 25 bit)
+        # contoh 'C':'0/+' -> bit '0' | bit '+' pada blok dimensi C
+        self.b5_dims = list(B5_DIMS)
+        self.b5_symbols = sorted(self.symbol_to_num, key=self.symbol_to_num.get)  # '--', '-', '0', '+', '++'
+        self.b5_symbol_bit = {sym: 1 << i for i, sym in enumerate(self.b5_symbols)}
+        self.b5_cluster_names = list(self.big5_cluster_rules)
+        self.b5_rule_masks = np.zeros((len(self.b5_cluster_names), len(self.b5_dims)), dtype=np.int64)
+        for ci, name in enumerate(self.b5_cluster_names):
+            for di, dim in enumerate(self.b5_dims):
+                for opt in self.big5_cluster_rules[name][dim].split('/'):
+                    self.b5_rule_masks[ci, di] |= self.b5_symbol_bit[opt]
+        self.b5_rule_packed = (self.b5_rule_masks << (5 * np.arange(len(self.b5_dims)))).sum(axis=1)
+
+        # --- 3. MATRIKS SKOR (SOAL -> RATA-RATA) ---
+        # Grup = rata-rata beberapa soal. Soal reverse (6 - x) = bobot -1 + offset 6.
+        # Trait = 1 grup (domain, openess) atau rata-rata grup normal & reverse (Big 5 lain).
+        groups = []
+        self.score_traits = {}
+        self.score_parts = {"A": [], "B": []}
+        for domain, cols in self.domain_cols.items():
+            self.score_traits[domain] = [len(groups)]
+            groups.append((cols, False))
+            self.score_parts["A"].append(domain)
+        for trait, config in self.big5.items():
+            name = f"avg_{trait}"
+            if isinstance(config, (list, tuple)):
+                self.score_traits[name] = [len(groups)]
+                groups.append((config, False))
+            else:
+                self.score_traits[name] = [len(groups), len(groups) + 1]
+                groups.append((config.get("normal", []), False))
+                groups.append((config.get("reverse", []), True))
+            self.score_parts["B"].append(name)
+
+        # Kolom matriks jawaban; soal Part A wajib ada, soal Big 5 default 3 (netral)
+        self.score_items = list(dict.fromkeys(c for cols, _ in groups for c in cols))
+        required = {c for cols in self.domain_cols.values() for c in cols}
+        self.score_required = [c in required for c in self.score_items]
+        item_idx = {c: i for i, c in enumerate(self.score_items)}
+        self.score_weights = np.zeros((len(self.score_items), len(groups)), dtype=np.int64)
+        self.score_offsets = np.zeros(len(groups), dtype=np.int64)
+        self.score_counts = np.array([len(cols) for cols, _ in groups], dtype=np.int64)
+        for g, (cols, reverse) in enumerate(groups):
+            for c in cols:
+                self.score_weights[item_idx[c], g] += -1 if reverse else 1
+                if reverse:
+                    self.score_offsets[g] += 6
         
         # --- HYBRID ---
 
-        # 4 DOMAIN KEWIRAUSAHAAN
-        self.likert_text_map = {
-            "SE-S1": { # Self-Efficacy A. Searching (yakin bisa menemukan peluang usaha)
-                1: "Saya sangat tidak percaya diri dalam mengidentifikasi kebutuhan atau peluang baru untuk dijadikan produk, layanan, atau solusi.",
-                2: "Saya tidak percaya diri dapat mengidentifikasi kebutuhan atau peluang baru yang bisa dikembangkan menjadi produk, layanan, atau solusi.",
-                3: "Saya cukup percaya diri, namun belum konsisten, dalam mengidentifikasi kebutuhan atau peluang baru untuk diwujudkan menjadi produk, layanan, atau solusi.",
-                4: "Saya percaya diri dalam mengidentifikasi kebutuhan atau peluang baru yang dapat dikembangkan menjadi produk, layanan, atau solusi.",
-                5: "Saya sangat percaya diri dan merasa mampu secara konsisten mengidentifikasi kebutuhan atau peluang baru yang bisa diwujudkan menjadi produk, layanan, atau solusi."
-            },
-            "SE-S2": { # Self-Efficacy A. Searching (merancang ide/solusi baru)
-                1: "Saya sangat tidak percaya diri dalam merancang ide atau solusi baru yang sesuai dengan kebutuhan pasar.",
-                2: "Saya tidak percaya diri dapat merancang ide atau solusi baru yang sesuai dengan kebutuhan pasar.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam merancang ide atau solusi baru yang sesuai dengan kebutuhan pasar.",
-                4: "Saya percaya diri dalam merancang ide atau solusi baru yang sesuai dengan kebutuhan pasar.",
-                5: "Saya sangat percaya diri dan merasa mampu secara konsisten merancang ide atau solusi baru yang sesuai dengan kebutuhan pasar."
-            },
-            "SE-P1": { # Self-Efficacy B. Planning (menyusun rencana bisnis)
-                1: "Saya sangat tidak percaya diri dalam menyusun rencana bisnis, termasuk memperkirakan permintaan pasar dan merancang strategi pemasaran.",
-                2: "Saya tidak percaya diri dapat menyusun rencana bisnis, memperkirakan permintaan pasar, atau membuat strategi pemasaran.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam menyusun rencana bisnis serta memperkirakan permintaan pasar dan strategi pemasaran.",
-                4: "Saya percaya diri dapat menyusun rencana bisnis, termasuk memperkirakan permintaan pasar dan strategi pemasaran.",
-                5: "Saya sangat percaya diri dan merasa mampu secara konsisten menyusun rencana bisnis, memperkirakan permintaan pasar, serta mengembangkan strategi pemasaran."
-            },
-            "SE-P2": { # Self-Efficacy B. Planning (memperkirakan modal)
-                1: "Saya sangat tidak percaya diri dalam memperkirakan jumlah modal awal maupun modal kerja yang dibutuhkan untuk memulai atau menjalankan usaha, proyek, atau kegiatan baru.",
-                2: "Saya tidak percaya diri dapat memperkirakan modal awal dan modal kerja yang diperlukan untuk memulai atau menjalankan usaha, proyek, atau kegiatan baru.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam memperkirakan jumlah modal awal dan modal kerja yang diperlukan untuk memulai atau menjalankan usaha, proyek, atau kegiatan baru.",
-                4: "Saya percaya diri dapat memperkirakan jumlah modal awal dan modal kerja yang diperlukan untuk memulai atau menjalankan usaha, proyek, atau kegiatan baru.",
-                5: "Saya sangat percaya diri dan merasa mampu secara konsisten memperkirakan jumlah modal awal dan modal kerja yang diperlukan untuk memulai atau menjalankan usaha, proyek, atau kegiatan baru."
-            },
-            "SE-M1": { # Self-Efficacy C. Marshalling (networking)
-                1: "Saya sangat tidak percaya diri dalam melakukan networking, termasuk membangun hubungan dan bertukar informasi yang bermanfaat dengan berbagai pihak untuk mendukung kegiatan atau proyek saya.",
-                2: "Saya tidak percaya diri dapat melakukan networking atau membangun hubungan yang bermanfaat dengan berbagai pihak untuk mendukung kegiatan atau proyek saya.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam melakukan networking dan membangun hubungan serta bertukar informasi yang bermanfaat dengan berbagai pihak.",
-                4: "Saya percaya diri dapat melakukan networking, membangun hubungan, dan bertukar informasi yang bermanfaat dengan berbagai pihak untuk mendukung kegiatan atau proyek saya.",
-                5: "Saya sangat percaya diri dan mampu secara konsisten melakukan networking, membangun hubungan, serta bertukar informasi yang bermanfaat dengan berbagai pihak untuk mendukung kegiatan atau proyek saya."
-            },
-            "SE-M2": { # Self-Efficacy C. Marshalling (meyakinkan orang lain)
-                1: "Saya sangat tidak percaya diri dalam meyakinkan orang lain untuk memahami, mendukung, atau berkomitmen pada visi dan rencana yang saya buat.",
-                2: "Saya tidak percaya diri dapat meyakinkan orang lain agar memahami, mendukung, dan ikut berkomitmen pada visi serta rencana yang saya buat.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam meyakinkan orang lain untuk memahami, mendukung, dan berkomitmen pada visi serta rencana saya.",
-                4: "Saya percaya diri dapat meyakinkan orang lain untuk memahami, mendukung, dan ikut berkomitmen pada visi serta rencana yang saya buat.",
-                5: "Saya sangat percaya diri dan mampu secara konsisten meyakinkan orang lain untuk memahami, mendukung, serta berkomitmen pada visi dan rencana yang saya buat."
-            },
-            "SE-IP1": { # Self-Efficacy D. Implementing-people (memotivasi tim)
-                1: "Saya tidak percaya diri bahwa saya mampu memotivasi atau mendorong anggota tim untuk tetap semangat dalam bekerja.",
-                2: "Saya kurang percaya diri bahwa saya dapat memotivasi anggota tim agar tetap semangat dalam bekerja.",
-                3: "Saya merasa cukup percaya diri, tetapi belum tentu selalu bisa memotivasi anggota tim agar tetap semangat dalam bekerja.",
-                4: "Saya percaya diri bahwa saya mampu memotivasi dan mendorong anggota tim untuk tetap semangat dalam bekerja.",
-                5: "Saya sangat percaya diri bahwa saya dapat memotivasi dan mendorong anggota tim sehingga mereka tetap bersemangat dalam bekerja."
-            },
-            "SE-IP2": { # Self-Efficacy D. Implementing-people (memilih orang tepat)
-                1: "Saya sangat tidak percaya diri dalam memilih orang yang tepat untuk bekerja sama maupun membantu mereka mengembangkan kemampuan yang dibutuhkan.",
-                2: "Saya tidak percaya diri dapat memilih orang yang tepat untuk bekerja sama atau membantu mereka mengembangkan kemampuan yang diperlukan.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam memilih orang yang tepat untuk bekerja sama dan membantu mereka mengembangkan kemampuan yang dibutuhkan.",
-                4: "Saya percaya diri dapat memilih orang yang tepat untuk bekerja sama serta membantu mereka mengembangkan kemampuan yang dibutuhkan.",
-                5: "Saya sangat percaya diri dan mampu secara konsisten memilih orang yang tepat untuk bekerja sama serta membantu mereka mengembangkan kemampuan yang dibutuhkan."
-            },
-            "SE-IF1": { # Self-Efficacy E. Implementing-finance (mengorganisir catatan keuangan)
-                1: "Saya sangat tidak percaya diri dalam mengorganisir atau memelihara catatan keuangan untuk usaha, proyek, atau kegiatan yang saya jalankan.",
-                2: "Saya tidak percaya diri dapat mengorganisir dan memelihara catatan keuangan untuk usaha, proyek, atau kegiatan yang saya jalankan.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam mengorganisir dan memelihara catatan keuangan untuk usaha, proyek, atau kegiatan yang saya jalankan.",
-                4: "Saya percaya diri dapat mengorganisir dan memelihara catatan keuangan untuk usaha, proyek, atau kegiatan yang saya jalankan.",
-                5: "Saya sangat percaya diri dan mampu secara konsisten mengorganisir serta memelihara catatan keuangan untuk usaha, proyek, atau kegiatan yang saya jalankan."
-            },
-            "SE-IF2": { # Self-Efficacy E. Implementing-finance (mengelola aset/sumber daya keuangan)
-                1: "Saya sangat tidak percaya diri dalam mengelola aset atau sumber daya keuangan secara efektif untuk usaha, proyek, atau kegiatan saya.",
-                2: "Saya tidak percaya diri dapat mengelola aset atau sumber daya keuangan secara efektif dalam usaha, proyek, atau kegiatan saya.",
-                3: "Saya cukup percaya diri, tetapi belum konsisten, dalam mengelola aset atau sumber daya keuangan secara efektif untuk usaha, proyek, atau kegiatan saya.",
-                4: "Saya percaya diri dapat mengelola aset atau sumber daya keuangan secara efektif dalam usaha, proyek, atau kegiatan saya.",
-                5: "Saya sangat percaya diri dan mampu secara konsisten mengelola aset atau sumber daya keuangan secara efektif dalam usaha, proyek, atau kegiatan saya."
-            },
-            "INN-O1": { # Innovativeness A. Openness to new ideas (menikmati ide baru)
-                1: "Saya sangat tidak menikmati mencoba ide-ide baru.",
-                2: "Saya tidak menikmati mencoba ide-ide baru.",
-                3: "Saya kadang menikmati, tetapi tidak selalu, ketika mencoba ide-ide baru.",
-                4: "Saya menikmati mencoba ide-ide baru.",
-                5: "Saya sangat menikmati dan merasa antusias ketika mencoba ide-ide baru."
-            },
-            "INN-O2": { # Innovativeness A. Openness to new ideas (terbuka cara baru)
-                1: "Saya sangat tidak terbuka untuk menggunakan cara baru, terutama jika cara tersebut belum umum dipraktikkan orang lain.",
-                2: "Saya tidak terbuka untuk menggunakan cara baru yang belum umum dipraktikkan orang lain.",
-                3: "Saya cukup terbuka, tetapi tidak selalu, untuk menggunakan cara baru meskipun belum umum dipraktikkan orang lain.",
-                4: "Saya terbuka untuk menggunakan cara baru meskipun cara tersebut belum umum dipraktikkan orang lain.",
-                5: "Saya sangat terbuka dan dengan mudah menerima cara baru meskipun belum umum dipraktikkan orang lain."
-            },
-            "INN-W1": { # Innovativeness B. Willingness to change (bersedia coba cara baru)
-                1: "Saya sangat tidak bersedia mencoba cara baru, terutama jika berbeda dari kebiasaan saya sebelumnya.",
-                2: "Saya tidak bersedia mencoba cara baru yang berbeda dari kebiasaan saya sebelumnya.",
-                3: "Saya kadang bersedia, tetapi tidak selalu, mencoba cara baru meskipun berbeda dari kebiasaan saya sebelumnya.",
-                4: "Saya bersedia mencoba cara baru meskipun berbeda dari kebiasaan saya sebelumnya.",
-                5: "Saya sangat bersedia dan nyaman mencoba cara baru meskipun berbeda dari kebiasaan atau pola yang biasa saya lakukan."
-            },
-            "INN-W2": { # Innovativeness B. Willingness to change (antusias adaptasi)
-                1: "Saya sangat tidak merasa antusias ketika harus beradaptasi dengan situasi baru; justru saya cenderung menghindarinya.",
-                2: "Saya tidak merasa antusias ketika harus beradaptasi dengan situasi baru.",
-                3: "Saya kadang merasa antusias, tetapi tidak selalu, ketika harus beradaptasi dengan situasi baru.",
-                4: "Saya merasa antusias ketika harus beradaptasi dengan situasi baru.",
-                5: "Saya sangat merasa antusias dan justru bersemangat ketika harus beradaptasi dengan situasi baru."
-            },
-            "INN-CE1": { # Innovativeness C. Curiosity & experimentation (tertantang ketidakpastian)
-                1: "Saya sangat tidak merasa tertantang oleh ketidakpastian atau masalah yang belum terpecahkan; justru saya menghindarinya.",
-                2: "Saya tidak merasa tertantang oleh ketidakpastian dan masalah yang belum terpecahkan.",
-                3: "Saya kadang merasa tertantang, tetapi tidak selalu, oleh ketidakpastian dan masalah yang belum terpecahkan.",
-                4: "Saya merasa tertantang oleh ketidakpastian dan masalah yang belum terpecahkan.",
-                5: "Saya sangat merasa tertantang dan justru termotivasi oleh ketidakpastian serta masalah yang belum terpecahkan."
-            },
-            "INN-CE2": { # Innovativeness C. Curiosity & experimentation (mengimprovisasi metode)
-                1: "Saya sangat jarang atau tidak pernah mengimprovisasi metode ketika memecahkan masalah yang jawabannya tidak jelas.",
-                2: "Saya jarang mengimprovisasi metode untuk memecahkan masalah ketika jawabannya tidak jelas.",
-                3: "Saya kadang-kadang mengimprovisasi metode untuk memecahkan masalah ketika jawabannya tidak jelas.",
-                4: "Saya sering mengimprovisasi metode untuk memecahkan masalah ketika jawabannya tidak jelas.",
-                5: "Saya sangat sering dan secara alami mengimprovisasi metode untuk memecahkan masalah ketika jawabannya tidak jelas."
-            },
-            "LOC-I1": { # Locus of Control A. Internal (bekerja sungguh-sungguh)
-                1: "Saya merasa bahwa meskipun saya bekerja dengan sungguh-sungguh, saya tetap tidak bisa mencapai hasil yang saya inginkan.",
-                2: "Saya menilai bahwa bekerja dengan sungguh-sungguh tidak selalu membuat saya mencapai hasil yang saya inginkan.",
-                3: "Saya merasa bekerja dengan sungguh-sungguh kadang membantu, tetapi tidak selalu memastikan saya mendapat hasil yang saya inginkan.",
-                4: "Saya meyakini bahwa bekerja dengan sungguh-sungguh biasanya membuat saya mencapai hasil yang saya inginkan.",
-                5: "Saya sangat yakin bahwa jika saya bekerja dengan sungguh-sungguh, saya pasti bisa mencapai hasil yang saya inginkan."
-            },
-            "LOC-I2": { # Locus of Control A. Internal (hasil bergantung pada usaha)
-                1: "Saya merasa hasil pekerjaan saya hampir tidak ada hubungannya dengan usaha atau cara saya bekerja.",
-                2: "Saya menilai usaha dan cara saya bekerja tidak terlalu menentukan hasil pekerjaan saya.",
-                3: "Saya merasa usaha dan cara saya bekerja kadang berpengaruh, kadang tidak terhadap hasil pekerjaan saya.",
-                4: "Saya meyakini bahwa usaha dan cara saya bekerja umumnya menentukan hasil pekerjaan saya.",
-                5: "Saya sangat yakin bahwa hasil pekerjaan saya sepenuhnya bergantung pada usaha dan cara saya bekerja."
-            },
-            "LOC-E1": { # Locus of Control B. External (keberhasilan ditentukan faktor luar)
-                1: "Saya sangat tidak merasa bahwa keberhasilan dalam pekerjaan ditentukan oleh faktor di luar kendali saya; saya percaya keberhasilan terutama berasal dari usaha dan tindakan saya sendiri.",
-                2: "Saya tidak merasa bahwa keberhasilan dalam pekerjaan banyak ditentukan oleh faktor di luar kendali saya.",
-                3: "Saya kadang merasa demikian, tetapi tidak selalu; sebagian keberhasilan menurut saya dipengaruhi faktor luar, sebagian dipengaruhi usaha saya.",
-                4: "Saya merasa bahwa keberhasilan dalam pekerjaan banyak ditentukan oleh faktor di luar kendali saya.",
-                5: "Saya sangat merasa bahwa keberhasilan dalam pekerjaan terutama ditentukan oleh faktor-faktor di luar kendali saya."
-            },
-            "LOC-E2": { # Locus of Control B. External (hasil kerja dipengaruhi orang lain)
-                1: "Saya sangat tidak percaya bahwa hasil kerja saya terutama dipengaruhi oleh keadaan atau orang lain; saya meyakini bahwa usaha saya adalah faktor utamanya.",
-                2: "Saya tidak percaya bahwa hasil kerja saya banyak dipengaruhi oleh keadaan atau orang lain.",
-                3: "Saya cukup percaya, tetapi tidak sepenuhnya yakin, bahwa hasil kerja saya dipengaruhi oleh keadaan atau orang lain.",
-                4: "Saya percaya bahwa hasil kerja saya banyak dipengaruhi oleh keadaan atau orang lain.",
-                5: "Saya sangat percaya bahwa hasil kerja saya terutama dipengaruhi oleh keadaan atau orang lain, bukan oleh usaha saya sendiri."
-            },
-            "NACH-HS1": { # Need for Achievement A. Hope of Success (termotivasi segera bertindak)
-                1: "Saya sangat tidak termotivasi untuk segera bertindak ketika menghadapi tantangan, bahkan jika tantangan tersebut bisa saya selesaikan.",
-                2: "Saya tidak termotivasi untuk segera bertindak ketika menghadapi tantangan yang bisa saya selesaikan.",
-                3: "Saya kadang termotivasi, tetapi tidak selalu, untuk segera bertindak ketika menghadapi tantangan yang bisa saya selesaikan.",
-                4: "Saya termotivasi untuk segera bertindak ketika menghadapi tantangan yang bisa saya selesaikan.",
-                5: "Saya sangat termotivasi dan langsung terdorong untuk mengambil tindakan ketika menghadapi tantangan yang bisa saya selesaikan."
-            },
-            "NACH-HS2": { # Need for Achievement A. Hope of Success (menikmati pengembangan kemampuan)
-                1: "Saya sangat tidak menikmati situasi di mana saya bisa menggunakan dan mengembangkan kemampuan saya.",
-                2: "Saya tidak menikmati situasi di mana saya bisa menggunakan dan mengembangkan kemampuan saya.",
-                3: "Saya kadang menikmati, tetapi tidak selalu, situasi di mana saya bisa menggunakan dan mengembangkan kemampuan saya.",
-                4: "Saya menikmati situasi di mana saya bisa menggunakan dan mengembangkan kemampuan saya.",
-                5: "Saya sangat menikmati dan merasa bersemangat dalam situasi di mana saya dapat menggunakan sekaligus mengembangkan kemampuan saya."
-            },
-            "NACH-FF1": { # Need for Achievement B. Fear of Failure (takut gagal)
-                1: "Saya sangat tidak merasa takut gagal, bahkan dalam situasi sulit ketika banyak hal bergantung pada saya.",
-                2: "Saya tidak merasa takut gagal dalam situasi agak sulit ketika banyak hal bergantung pada saya.",
-                3: "Saya kadang merasa takut gagal, namun tidak selalu, dalam situasi agak sulit ketika banyak hal bergantung pada saya.",
-                4: "Saya merasa takut gagal dalam situasi agak sulit ketika banyak hal bergantung pada saya.",
-                5: "Saya sangat merasa takut gagal dalam situasi agak sulit ketika banyak hal bergantung pada saya."
-            },
-            "NACH-FF2": { # Need for Achievement B. Fear of Failure (merasa cemas)
-                1: "Saya sangat tidak merasa cemas ketika tidak langsung mengerti sebuah masalah.",
-                2: "Saya tidak merasa cemas meskipun tidak langsung mengerti sebuah masalah.",
-                3: "Saya kadang merasa cemas, tetapi tidak selalu, ketika saya tidak langsung mengerti sebuah masalah.",
-                4: "Saya merasa cemas ketika saya tidak langsung mengerti sebuah masalah.",
-                5: "Saya sangat merasa cemas ketika tidak langsung mengerti sebuah masalah."
-            }
-        }
-
-
+        # Kalimat narasi per (soal, nilai 1-5): 4 domain kewirausahaan & Big 5
+        self.likert_text_map = catalog["likert_text_map"]
+        self.qb_text_mapping = catalog["qb_text_mapping"]
+        h = hashlib.sha1()
+        _digest_update(h, {"A": self.likert_text_map, "B": self.qb_text_mapping})
+        self.narratives_hash = h.hexdigest()
 
-        self.qb_text_mapping = {
-            "OPE-1": { # Saya adalah seseorang yang orisinil dan membawa ide-ide baru [cite: 370, 371]
-                1: "Saya tidak merasa diri saya orisinil dan jarang membawa ide-ide baru.", # [cite: 371]
-                2: "Saya kadang merasa sulit untuk menghasilkan ide baru dan tidak selalu menunjukkan keorisinalan.", # [cite: 372]
-                3: "Saya sesekali menunjukkan keorisinalan dan terkadang membawa ide-ide baru.", # [cite: 373]
-                4: "Saya sering menunjukkan keorisinalan dan sering membawa ide-ide baru.", # [cite: 373]
-                5: "Saya sangat orisinil dan secara konsisten membawa ide-ide baru." # [cite: 374]
-            },
-            "OPE-2": { # Saya adalah seseorang yang menghargai pengalaman artistik [cite: 375]
-                1: "Saya tidak menghargai pengalaman artistik dan jarang merasa tertarik pada hal-hal yang bersifat seni.", # [cite: 375]
-                2: "Saya kurang menghargai pengalaman artistik dan tidak sering merasa terlibat dalam kegiatan atau apresiasi seni.", # [cite: 376]
-                3: "Saya kadang-kadang menghargai pengalaman artistik, tergantung situasi atau konteksnya.", # [cite: 377]
-                4: "Saya sering menghargai pengalaman artistik dan menikmati berbagai bentuk kegiatan atau karya seni.", # [cite: 377]
-                5: "Saya sangat menghargai pengalaman artistik dan secara konsisten menikmati serta mencari kesempatan untuk terlibat dalam seni." # [cite: 378]
-            },
-            "OPE-3": { # Saya adalah seseorang yang memiliki imajinasi yang jelas/hidup (atau kaya) dan penuh fantasi [cite: 379, 380]
-                1: "Saya tidak memiliki imajinasi yang hidup dan jarang membayangkan hal-hal secara kreatif atau fantastis.", # [cite: 381]
-                2: "Saya memiliki imajinasi yang kurang hidup dan tidak sering berfantasi atau membayangkan hal-hal secara mendetail.", # [cite: 382]
-                3: "Saya memiliki imajinasi yang kadang-kadang hidup, dan sesekali membayangkan hal-hal secara kreatif atau fantastis.", # [cite: 383]
-                4: "Saya memiliki imajinasi yang cukup hidup dan sering membayangkan hal-hal secara kreatif dan penuh fantasi.", # [cite: 384]
-                5: "Saya memiliki imajinasi yang sangat hidup dan kaya, serta secara konsisten membayangkan hal-hal secara kreatif, mendetail, dan penuh fantasi." # [cite: 385]
-            },
-            "CON-1": { # Saya adalah seseorang yang bekerja secara teliti (atau menyeluruh) [cite: 386]
-                1: "Saya tidak teliti dalam bekerja dan sering melewatkan detail penting.", # [cite: 387]
-                2: "Saya kurang teliti dan kadang melewatkan beberapa detail dalam pekerjaan.", # [cite: 387]
-                3: "Saya kadang-kadang teliti, tetapi tidak selalu konsisten dalam memperhatikan detail.", # [cite: 388]
-                4: "Saya biasanya bekerja dengan teliti dan umumnya memperhatikan detail dengan baik.", # [cite: 389]
-                5: "Saya sangat teliti dan selalu memperhatikan setiap detail secara menyeluruh dalam pekerjaan." # [cite: 390]
-            },
-            "CON-2": { # Saya adalah seseorang yang cenderung malas (atau agak malas) [cite: 391]
-                1: "Saya tidak merasa malas dan selalu berusaha aktif dalam menyelesaikan pekerjaan.", # [cite: 391]
-                2: "Saya jarang merasa malas dan biasanya tetap berinisiatif untuk menyelesaikan tugas.", # [cite: 392]
-                3: "Saya kadang-kadang merasa malas, tetapi hal itu tidak terlalu sering mempengaruhi pekerjaan saya.", # [cite: 393]
-                4: "Saya sering merasa malas dan hal itu kadang membuat saya menunda pekerjaan.", # [cite: 394]
-                5: "Saya sangat cenderung malas dan sering menunda atau menghindari pekerjaan yang seharusnya saya lakukan." # [cite: 395]
-            },
-            "CON-3": { # Saya adalah seseorang yang menyelesaikan tugas secara efektif dan efisien [cite: 396]
-                1: "Saya tidak menyelesaikan tugas secara efektif dan efisien, dan sering membutuhkan waktu lebih lama dari yang diperlukan.", # [cite: 397]
-                2: "Saya kurang efektif dan efisien dalam menyelesaikan tugas dan kadang bekerja lebih lambat dari yang seharusnya.", # [cite: 398]
-                3: "Saya kadang efektif dan efisien, tetapi tidak selalu konsisten dalam menyelesaikan tugas.", # [cite: 399]
-                4: "Saya biasanya menyelesaikan tugas dengan efektif dan efisien dan mampu mengatur waktu dengan baik.", # [cite: 400]
-                5: "Saya sangat efektif dan efisien dalam menyelesaikan tugas dan secara konsisten bekerja dengan cepat serta terorganisir." # [cite: 401]
-            },
-            "EXT-1": { # Saya adalah seseorang yang komunikatif dan banyak bicara (atau cerewet) [cite: 402]
-                1: "Saya tidak komunikatif dan jarang berbicara dalam berbagai situasi.", # [cite: 403]
-                2: "Saya kurang komunikatif dan tidak terlalu sering berbicara atau terlibat dalam percakapan.", # [cite: 403]
-                3: "Saya kadang-kadang komunikatif, tetapi frekuensi berbicara saya bervariasi tergantung situasinya.", # [cite: 404]
-                4: "Saya biasanya komunikatif dan sering berbicara atau terlibat dalam percakapan.", # [cite: 404]
-                5: "Saya sangat komunikatif dan sering sekali berbicara atau menjadi orang yang paling aktif dalam percakapan." # [cite: 405]
-            },
-            "EXT-2": { # Saya adalah seseorang yang bisa keluar sendiri dan bersosialisasi (atau mudah bergaul) [cite: 406, 407]
-                1: "Saya tidak mudah bergaul dan jarang ingin keluar sendiri atau bersosialisasi.", # [cite: 408]
-                2: "Saya kurang suka bersosialisasi dan tidak terlalu nyaman keluar atau bergaul dengan orang baru.", # [cite: 409]
-                3: "Saya kadang-kadang mau bersosialisasi atau keluar sendiri, tetapi itu tergantung situasi.", # [cite: 410]
-                4: "Saya mudah bergaul dan sering merasa nyaman untuk keluar sendiri serta bersosialisasi.", # [cite: 411]
-                5: "Saya sangat mudah bergaul dan sangat nyaman keluar sendiri serta aktif bersosialisasi dengan banyak orang." # [cite: 412]
-            },
-            "EXT-3": { # Saya adalah seseorang yang pendiam (atau tertutup) [cite: 413]
-                1: "Saya tidak pendiam dan sering berbicara atau terbuka dalam berbagai situasi.", # [cite: 414]
-                2: "Saya kurang pendiam dan biasanya cukup terbuka untuk berbicara dengan orang lain.", # [cite: 415]
-                3: "Saya kadang pendiam, tetapi di beberapa situasi saya bisa cukup terbuka.", # [cite: 416]
-                4: "Saya biasanya pendiam dan lebih sering memilih untuk tidak banyak berbicara.", # [cite: 417]
-                5: "Saya sangat pendiam dan lebih suka tertutup, jarang berbicara atau mengungkapkan hal kepada orang lain." # [cite: 418]
-            },
-            "AGR-1": { # Saya adalah seseorang yang kadang-kadang agak kasar (atau sedikit tidak sopan) kepada orang lain [cite: 419, 420]
-                1: "Saya tidak pernah bersikap kasar atau tidak sopan kepada orang lain.", # [cite: 421]
-                2: "Saya jarang bersikap kasar atau tidak sopan, dan umumnya tetap menjaga sikap.", # [cite: 422]
-                3: "Saya kadang-kadang bisa bersikap agak kasar, tetapi tidak terlalu sering.", # [cite: 423]
-                4: "Saya cukup sering bersikap agak kasar atau sedikit tidak sopan dalam beberapa situasi.", # [cite: 424]
-                5: "Saya sering bersikap agak kasar atau tidak sopan kepada orang lain dalam berbagai situasi." # [cite: 425]
-            },
-            "AGR-2": { # Saya adalah seseorang yang mudah memaafkan (atau bisa memaafkan) [cite: 426]
-                1: "Saya sulit memaafkan dan jarang melupakan kesalahan orang lain.", # [cite: 426]
-                2: "Saya kurang mudah memaafkan, meskipun kadang bisa melakukannya setelah waktu yang cukup lama.", # [cite: 427]
-                3: "Saya kadang-kadang bisa memaafkan, tergantung situasi dan tingkat kesalahannya.", # [cite: 428]
-                4: "Saya biasanya mudah memaafkan dan tidak menyimpan rasa kesal terlalu lama.", # [cite: 428]
-                5: "Saya sangat mudah memaafkan dan cepat mengesampingkan kesalahan orang lain tanpa menyimpannya di hati." # [cite: 429]
-            },
-            "AGR-3": { # Saya adalah seseorang yang penuh perhatian dan baik hati terhadap orang lain [cite: 430]
-                1: "Saya tidak penuh perhatian dan jarang menunjukkan kebaikan hati kepada orang lain.", # [cite: 431]
-                2: "Saya kurang perhatian dan tidak selalu menunjukkan kebaikan hati dalam interaksi saya.", # [cite: 432]
-                3: "Saya kadang-kadang perhatian dan baik hati, tetapi tidak selalu konsisten.", # [cite: 432]
-                4: "Saya biasanya penuh perhatian dan sering menunjukkan kebaikan hati kepada orang lain.", # [cite: 433]
-                5: "Saya sangat penuh perhatian dan secara konsisten menunjukkan kebaikan hati kepada orang lain." # [cite: 434]
-            },
-            "NEU-1": { # Saya adalah seseorang yang sering khawatir [cite: 435]
-                1: "Saya jarang merasa khawatir dan umumnya tenang dalam berbagai situasi.", # [cite: 435]
-                2: "Saya tidak terlalu sering khawatir, meskipun sesekali bisa merasa cemas.", # [cite: 436]
-                3: "Saya kadang-kadang merasa khawatir, tergantung situasi atau tekanan yang dihadapi.", # [cite: 436]
-                4: "Saya sering merasa khawatir dalam berbagai situasi, terutama ketika menghadapi ketidakpastian.", # [cite: 437]
-                5: "Saya sangat sering merasa khawatir dan mudah cemas dalam banyak keadaan." # [cite: 438]
-            },
-            "NEU-2": { # Saya adalah seseorang yang mudah gugup [cite: 439]
-                1: "Saya jarang merasa gugup dan biasanya tetap tenang dalam berbagai situasi.", # [cite: 439]
-                2: "Saya tidak mudah gugup, meskipun sesekali bisa merasa tegang dalam kondisi tertentu.", # [cite: 440]
-                3: "Saya kadang-kadang gugup, tergantung konteks dan situasinya.", # [cite: 440]
-                4: "Saya cukup mudah gugup dan sering merasa tegang dalam beberapa situasi.", # [cite: 441]
-                5: "Saya sangat mudah gugup dan sering merasa tegang bahkan dalam situasi yang ringan sekalipun." # [cite: 442]
-            },
-            "NEU-3": { # Saya adalah seseorang yang santai dan dapat mengatasi stres dengan baik [cite: 443, 444]
-                1: "Saya tidak santai dan sering kesulitan mengatasi stres.", # [cite: 444]
-                2: "Saya kurang santai dan kadang merasa sulit mengatasi stres.", # [cite: 445]
-                3: "Saya kadang santai, tetapi kemampuan saya dalam mengatasi stres bervariasi tergantung situasinya.", # [cite: 445]
-                4: "Saya biasanya santai dan cukup baik dalam mengatasi stres.", # [cite: 446]
-                5: "Saya sangat santai dan sangat mampu mengatasi stres dengan baik dalam berbagai situasi." # [cite: 446]
-            }
-        }
+        # --- BEKUKAN CONFIG ---
+        for name, value in list(vars(self).items()):
+            object.__setattr__(self, name, _freeze_config(value))
+        object.__setattr__(self, "_frozen", True)
 
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"RecommenderEngine read-only: tidak bisa mengubah '{name}'")
+        object.__setattr__(self, name, value)
 
-    
+    def __delattr__(self, name):
+        raise AttributeError(f"RecommenderEngine read-only: tidak bisa menghapus '{name}'")
 
     # MULAI
+    # --- SKOR (SATU PERKALIAN MATRIKS) ---
+    def answer_matrix(self, answers):
+        """
+        Jawaban -> matriks N x soal (urutan kolom = self.score_items), soal kosong diisi 3.
+        answers: dict (1 user) atau DataFrame (N user, kolom = kode soal).
+        """
+        if isinstance(answers, pd.DataFrame):
+            n = len(answers)
+            return np.column_stack([
+                answers[c].to_numpy() if c in answers.columns else np.full(n, 3)
+                for c in self.score_items
+            ])
+        return np.array([[answers.get(c, 3) for c in self.score_items]])
+
+    def trait_scores(self, answers, part=None):
+        """
+        Semua rata-rata trait dari satu matmul: (jawaban @ bobot + offset) / jumlah soal per grup.
+        Dipakai bersama oleh jalur per-user (dict) dan batch (DataFrame).
+        - part: 'A' (4 domain + LOC), 'B' (Big 5) atau None (semua).
+        Output: dict nama trait -> array (N,).
+        """
+        names = self.score_parts[part] if part else self.score_parts["A"] + self.score_parts["B"]
+        if part != "B":
+            # Soal Part A wajib ada (tidak pakai default)
+            present = answers.columns if isinstance(answers, pd.DataFrame) else answers
+            missing = [c for c, req in zip(self.score_items, self.score_required) if req and c not in present]
+            if missing:
+                raise KeyError(f"Kolom jawaban tidak ditemukan: {missing}")
+
+        sums = self.answer_matrix(answers) @ self.score_weights + self.score_offsets
+        avgs = np.divide(sums, self.score_counts, out=np.zeros(sums.shape), where=self.score_counts > 0)
+
+        out = {}
+        for name in names:
+            g = self.score_traits[name]
+            out[name] = avgs[:, g[0]] if len(g) == 1 else sum(avgs[:, k] for k in g) / len(g)
+        return out
+
     def domain_cols_score(self, user_raw_scores):
         """
         Menghitung rata-rata skor per dimensi.
         Nilai diambil MENTAH (As Is) dari input user tanpa dibalik.
         """
-        dim_scores = {}
-        for domain, cols in domain_cols.items():
-            # ambil value score
-            values = [user_raw_scores[col] for col in cols]
-            dim_scores[domain] = sum(values) / len(values)
-
-        return dim_scores
+        return {k: float(v[0]) for k, v in self.trait_scores(user_raw_scores, "A").items()}
         
     # --- KATEGORISASI (Low/Mid/High) ---
     def kategori_score(self, x):
@@ -1961,6 +3763,22 @@ class RecommenderEngine:
         return "internal" if internal >= external else "external"
     
     # --- MATCHING ---
+    def candidate_mask(self, row):
+        """
+        Broad matching versi bitmask: OR mask rules dari 4 domain sesuai kategori user.
+        Output: int (bit ke-i = sector_names[i] jadi kandidat).
+        """
+        mask = 0
+        for domain, key in (("self_efficacy", "cat_self_efficacy"), ("innovativeness", "cat_innovativeness"),
+                            ("need_achievement", "cat_need_achievement"), ("loc", "cat_loc")):
+            mask |= self.rule_masks[domain].get(row.get(key), 0)
+        return mask
+
+    def mask_to_ids(self, mask):
+        """Bitmask sektor -> array id sektor (urut id = urut alfabetis)."""
+        mask = int(mask)
+        return np.array([i for i in range(len(self.sector_names)) if mask >> i & 1], dtype=np.int64)
+
     def rekomendasi_per_domain(self, row):
         """
         Input 'row' disini adalah Dictionary yang berisi kategori.
@@ -1997,6 +3815,7 @@ class RecommenderEngine:
 
         # return semua sektor cocok dalam bentuk string, dipisahkan dengan koma
         # sorted() agar urut dan lebih rapi
+        # (halaman hasil memakai candidate_mask; string ini untuk notebook/export)
         return ", ".join(sorted(sektor))
 
     def create_user_vector(self, row):
@@ -2018,11 +3837,16 @@ class RecommenderEngine:
         """
         Final Filter: Mencari 'Nearest Neighbor' dari daftar kandidat Fuzzy.
         Input:
-            - broad_candidates: List nama sektor (hasil dari recommend_broad_match)
+            - broad_candidates: List nama sektor (hasil dari recommend_broad_match),
+              string "Sektor A, Sektor B", atau bitmask int dari candidate_mask()
             - user_encoded_vector: Array 0-3 (hasil dari encode_user_category)
         Output:
             - List sektor terbaik (bisa lebih dari 1 jika seri)
         """
+        # 0. Jalur bitmask: kandidat = id sektor, jarak dihitung sekaligus (vektor)
+        if isinstance(rekomendasi_sektor, (int, np.integer)):
+            return self._final_sector_ids(row, self.mask_to_ids(rekomendasi_sektor))
+
         # 1. Normalisasi Input (String -> List)
         # Ini penting karena input bisa berupa string "Sektor A, Sektor B" (dari database/csv)
         # atau sudah berupa list ["Sektor A", "Sektor B"] (dari proses python)
@@ -2080,6 +3904,31 @@ class RecommenderEngine:
 
         return jarak_sorted, top_picks
 
+    def _final_sector_ids(self, row, ids):
+        """final_sector() untuk kandidat berupa array id sektor (hasil sama persis dengan jalur list nama)."""
+        if len(ids) == 0:
+            return {}, []
+
+        # Kandidat cuma 1 -> jarak 0 (sama seperti jalur list)
+        if len(ids) == 1:
+            single_sector = self.sector_names[ids[0]]
+            return {single_sector: 0}, [single_sector]
+
+        # Hanya sektor yang punya prototype
+        ids = ids[(self.proto_mask >> ids) & 1 == 1]
+        if len(ids) == 0:
+            return {}, []
+
+        user_vec = np.array([row["score_SE"], row["score_INN"], row["score_NACH"], row["score_LOC"]])
+        dist = np.sqrt(((self.sector_proto_matrix[ids] - user_vec) ** 2).sum(axis=1))
+
+        # Ranking stabil (seri -> urutan id = alfabetis)
+        order = np.argsort(dist, kind="stable")
+        jarak_sorted = {self.sector_names[ids[k]]: dist[k] for k in order}
+        min_dist = dist[order[0]]
+        top_picks = [self.sector_names[ids[k]] for k in order if dist[k] == min_dist]
+        return jarak_sorted, top_picks
+
 
     def cluster_weights_from_top5_qA(self, top5_list):
         """
@@ -2090,34 +3939,17 @@ class RecommenderEngine:
         # 1. Validasi Input
         if not isinstance(top5_list, list) or len(top5_list) == 0:
             return {}
-        
-        # Build reverse mapping
-        self.sector_to_cluster = {}
-        for cluster, sectors in self.cluster_mapping.items():
-            for s in sectors:
-                self.sector_to_cluster.setdefault(s, []).append(cluster)
-
-        # 2. Definisi Bobot Ranking (Juara 1 dapat poin 5, dst)
-        rank_weight = {0: 5, 1: 4, 2: 3, 3: 2, 4: 1}
 
-        # 3. Siapkan Dictionary Skor Cluster (Awalnya 0 semua)
-        weights = {cluster: 0 for cluster in self.cluster_mapping}
-
-        # 4. Loop Top 5 Sektor Saja
-        # (Menggunakan slice [:5] untuk memastikan hanya ambil 5 teratas)
-        for idx, sector in enumerate(top5_list):
-            s_key = sector
-            
-            # Cek apakah sektor ini punya grup cluster
-            if s_key in self.sector_to_cluster:
-                # Ambil poin berdasarkan ranking
-                w = rank_weight.get(idx, 0)
-                
-                # Tambahkan poin ke SEMUA cluster yang memiliki sektor ini
-                for cluster in self.sector_to_cluster[s_key]:
-                    weights[cluster] += w
+        # 2. Vektor bobot ranking per sektor (hanya 5 teratas yang dapat poin)
+        rank_vec = np.zeros(len(self.sector_names), dtype=np.int64)
+        for pos, sector in enumerate(top5_list[:len(self.rank_weights)]):
+            i = self.sector_index.get(sector)
+            if i is not None:
+                rank_vec[i] += self.rank_weights[pos]
 
-        return weights
+        # 3. Bobot cluster = vektor bobot ranking x matriks incidence sektor-cluster
+        weights = rank_vec @ self.sector_cluster_incidence
+        return {c: int(w) for c, w in zip(self.cluster_names, weights)}
 
     def best_cluster_from_weights_qA(self, wdict):
         """
@@ -2152,32 +3984,17 @@ class RecommenderEngine:
         Output: Dict {'Teknologi': ['Software'], 'Bisnis': ['Retail']}
         """
 
-        # 1. SIAPKAN DATA MAPPING (Ambil dari Class)
-        # Kita simpan ke variabel lokal 'cluster_mapping' agar logika di bawah tidak perlu diubah
-        cluster_mapping = self.cluster_mapping 
-
-        # 2. BUILD REVERSE MAPPING (Sektor -> Cluster)
-        # Kita buat kamus pencarian cepat ini secara lokal
-        sector_to_cluster = {}
-        for cluster, sectors in cluster_mapping.items():
-            for s in sectors:
-                sector_to_cluster.setdefault(s, []).append(cluster)
-        
         # jika datanya tidak valid -> kembalikan dict kosong
         if not isinstance(top5_list, list) or len(top5_list) == 0:
             return {}
 
-        # buat dictionary cluster -> list sektor
-        hasil = {cluster: [] for cluster in cluster_mapping}
+        # mask [sektor input, cluster]: True jika sektor termasuk cluster (sektor di luar config diabaikan)
+        known = [s for s in top5_list if s in self.sector_index]
+        member = self.sector_cluster_incidence[[self.sector_index[s] for s in known]] > 0
 
-        for sector in top5_list:
-            if sector in sector_to_cluster:
-                # cek cluster apa saja yg menaungi sektor ini
-                clusters = sector_to_cluster[sector]
-
-                # masukkan sektor ke masing-masing cluster tersebut
-                for c in clusters:
-                    hasil[c].append(sector)
+        # buat dictionary cluster -> list sektor (urutan sektor mengikuti input)
+        hasil = {c: [known[j] for j in np.flatnonzero(member[:, ci])]
+                 for ci, c in enumerate(self.cluster_names)}
 
         # hapus cluster yang kosong (tidak ada sektor Top 5 di dalamnya)
         hasil = {c: sectors for c, sectors in hasil.items() if len(sectors) > 0}
@@ -2208,51 +4025,13 @@ class RecommenderEngine:
         return best_clusters, sorted_items
     
 # QUESTIONNAIRE B
-    # --- HELPER KECIL (Untuk hitung rata-rata list) ---
-    def _get_avg(self, values):
-        if not values: return 0
-        return sum(values) / len(values)
-    
     def calculate_big5_scores(self, user_raw_scores):
         """
         Menghitung skor Big 5 per user.
-        Logic: (Avg(Normal) + Avg(Reverse)) / 2
+        Logic: (Avg(Normal) + Avg(Reverse)) / 2, soal reverse = 6 - x, soal kosong = 3
+        (lihat matriks skor di __init__ & trait_scores).
         """
-        final_scores = {}
-        
-        # Helper reverse (Asumsi skala 1-5, jadi 6 - x)
-        # Jika skala 1-7, ganti 6 jadi 8.
-        def reverse_val(x): return 6 - x
-
-        for trait, config in self.big5.items():
-            
-            # KASUS 1: Config cuma LIST (Contoh: 'openess')
-            # Pandas: df[cols].mean(axis=1)
-            if isinstance(config, list):
-                # Ambil nilai jawaban user
-                vals = [user_raw_scores.get(col, 3) for col in config]
-                final_scores[f"avg_{trait}"] = self._get_avg(vals)
-
-            # KASUS 2: Config berupa DICTIONARY (Ada Normal & Reverse)
-            # Pandas: (mean_normal + mean_reverse) / 2
-            elif isinstance(config, dict):
-                
-                # A. Hitung Rata-rata Normal
-                normal_cols = config.get("normal", [])
-                vals_normal = [user_raw_scores.get(c, 3) for c in normal_cols]
-                avg_normal = self._get_avg(vals_normal)
-                
-                # B. Hitung Rata-rata Reverse (Pakai fungsi 6 - x)
-                reverse_cols = config.get("reverse", [])
-                # Logic .applymap(reverse_score)
-                vals_reverse = [reverse_val(user_raw_scores.get(c, 3)) for c in reverse_cols]
-                avg_reverse = self._get_avg(vals_reverse)
-                
-                # C. Gabungkan (Rumus: (N + R) / 2)
-                score_gabungan = (avg_normal + avg_reverse) / 2
-                final_scores[f"avg_{trait}"] = score_gabungan
-
-        return final_scores
+        return {k: float(v[0]) for k, v in self.trait_scores(user_raw_scores, "B").items()}
     
     def avg_to_notation(self, x):
         """
@@ -2323,28 +4102,29 @@ class RecommenderEngine:
         Menghitung persentase kecocokan (0.0 - 1.0) berdasarkan simbol.
         Input 'row' harus punya key: Note_O, Note_C, Note_E, Note_A, Note_N
         """
-        cluster_scores = {}
+        # Notasi user -> bitmask 25 bit, lalu AND dengan rule semua cluster + popcount
+        matches = _popcount(self.b5_rule_packed & self.encode_notations(row))
 
-        # Loop setiap cluster (Adaptive Services, dll)
-        # self.big5_cluster_rules sudah didefinisikan di __init__
-        for name, sig in self.big5_cluster_rules.items():
-            matches = 0
-            
-            # Loop 5 Dimensi
-            for dim in ['O','C','E','A','N']:
-                # Ambil notasi user (Note_O, dll)
-                user_note = row.get(f"Note_{dim}")
-                # Ambil rule cluster (sig[dim])
-                rule_note = sig[dim]
-                
-                # Cek kecocokan
-                if self.symbol_matches(user_note, rule_note):
-                    matches += 1
+        # Hitung skor (Total Match / 5)
+        return {name: int(m) / 5.0 for name, m in zip(self.b5_cluster_names, matches)}
 
-            # Hitung skor (Total Match / 5)
-            cluster_scores[name] = matches / 5.0
+    def encode_notations(self, row):
+        """Note_O .. Note_N -> bitmask 25 bit (notasi kosong/tidak dikenal = 0, tidak cocok apa pun)."""
+        code = 0
+        for di, dim in enumerate(self.b5_dims):
+            code |= self.b5_symbol_bit.get(row.get(f"Note_{dim}"), 0) << (5 * di)
+        return code
 
-        return cluster_scores
+    def dimension_matches(self, row, cluster):
+        """
+        Kecocokan per dimensi user vs rule cluster (untuk kartu perbandingan di halaman hasil).
+        Output: {'O': True, 'C': False, ...}; dict kosong jika cluster tidak punya rule Big 5.
+        """
+        if cluster not in self.b5_cluster_names:
+            return {}
+        masks = self.b5_rule_masks[self.b5_cluster_names.index(cluster)]
+        return {dim: bool(masks[di] & self.b5_symbol_bit.get(row.get(f"Note_{dim}"), 0))
+                for di, dim in enumerate(self.b5_dims)}
 
     def assign_cluster_with_top5(self, row):
         """
@@ -2474,10 +4254,11 @@ class RecommenderEngine:
 
         return hasil
     
-    def get_recommended_cluster_refined(self, row):
+    def get_recommended_cluster_refined(self, row, verbose=True):
         """
         Menentukan Cluster Final dengan logika Irisan, Substitusi, dan Coverage.
         Menggabungkan hasil qA (Entrepreneur) dan qB (Big 5).
+        verbose=False dipakai oleh jalur batch agar tidak menulis log ke halaman.
         """
         
         # [TRACKING START]
@@ -2589,7 +4370,8 @@ class RecommenderEngine:
             # Jika ketemu pengganti yang bagus, masukkan
             if best_choice:
                 final_candidates.append(best_choice)
-                st.write(f"   -> Substituted with: {best_choice} (Gain: {best_gain})")
+                if verbose:
+                    st.write(f"   -> Substituted with: {best_choice} (Gain: {best_gain})")
 
         # ---------------------------------------------------
         # RULE TAMBAHAN — COVERAGE SEKTOR USER
@@ -2667,6 +4449,26 @@ class RecommenderEngine:
 
         return " ".join(texts)
     
+    def compute_narrative_ranking(self, row, part, candidates_dict, top_n=None):
+        """
+        Sama seperti compute_tfidf_ranking(build_narrative_text(row, ...), ...) dengan setting default,
+        tapi vektor narasi dirakit dari tabel kalimat TfidfCatalog (tanpa join string & tokenisasi).
+        - part (str): 'A' (likert_text_map) atau 'B' (qb_text_mapping).
+        """
+        mapping = self.likert_text_map if part == 'A' else self.qb_text_mapping
+        if not candidates_dict:
+            return []
+
+        catalog = get_tfidf_catalog(self)
+        kind = catalog.kind_of(candidates_dict)
+        if not kind:
+            return self.compute_tfidf_ranking(self.build_narrative_text(row, mapping), candidates_dict, top_n=top_n)
+
+        user_vec = catalog.narrative_vector(row, part)
+        if user_vec is None:
+            return []
+        return catalog.rank_vector(user_vec, kind, list(candidates_dict.keys()), top_n=top_n)
+
     def compute_tfidf_ranking(self, user_text, candidates_dict, lang='id', ngram=(1,1), top_n=None):
         """
         Fungsi Generic TF-IDF untuk Part A (Sektor) & Part B (Cluster).
@@ -2680,15 +4482,25 @@ class RecommenderEngine:
         
         Output:
         - List of Tuples: [('Nama A', 0.95), ('Nama B', 0.80), ...] yang SUDAH URUT.
+
+        Jika kandidat adalah dokumen deskripsi.xlsx (setting default), dipakai TfidfCatalog
+        yang sudah di-fit sekali per proses; selain itu fit TfidfVectorizer seperti biasa.
         """
         # 1. Validasi Input
         if not user_text or not candidates_dict:
             return []
 
+        # Jalur cepat: model TF-IDF bersama (tanpa fit ulang per request)
+        if lang != 'en' and tuple(ngram) == (1, 1):
+            catalog = get_tfidf_catalog(self)
+            kind = catalog.kind_of(candidates_dict)
+            if kind:
+                return catalog.rank(user_text, kind, list(candidates_dict.keys()), top_n=top_n)
+
         # 2. Konfigurasi Vectorizer (Dinamis sesuai parameter)
         stop_words_setting = 'english' if lang == 'en' else None
         
-        vectorizer = TfidfVectorizer(
+        vectorizer = sk_text.TfidfVectorizer(
             stop_words=stop_words_setting,
             ngram_range=ngram
         )
@@ -2707,7 +4519,7 @@ class RecommenderEngine:
             
             # 5. Hitung Similarity
             # Bandingkan User (Index 0) vs Semua Kandidat (Index 1 sampai habis)
-            similarities = cosine_similarity(
+            similarities = sk_pairwise.cosine_similarity(
                 tfidf_matrix[0:1], 
                 tfidf_matrix[1:]
             )[0]
@@ -2763,13 +4575,16 @@ class RecommenderEngine:
                     hasil[cluster_name] = sektor_match
         return hasil
     
-    def get_recommended_cluster_refined_hybrid(self, row):
+    def get_recommended_cluster_refined_hybrid(self, row, verbose=True, trace=None):
         """
         Menentukan cluster final dengan strategi Hybrid:
         1. Irisan (Intersection) qA & qB.
         2. Fallback ke Top 1 masing-masing jika tidak ada irisan.
         3. Substitusi cerdas jika cluster terpilih ternyata kosong isinya.
         4. Safety net untuk memastikan sektor spesifik user ter-cover.
+        verbose=False dipakai oleh jalur batch agar tidak menulis log ke halaman.
+        trace (dict, opsional) diisi kejadian untuk ditampilkan belakangan oleh UI:
+        'pelengkap' = cluster tambahan safety net, 'fallback' = True jika Initial dikembalikan.
         """
         
         # 1. Ambil Data dari Row
@@ -2919,25 +4734,1080 @@ class RecommenderEngine:
                     best_choice = candidate
 
             if best_choice:
-                st.write(f"   + Menambahkan pelengkap: **{best_choice}**")
+                if verbose:
+                    st.write(f"   + Menambahkan pelengkap: **{best_choice}**")
+                if trace is not None:
+                    trace['pelengkap'] = best_choice
                 final_candidates.append(best_choice)
         
         # FINAL CHECK
         # st.success(f"🏁 **HASIL AKHIR:** {final_candidates}")
         # Fallback Terakhir agar tidak kosong melompong
         if not final_candidates and initial:
-            st.error("⚠️ Filter membuang semua hasil. Mengembalikan Initial sebagai fallback.")
+            if verbose:
+                st.error("⚠️ Filter membuang semua hasil. Mengembalikan Initial sebagai fallback.")
+            if trace is not None:
+                trace['fallback'] = True
             return initial
         
         return final_candidates
     
     def get_sector_descriptions(self):
-        # Class memanggil fungsi global yang sudah di-cache
-        return load_sector_descriptions()
+        # Class memanggil fungsi global yang sudah di-cache (katalog versi engine ini)
+        return load_sector_descriptions(engine=self)
 
     def get_cluster_descriptions(self):
-        # Class memanggil fungsi global yang sudah di-cache
-        return load_cluster_descriptions()
+        # Class memanggil fungsi global yang sudah di-cache (katalog versi engine ini)
+        return load_cluster_descriptions(engine=self)
+
+    # ============================================
+    # BATCH SCORING (BANYAK RESPONDEN SEKALIGUS)
+    # ============================================
+    def _batch_tables(self):
+        """
+        Menyusun config rules/prototype/cluster menjadi tabel array berindeks integer.
+        Urutan sektor = alfabetis (sama dengan sorted() di rekomendasi_per_domain),
+        sehingga tie-breaker hasil ranking tetap identik dengan jalur per-user.
+        """
+        sectors = list(self.sector_names)
+        clusters = list(self.cluster_names)
+
+        if len(sectors) > 62:
+            raise ValueError("Batch scoring menyimpan kandidat sebagai bitmask int64 (maks. 62 sektor)")
+
+        # Rules fuzzy: domain -> array bitmask sektor per kode level
+        rule_mask = {}
+        for domain, levels in self.rule_masks.items():
+            level_codes = self.loc_map if domain == "loc" else self.score_map
+            tbl = np.zeros(len(level_codes), dtype=np.int64)
+            for lvl, mask in levels.items():
+                tbl[level_codes[lvl]] = mask
+            rule_mask[domain] = tbl
+
+        # Prototype sektor [SE, INN, NACH, LOC]
+        proto = self.sector_proto_matrix
+        has_proto = (self.proto_mask >> np.arange(len(sectors))) & 1 == 1
+
+        # Relasi sektor -> cluster (matriks incidence dari __init__)
+        incidence = self.sector_cluster_incidence
+
+        return {
+            "sectors": sectors, "clusters": clusters, "rule_mask": rule_mask,
+            "proto": proto, "has_proto": has_proto, "incidence": incidence,
+            "symbols": list(self.b5_symbols), "b5_clusters": list(self.b5_cluster_names),
+            "b5_rule_packed": self.b5_rule_packed,
+        }
+
+    def _batch_unique(self, keys, build):
+        """
+        Helper batch: objek Python (list/dict/string) hanya dibangun sekali per key unik,
+        lalu disebar ke semua baris dengan indexing array (tanpa loop per baris).
+        build(i) menerima indeks baris perwakilan dari key tersebut.
+        """
+        uniq, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        objs = np.empty(len(uniq), dtype=object)
+        for k, i in enumerate(first):
+            objs[k] = build(i)
+        return objs[inverse.reshape(-1)]
+
+    def _batch_part_A(self, df, t):
+        """Tahap Part A (4 domain) untuk semua baris: skor, kategori, kandidat & ranking Euclidean."""
+        # 1. Rata-rata per domain (kolom wajib ada, sama seperti domain_cols_score)
+        out = self.trait_scores(df, "A")
+
+        # 2. Kategori -> kode 0-3 (low, mid-low, mid-high, high), LOC -> 0/1
+        bins = np.array([2.5, 3.5, 4.25])
+        codes = {
+            "self_efficacy": np.searchsorted(bins, out["self_efficacy"], side="right"),
+            "innovativeness": np.searchsorted(bins, out["innovativeness"], side="right"),
+            "need_achievement": np.searchsorted(bins, out["need_achievement"], side="right"),
+            "loc": (out["loc_internal"] >= out["loc_external"]).astype(np.int64),
+        }
+        out.update(self._batch_rank_A(codes, t))
+        return out
+
+    def _batch_rank_A(self, codes, t):
+        """Part A dari kode kategori (array 0-3 / LOC 0-1): kandidat, ranking Euclidean & bobot cluster."""
+        n = len(codes["loc"])
+
+        # 3. Broad matching: OR bitmask rules dari 4 domain (1 int64 per user)
+        mask = np.zeros(n, dtype=np.int64)
+        for domain, code in codes.items():
+            mask |= t["rule_mask"][domain][code]
+        cand = (mask[:, None] >> np.arange(len(t["sectors"]))) & 1 == 1
+        # kandidat tunggal dipakai apa adanya; selain itu hanya sektor yang punya prototype
+        single = cand.sum(axis=1) == 1
+        cand &= t["has_proto"] | single[:, None]
+        n_cand = cand.sum(axis=1)
+
+        # 4. Euclidean ke prototype sektor (hanya kandidat), kandidat tunggal = jarak 0
+        user_vec = np.stack([codes["self_efficacy"], codes["innovativeness"],
+                             codes["need_achievement"], codes["loc"]], axis=1)
+        dist = np.sqrt(((user_vec[:, None, :] - t["proto"][None, :, :]) ** 2).sum(axis=2))
+        dist[single[:, None] & cand] = 0.0
+        dist[~cand] = np.inf
+
+        # 5. Ranking stabil (seri -> urutan alfabetis, sama seperti sorted() + sort stabil)
+        order = np.argsort(dist, axis=1, kind="stable")
+        ranked = np.where(np.arange(len(t["sectors"]))[None, :] < n_cand[:, None], order, -1)
+
+        # 6. Bobot cluster dari Top 3 (bobot dari rank_weights config) = matriks bobot ranking x relasi sektor-cluster
+        cluster_w = self._rank_cluster_weights(ranked[:, :3], t)
+
+        out = dict(codes=codes, mask=mask, cand=cand, n_cand=n_cand, dist=dist, ranked=ranked, cluster_w=cluster_w)
+        # Kode gabungan kategori (4 x 4 x 4 x 2 = 128 kombinasi)
+        out["code"] = ((codes["self_efficacy"] * 4 + codes["innovativeness"]) * 4
+                       + codes["need_achievement"]) * 2 + codes["loc"]
+        return out
+
+    def _rank_cluster_weights(self, ranked, t):
+        """
+        Versi batch cluster_weights_from_top5_qA: ranked = id sektor terurut (N x k, -1 = kosong).
+        Posisi ke-i dapat rank_weights[i]; posisi di luar panjang rank_weights tidak dapat poin.
+        """
+        rank_w = np.zeros((len(ranked), len(t["sectors"])), dtype=np.int64)
+        for pos, w in enumerate(self.rank_weights[:ranked.shape[1]]):
+            ok = ranked[:, pos] >= 0
+            rank_w[np.nonzero(ok)[0], ranked[ok, pos]] += w
+        return rank_w @ t["incidence"]
+
+    def _batch_part_B(self, df, t):
+        """Tahap Part B (Big 5) untuk semua baris: skor rata-rata, notasi & skor kecocokan cluster."""
+        # 1. Rata-rata trait (jalur yang sama dengan calculate_big5_scores)
+        out = self.trait_scores(df, "B")
+
+        # 2. Notasi -> kode simbol 0-4 ('--', '-', '0', '+', '++')
+        bins = np.array([1.8, 2.5, 3.5, 4.2])
+        traits = ['avg_openess', 'avg_conscientiousness', 'avg_extraversion',
+                  'avg_agreeableness', 'avg_neuroticism']
+        note = np.stack([np.searchsorted(bins, out[k], side="right") for k in traits], axis=1)
+        out.update(self._batch_match_B(note, t))
+        return out
+
+    def _batch_match_B(self, note, t):
+        """Part B dari kode notasi (array N x 5, 0-4): skor kecocokan & urutan cluster."""
+        # 3. Jumlah dimensi yang cocok per cluster -> skor 0.0 - 1.0
+        packed = (np.left_shift(1, note) << (5 * np.arange(note.shape[1]))).sum(axis=1)
+        matches = _popcount(packed[:, None] & t["b5_rule_packed"][None, :])
+        scores = matches / 5.0
+        order = np.argsort(-scores, axis=1, kind="stable")
+        best_mask = (scores == scores.max(axis=1, keepdims=True)) & (scores.max(axis=1, keepdims=True) > 0)
+
+        out = dict(note=note, matches=matches, scores=scores, order=order, best_mask=best_mask)
+        # Kode gabungan notasi (5^5 = 3125 kombinasi)
+        out["code"] = note @ (5 ** np.arange(5))
+        return out
+
+    def recommend_single_batch(self, df):
+        """
+        Versi batch (vektorisasi NumPy) dari pipeline Single Method di render_hasil_single().
+        Input : DataFrame N x 39 (kolom = kode soal, misal 'INN-CE1', 'CON-2').
+        Output: DataFrame N baris berisi kolom antara & final (nama kolom sama dengan row_data),
+                ditambah 'final_clusters'.
+        Catatan: list/dict di satu kolom dipakai bersama oleh baris dengan input diskrit yang sama,
+                 jadi perlakukan sebagai read-only.
+        """
+        t = self._batch_tables()
+        sectors, clusters, b5_clusters = t["sectors"], t["clusters"], t["b5_clusters"]
+        A = self._batch_part_A(df, t)
+        B = self._batch_part_B(df, t)
+        res = pd.DataFrame(index=df.index)
+
+        # --- STEP A: 4 DOMAIN KEWIRAUSAHAAN ---
+        for domain in self.domain_cols:
+            res[domain] = A[domain]
+        level_names = np.array(list(self.score_map))
+        loc_names = np.array(list(self.loc_map))
+        res["cat_self_efficacy"] = level_names[A["codes"]["self_efficacy"]]
+        res["cat_innovativeness"] = level_names[A["codes"]["innovativeness"]]
+        res["cat_need_achievement"] = level_names[A["codes"]["need_achievement"]]
+        res["cat_loc"] = loc_names[A["codes"]["loc"]]
+        res["score_SE"] = A["codes"]["self_efficacy"]
+        res["score_INN"] = A["codes"]["innovativeness"]
+        res["score_NACH"] = A["codes"]["need_achievement"]
+        res["score_LOC"] = A["codes"]["loc"]
+
+        ranked, dist, cluster_w = A["ranked"], A["dist"], A["cluster_w"]
+
+        def names_at(i, n=None):
+            idx = [k for k in ranked[i] if k >= 0]
+            return [sectors[k] for k in idx[:n]]
+
+        def jarak_dict(i):
+            idx = [k for k in ranked[i] if k >= 0]
+            if len(idx) == 1:
+                return {sectors[idx[0]]: 0}
+            return {sectors[k]: dist[i, k] for k in idx}
+
+        def final_picks(i):
+            d = jarak_dict(i)
+            if not d:
+                return []
+            m = min(d.values())
+            return [s for s, v in d.items() if v == m]
+
+        def weights_dict(i):
+            if ranked[i, 0] < 0:
+                return {}
+            return {c: int(cluster_w[i, ci]) for ci, c in enumerate(clusters)}
+
+        def best_qA(i):
+            w = weights_dict(i)
+            return [c for c, v in w.items() if v == max(w.values())] if w else []
+
+        def ranking_qA(i):
+            return sorted(weights_dict(i).items(), key=lambda x: x[1], reverse=True)
+
+        def cluster_to_sector_qA(i):
+            top3 = names_at(i, 3)
+            hasil = {c: [s for s in top3 if s in self.cluster_mapping[c]] for c in clusters}
+            return {c: v for c, v in hasil.items() if v}
+
+        keyA = A["code"]
+        res["rekomendasi_sektor_qA"] = self._batch_unique(
+            keyA, lambda i: ", ".join(sectors[k] for k in self.mask_to_ids(A["mask"][i])))
+        res["jarak_sorted_qA"] = self._batch_unique(keyA, jarak_dict)
+        res["final_sector_qA"] = self._batch_unique(keyA, final_picks)
+        res["top3_euclid_qA"] = self._batch_unique(keyA, lambda i: names_at(i, 3))
+        res["top5_euclid_qA"] = self._batch_unique(keyA, lambda i: names_at(i, 5))
+        res["cluster_weights_top5_qA"] = self._batch_unique(keyA, weights_dict)
+        res["cluster_top5_best_qA"] = self._batch_unique(keyA, best_qA)
+        res["cluster_top5_ranking_qA"] = self._batch_unique(keyA, ranking_qA)
+        res["top5_cluster_to_sector_qA"] = self._batch_unique(keyA, cluster_to_sector_qA)
+
+        # --- STEP B: BIG 5 PERSONALITY ---
+        for k in ['avg_openess', 'avg_conscientiousness', 'avg_extraversion',
+                  'avg_agreeableness', 'avg_neuroticism']:
+            res[k] = B[k]
+        symbols = np.array(t["symbols"], dtype=object)
+        for di, dim in enumerate(['O', 'C', 'E', 'A', 'N']):
+            res[f"Note_{dim}"] = symbols[B["note"][:, di]]
+
+        scores, order, best_mask = B["scores"], B["order"], B["best_mask"]
+        keyB = B["code"]
+        res["top5_clusters_qB"] = self._batch_unique(
+            keyB, lambda i: [b5_clusters[k] for k in order[i]])
+        res["top5_clusters_qB_score"] = self._batch_unique(
+            keyB, lambda i: [(b5_clusters[k], scores[i, k]) for k in order[i]])
+        res["cluster_top5_best_qB"] = self._batch_unique(
+            keyB, lambda i: ", ".join(b5_clusters[k] for k in order[i] if best_mask[i, k]))
+        best_score = scores.max(axis=1)
+        res["cluster_top5_best_qB_score"] = np.where(best_score > 0, best_score, None)
+
+        # Irisan cluster B dengan Top 3 sektor A -> key (kode A, urutan cluster B)
+        perm_key = order @ (len(b5_clusters) ** np.arange(len(b5_clusters)))
+        key_AB = keyA * (len(b5_clusters) ** len(b5_clusters)) + perm_key
+        res["top5_cluster_to_sector_qB"] = self._batch_unique(
+            key_AB, lambda i: self.top5_clusters_with_matched_sectors_qB({
+                "top5_clusters_qB": [b5_clusters[k] for k in order[i]],
+                "top3_euclid_qA": names_at(i, 3),
+            }))
+
+        # --- STEP C: FINAL REFINEMENT ---
+        # Hanya bergantung pada (kode A, himpunan cluster juara B) -> paling banyak 128 x 32 evaluasi
+        mask_key = best_mask @ (2 ** np.arange(len(b5_clusters)))
+        key_final = keyA * (2 ** len(b5_clusters)) + mask_key
+        top3_col = res["top3_euclid_qA"].to_numpy()
+        best_qA_col = res["cluster_top5_best_qA"].to_numpy()
+        map_col = res["top5_cluster_to_sector_qA"].to_numpy()
+        best_qB_col = res["cluster_top5_best_qB"].to_numpy()
+        res["final_clusters"] = self._batch_unique(
+            key_final, lambda i: self.get_recommended_cluster_refined({
+                "cluster_top5_best_qA": best_qA_col[i],
+                "cluster_top5_best_qB": best_qB_col[i],
+                "top5_cluster_to_sector_qA": map_col[i],
+                "top3_euclid_qA": top3_col[i],
+            }, verbose=False))
+
+        return res
+
+    def _tfidf_rank_batch(self, scores, cand_idx, top_n=3):
+        """Urutkan kandidat per baris (skor menurun, seri -> urutan kandidat), ambil top_n posisi."""
+        key = np.where(np.isnan(scores), np.inf, -scores)
+        order = np.argsort(key, axis=1, kind="stable")[:, :top_n]
+        picked = np.take_along_axis(cand_idx, order, axis=1)
+        picked_scores = np.take_along_axis(scores, order, axis=1)
+        picked = np.where(np.isnan(picked_scores), -1, picked)
+        return picked, picked_scores
+
+    def recommend_hybrid_batch(self, df):
+        """
+        Versi batch dari pipeline Cascade Hybrid di render_hasil_hybrid().
+        Satu vectorizer bersama, satu matriks sparse user x term, dan satu perkalian matriks
+        terhadap dokumen sektor & cluster (tanpa fit TfidfVectorizer per user).
+        Input : DataFrame N x 39 (kolom = kode soal).
+        Output: DataFrame N baris dengan kolom yang sama seperti row_data hybrid,
+                ditambah 'final_clusters_hybrid'.
+        """
+        t = self._batch_tables()
+        sectors, clusters, b5_clusters = t["sectors"], t["clusters"], t["b5_clusters"]
+        A = self._batch_part_A(df, t)
+        B = self._batch_part_B(df, t)
+        res = pd.DataFrame(index=df.index)
+        n = len(df)
+
+        # --- STEP A: 4 DOMAIN (sama seperti single) ---
+        for domain in self.domain_cols:
+            res[domain] = A[domain]
+        level_names = np.array(list(self.score_map))
+        loc_names = np.array(list(self.loc_map))
+        res["cat_self_efficacy"] = level_names[A["codes"]["self_efficacy"]]
+        res["cat_innovativeness"] = level_names[A["codes"]["innovativeness"]]
+        res["cat_need_achievement"] = level_names[A["codes"]["need_achievement"]]
+        res["cat_loc"] = loc_names[A["codes"]["loc"]]
+        res["score_SE"] = A["codes"]["self_efficacy"]
+        res["score_INN"] = A["codes"]["innovativeness"]
+        res["score_NACH"] = A["codes"]["need_achievement"]
+        res["score_LOC"] = A["codes"]["loc"]
+
+        ranked = A["ranked"]
+        keyA = A["code"]
+        res["top3_euclid_qA_hybrid"] = self._batch_unique(
+            keyA, lambda i: [sectors[k] for k in ranked[i, :3] if k >= 0])
+        res["top5_euclid_qA_hybrid"] = self._batch_unique(
+            keyA, lambda i: [sectors[k] for k in ranked[i, :5] if k >= 0])
+
+        # --- MODEL TF-IDF BERSAMA (di-fit sekali per proses) ---
+        catalog = get_tfidf_catalog(self)
+        sector_doc = catalog.doc_indices("sector", sectors)
+        cluster_doc = catalog.doc_indices("cluster", b5_clusters)
+
+        U_A = catalog.narrative_matrix(df, "A")
+        U_B = catalog.narrative_matrix(df, "B")
+
+        # --- TF-IDF SEKTOR: kandidat = Top 5 Euclidean yang punya deskripsi ---
+        has_doc_s = sector_doc >= 0
+        cand_A = ranked[:, :5].copy()
+        cand_A[(cand_A >= 0) & ~has_doc_s[np.maximum(cand_A, 0)]] = -1
+        # Urutan kandidat dipadatkan (slot kosong di belakang) agar tie-breaker sesuai urutan dict
+        cand_A = np.take_along_axis(cand_A, np.argsort(cand_A < 0, axis=1, kind="stable"), axis=1)
+        no_text_A = np.diff(U_A.indptr) == 0
+        cand_A[no_text_A] = -1
+        cos_A = catalog.cosine(U_A, "sector", np.where(cand_A >= 0, sector_doc[cand_A], -1))
+        top_A, top_A_scores = self._tfidf_rank_batch(cos_A, cand_A, top_n=3)
+
+        # Fallback: jika TF-IDF kosong -> pakai Top 3 Euclidean
+        empty_A = top_A[:, 0] < 0
+        top_A = np.where(empty_A[:, None], ranked[:, :3], top_A)
+        res["top3_tfidf_A_hybrid"] = [
+            [] if empty_A[i] else [(sectors[k], top_A_scores[i, j]) for j, k in enumerate(top_A[i]) if k >= 0]
+            for i in range(n)
+        ]
+        keyTopA = np.where(top_A >= 0, top_A + 1, 0) @ ((len(sectors) + 1) ** np.arange(3))
+        top_names_A = lambda i: [sectors[k] for k in top_A[i] if k >= 0]
+        res["top3_tfidf_sector_hybrid"] = self._batch_unique(keyTopA, top_names_A)
+
+        # Bobot cluster dari Top 3 TF-IDF
+        cluster_w = self._rank_cluster_weights(top_A, t)
+
+        def best_qA(i):
+            if top_A[i, 0] < 0:
+                return []
+            w = cluster_w[i]
+            return [c for ci, c in enumerate(clusters) if w[ci] == w.max()]
+
+        def ranking_qA(i):
+            if top_A[i, 0] < 0:
+                return []
+            return sorted(((c, int(cluster_w[i, ci])) for ci, c in enumerate(clusters)),
+                          key=lambda x: x[1], reverse=True)
+
+        res["cluster_top5_best_qA_hybrid"] = self._batch_unique(keyTopA, best_qA)
+        res["cluster_top5_ranking_qA_hybrid"] = self._batch_unique(keyTopA, ranking_qA)
+        res["top3_cluster_to_sector_qA_hybrid"] = self._batch_unique(
+            keyTopA, lambda i: self.top5_clusters_with_sectors_qA(top_names_A(i)))
+
+        # --- STEP B: BIG 5 ---
+        symbols = np.array(t["symbols"], dtype=object)
+        for di, dim in enumerate(['O', 'C', 'E', 'A', 'N']):
+            res[f"Note_{dim}"] = symbols[B["note"][:, di]]
+        scores_B, order_B = B["scores"], B["order"]
+        keyB = B["code"]
+        res["top3_clusters_qB_hybrid"] = self._batch_unique(
+            keyB, lambda i: [b5_clusters[k] for k in order_B[i, :3]])
+        res["top3_clusters_qB_score_hybrid"] = self._batch_unique(
+            keyB, lambda i: [(b5_clusters[k], scores_B[i, k]) for k in order_B[i, :3]])
+
+        # TF-IDF cluster: kandidat = Top 3 cluster Big 5 yang punya deskripsi
+        cand_B = np.where(cluster_doc[order_B[:, :3]] >= 0, order_B[:, :3], -1)
+        cand_B = np.take_along_axis(cand_B, np.argsort(cand_B < 0, axis=1, kind="stable"), axis=1)
+        cand_B[np.diff(U_B.indptr) == 0] = -1
+        cos_B = catalog.cosine(U_B, "cluster", np.where(cand_B >= 0, cluster_doc[cand_B], -1))
+        top_B, top_B_scores = self._tfidf_rank_batch(cos_B, cand_B, top_n=3)
+        empty_B = top_B[:, 0] < 0
+
+        # Juara 1 (fallback: juara Big 5 dengan skor 0.0)
+        best_B = np.where(empty_B, order_B[:, 0], top_B[:, 0])
+        res["cluster_top3_best_qB_hybrid"] = np.array(b5_clusters, dtype=object)[best_B]
+        res["cluster_top3_best_qB_score_hybrid"] = np.where(empty_B, 0.0, top_B_scores[:, 0])
+        tfidf_B = [
+            [(b5_clusters[k], top_B_scores[i, j]) for j, k in enumerate(top_B[i]) if k >= 0]
+            for i in range(n)
+        ]
+        res["top3_cluster_tfidf_qB_hybrid"] = tfidf_B
+        res["top3_cluster_tfidf_qB_score_hybrid"] = tfidf_B
+
+        # Irisan cluster TF-IDF B dengan Top 3 sektor TF-IDF A
+        keyTopB = np.where(top_B >= 0, top_B + 1, 0) @ ((len(b5_clusters) + 1) ** np.arange(3))
+        key_AB = keyTopA * ((len(b5_clusters) + 1) ** 3) + keyTopB
+        top_names_col = res["top3_tfidf_sector_hybrid"].to_numpy()
+        matched = self._batch_unique(key_AB, lambda i: self.top3_clusters_with_matched_sectors_qB({
+            "top3_cluster_tfidf_qB_hybrid": [(b5_clusters[k], 0.0) for k in top_B[i] if k >= 0],
+            "top3_tfidf_sector_hybrid": top_names_col[i],
+        }))
+        res["top3_cluster_to_sector_qB_hybrid"] = matched
+        res["top3_sector_matched"] = self._batch_unique(
+            key_AB, lambda i: [s for lst in matched[i].values() for s in lst])
+
+        # --- STEP C: FINAL REFINEMENT (HYBRID) ---
+        key_final = keyTopA * len(b5_clusters) + best_B
+        best_qA_col = res["cluster_top5_best_qA_hybrid"].to_numpy()
+        map_col = res["top3_cluster_to_sector_qA_hybrid"].to_numpy()
+        res["final_clusters_hybrid"] = self._batch_unique(
+            key_final, lambda i: self.get_recommended_cluster_refined_hybrid({
+                "cluster_top5_best_qA_hybrid": best_qA_col[i],
+                "cluster_top3_best_qB_hybrid": b5_clusters[best_B[i]],
+                "top3_cluster_to_sector_qA_hybrid": map_col[i],
+            }, verbose=False))
+
+        return res
+
+
+class EngineRegistry:
+    """
+    RecommenderEngine aktif per proses + hot reload dari engine_catalog.json.
+    - get() mengembalikan engine aktif (satu referensi, swap atomik). Stempel file (mtime_ns, ukuran)
+      dicek paling sering tiap check_interval detik.
+    - Katalog baru dibangun & divalidasi oleh satu thread; thread lain tetap memakai engine lama
+      selama build. Gagal validasi -> engine lama tetap aktif, error dicatat di stats().
+    - Engine read-only & tidak pernah diubah, jadi request yang memegang engine lama selesai
+      di versi awalnya. Session memakai engine yang dipin saat kuesioner dimulai (session_engine())
+      dan meneruskannya ke pipeline.
+    - resource(engine, name, build): objek turunan per versi katalog (mis. SingleLookupTable),
+      disimpan untuk versi aktif & versi sebelumnya saja.
+    """
+    def __init__(self, path, check_interval=2.0, keep_versions=2):
+        self.path = path
+        self.check_interval = check_interval
+        self.keep_versions = keep_versions
+        self._engine = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self._build_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._resources = OrderedDict()    # catalog_version -> {name: objek}
+        self._stats = {"loads": 0, "swaps": 0, "failures": 0, "last_error": None}
+
+    def _file_stamp(self):
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def get(self):
+        engine = self._engine
+        if engine is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return engine
+        # Build pertama: semua menunggu. Build berikutnya: yang kalah rebutan lock pakai engine lama.
+        if not self._build_lock.acquire(blocking=engine is None):
+            return engine
+        try:
+            if self._engine is None or time.monotonic() - self._checked_at >= self.check_interval:
+                stamp = self._file_stamp()
+                if self._engine is None or stamp != self._stamp:
+                    self._reload(stamp)
+                self._checked_at = time.monotonic()
+            return self._engine
+        finally:
+            self._build_lock.release()
+
+    def _reload(self, stamp):
+        try:
+            with startup_timer("init", "RecommenderEngine"):
+                catalog = load_engine_catalog(self.path)
+                engine = (self._engine if self._engine is not None
+                          and self._engine.catalog_version == catalog["catalog_version"]
+                          else RecommenderEngine(catalog))
+        except (OSError, EngineCatalogError) as e:
+            self._stats["failures"] += 1
+            self._stats["last_error"] = str(e)
+            if self._engine is None:
+                raise
+            print(f"⚠️ Katalog engine {self.path} tidak dipakai, tetap di versi "
+                  f"{self._engine.catalog_version}: {e}")
+            self._stamp = stamp
+            return
+        if self._engine is not None and engine is not self._engine:
+            self._stats["swaps"] += 1
+            print(f"🔄 Katalog engine: {self._engine.catalog_version} -> {engine.catalog_version}")
+        self._stats["loads"] += 1
+        self._stats["last_error"] = None
+        self._stamp = stamp
+        self._engine = engine
+
+    def resource(self, engine, name, build):
+        version = engine.catalog_version
+        with self._lock:
+            entry = self._resources.get(version, {})
+            if name in entry:
+                return entry[name]
+        value = build()
+        with self._lock:
+            entry = self._resources.setdefault(version, {})
+            value = entry.setdefault(name, value)
+            self._resources.move_to_end(version)
+            while len(self._resources) > self.keep_versions:
+                self._resources.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            versions = list(self._resources)
+        engine = self._engine
+        return {"version": engine.catalog_version if engine else None,
+                "resource_versions": versions, **self._stats}
+
+
+@st.cache_resource(show_spinner=False)
+def get_engine_registry():
+    """
+    Satu EngineRegistry per proses. Atur lewat secrets [engine_catalog]:
+    path (default engine_catalog.json di samping app.py), check_interval (detik).
+    """
+    cfg = _secrets_section("engine_catalog")
+    return EngineRegistry(cfg.get("path", ENGINE_CATALOG_PATH),
+                          check_interval=float(cfg.get("check_interval", 2.0)))
+
+
+def get_engine():
+    """RecommenderEngine (read-only) versi katalog aktif, dipakai bersama semua session."""
+    return get_engine_registry().get()
+
+class SingleLookupTable:
+    """
+    Tabel lengkap pipeline Single Method untuk SEMUA input diskrit:
+    - Part A: 4 (SE) x 4 (INN) x 4 (NACH) x 2 (LOC) = 128 kode kategori
+    - Part B: 5^5 = 3125 kode notasi Big 5
+    Disimpan sebagai array integer, jadi serving = encode kategori/notasi -> lookup O(1).
+    Tabel bisa disimpan (.npz) dan dibandingkan (diff) saat rules berubah.
+    """
+    N_A = 4 * 4 * 4 * 2
+    N_B = 5 ** 5
+    DIMS = ['O', 'C', 'E', 'A', 'N']
+
+    def __init__(self, levels, locs, symbols, sectors, clusters, b5_clusters, labels,
+                 top3, top3_dist, matches, final):
+        self.levels = list(levels)            # urutan kode kategori (low .. high)
+        self.locs = list(locs)                # urutan kode LOC (external, internal)
+        self.symbols = list(symbols)          # urutan kode notasi ('--' .. '++')
+        self.sectors = list(sectors)
+        self.clusters = list(clusters)
+        self.b5_clusters = list(b5_clusters)
+        self.labels = list(labels)            # label final cluster (nama cluster + pesan khusus)
+        self.top3 = top3                      # int8 [128, 3]    indeks sektor (-1 = kosong)
+        self.top3_dist = top3_dist            # float64 [128, 3] jarak Euclidean
+        self.matches = matches                # uint8 [3125, C]  jumlah dimensi cocok per cluster
+        self.final = final                    # int8 [128*3125, K] indeks label (-1 = kosong)
+
+    @classmethod
+    def build(cls, engine):
+        """Enumerasi seluruh ruang 128 x 3125 sekali dengan mesin batch RecommenderEngine."""
+        t = engine._batch_tables()
+
+        # Part A: semua kombinasi kode kategori (urutan = kode gabungan)
+        a = np.arange(cls.N_A)
+        codes = {
+            "self_efficacy": a // 32,
+            "innovativeness": (a // 8) % 4,
+            "need_achievement": (a // 2) % 4,
+            "loc": a % 2,
+        }
+        A = engine._batch_rank_A(codes, t)
+        ranked = A["ranked"][:, :3]
+        if ranked.shape[1] < 3:
+            ranked = np.pad(ranked, ((0, 0), (0, 3 - ranked.shape[1])), constant_values=-1)
+        top3_dist = np.where(ranked >= 0,
+                             np.take_along_axis(A["dist"], np.maximum(ranked, 0), axis=1), np.nan)
+
+        # Part B: semua kombinasi notasi (digit basis 5 = kode per dimensi)
+        b = np.arange(cls.N_B)
+        note = np.stack([(b // 5 ** d) % 5 for d in range(5)], axis=1)
+        B = engine._batch_match_B(note, t)
+
+        # Final cluster hanya bergantung pada (kode A, himpunan cluster juara B)
+        sectors, clusters, b5_clusters = t["sectors"], t["clusters"], t["b5_clusters"]
+        mask_key = B["best_mask"] @ (2 ** np.arange(len(b5_clusters)))
+        uniq_mask, first_b, inv_b = np.unique(mask_key, return_index=True, return_inverse=True)
+        weights = A["cluster_w"]
+        labels = list(clusters) + [c for c in b5_clusters if c not in clusters]
+        lab_idx = {c: i for i, c in enumerate(labels)}
+        per_pair = []
+        for ai in range(cls.N_A):
+            top3_names = [sectors[k] for k in ranked[ai] if k >= 0]
+            w = {c: int(weights[ai, ci]) for ci, c in enumerate(clusters)} if top3_names else {}
+            best_qA = [c for c, v in w.items() if v == max(w.values())] if w else []
+            row_pairs = []
+            for bi in first_b:
+                best_qB = ", ".join(b5_clusters[k] for k in B["order"][bi] if B["best_mask"][bi, k])
+                final = engine.get_recommended_cluster_refined({
+                    "cluster_top5_best_qA": best_qA,
+                    "cluster_top5_best_qB": best_qB,
+                    "top5_cluster_to_sector_qA": engine.top5_clusters_with_sectors_qA(top3_names),
+                    "top3_euclid_qA": top3_names,
+                }, verbose=False)
+                for c in final:
+                    if c not in lab_idx:
+                        lab_idx[c] = len(labels)
+                        labels.append(c)
+                row_pairs.append([lab_idx[c] for c in final])
+            per_pair.append(row_pairs)
+
+        width = max(len(f) for row_pairs in per_pair for f in row_pairs)
+        uniq_final = np.full((cls.N_A, len(uniq_mask), width), -1, dtype=np.int8)
+        for ai, row_pairs in enumerate(per_pair):
+            for mi, f in enumerate(row_pairs):
+                uniq_final[ai, mi, :len(f)] = f
+        final = uniq_final[:, inv_b.reshape(-1)].reshape(cls.N_A * cls.N_B, width)
+
+        return cls(engine.score_map, engine.loc_map, t["symbols"], sectors, clusters, b5_clusters,
+                   labels, ranked.astype(np.int8), top3_dist, B["matches"].astype(np.uint8), final)
+
+    # --- ENCODE & LOOKUP ---
+    def encode(self, row):
+        """Kategori (cat_*) & notasi (Note_*) di row -> kode gabungan a * 3125 + b."""
+        a = ((self.levels.index(row["cat_self_efficacy"]) * 4
+              + self.levels.index(row["cat_innovativeness"])) * 4
+             + self.levels.index(row["cat_need_achievement"])) * 2 + self.locs.index(row["cat_loc"])
+        b = sum(self.symbols.index(row[f"Note_{d}"]) * 5 ** i for i, d in enumerate(self.DIMS))
+        return a * self.N_B + b
+
+    def lookup(self, code):
+        """Kode gabungan -> hasil Single Method (nama kolom sama dengan row_data)."""
+        a, b = divmod(int(code), self.N_B)
+        top3 = [self.sectors[k] for k in self.top3[a] if k >= 0]
+        scores = self.matches[b] / 5.0
+        order = np.argsort(-scores, kind="stable")
+        return {
+            "top3_euclid_qA": top3,
+            "jarak_top3_qA": {s: float(d) for s, d in zip(top3, self.top3_dist[a])},
+            "top5_clusters_qB_score": [(self.b5_clusters[k], scores[k]) for k in order],
+            "final_clusters": [self.labels[k] for k in self.final[code] if k >= 0],
+        }
+
+    # --- ARTIFACT ---
+    def save(self, path):
+        """Simpan tabel ke file .npz (bisa di-commit & dibandingkan dengan diff())."""
+        np.savez_compressed(
+            path,
+            levels=np.array(self.levels), locs=np.array(self.locs), symbols=np.array(self.symbols),
+            sectors=np.array(self.sectors), clusters=np.array(self.clusters),
+            b5_clusters=np.array(self.b5_clusters), labels=np.array(self.labels),
+            top3=self.top3, top3_dist=self.top3_dist, matches=self.matches, final=self.final,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            return cls(*(z[k].tolist() for k in
+                         ("levels", "locs", "symbols", "sectors", "clusters", "b5_clusters", "labels")),
+                       z["top3"], z["top3_dist"], z["matches"], z["final"])
+
+    def diff(self, other):
+        """
+        Bandingkan dua tabel berdasarkan NAMA (bukan indeks), mis. sebelum & sesudah rules diubah.
+        Output: dict berisi kode yang hasilnya berubah per bagian (array kosong = tidak berubah).
+        """
+        def names(idx, values):
+            lut = np.array(list(values) + [""], dtype=object)
+            return lut[np.where(idx >= 0, idx, len(values))]
+
+        def changed(x, y):
+            width = max(x.shape[1], y.shape[1])
+            x = np.pad(x, ((0, 0), (0, width - x.shape[1])), constant_values="")
+            y = np.pad(y, ((0, 0), (0, width - y.shape[1])), constant_values="")
+            return np.flatnonzero((x != y).any(axis=1))
+
+        clusters = sorted(set(self.b5_clusters) | set(other.b5_clusters))
+
+        def scores(table):
+            out = np.full((table.N_B, len(clusters)), -1, dtype=np.int64)
+            for ci, c in enumerate(clusters):
+                if c in table.b5_clusters:
+                    out[:, ci] = table.matches[:, table.b5_clusters.index(c)]
+            return out
+
+        return {
+            "top3_sectors": changed(names(self.top3, self.sectors), names(other.top3, other.sectors)),
+            "cluster_scores": np.flatnonzero((scores(self) != scores(other)).any(axis=1)),
+            "final_clusters": changed(names(self.final, self.labels), names(other.final, other.labels)),
+        }
+
+    def describe(self, code):
+        """Kode gabungan -> kategori & notasi yang diwakilinya (untuk membaca hasil diff)."""
+        a, b = divmod(int(code), self.N_B)
+        return {
+            "cat_self_efficacy": self.levels[a // 32],
+            "cat_innovativeness": self.levels[(a // 8) % 4],
+            "cat_need_achievement": self.levels[(a // 2) % 4],
+            "cat_loc": self.locs[a % 2],
+            **{f"Note_{d}": self.symbols[(b // 5 ** i) % 5] for i, d in enumerate(self.DIMS)},
+        }
+
+
+def get_single_lookup(engine=None):
+    """SingleLookupTable dibangun sekali per versi katalog engine (dipakai bersama semua session)."""
+    engine = engine or get_engine()
+
+    def build():
+        with startup_timer("init", "SingleLookupTable"):
+            return SingleLookupTable.build(engine)
+    return get_engine_registry().resource(engine, "single_lookup", build)
+
+# ==========================================
+# CACHE HASIL LINTAS SESSION
+# ==========================================
+# Naikkan jika logika pipeline (compute_*_result) berubah tanpa mengubah config engine
+PIPELINE_VERSION = 1
+
+def _digest_update(h, obj):
+    """Masukkan obj ke hash secara kanonik (urutan kunci dict tidak berpengaruh)."""
+    if isinstance(obj, Mapping):
+        h.update(b"{")
+        for k in sorted(obj, key=repr):
+            _digest_update(h, k)
+            _digest_update(h, obj[k])
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for v in obj:
+            _digest_update(h, v)
+        h.update(b"]")
+    elif isinstance(obj, (set, frozenset)):
+        _digest_update(h, sorted(obj, key=repr))
+    elif isinstance(obj, np.ndarray):
+        h.update(f"{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    else:
+        h.update(repr(obj).encode())
+
+
+def get_model_version(engine=None, file_path='deskripsi.xlsx'):
+    """
+    Versi pipeline + katalog engine + katalog deskripsi
+    (PIPELINE_VERSION, engine.catalog_version & DescriptionCatalog.version).
+    Sama di semua proses selama kode & file sama -> aman dipakai sebagai kunci cache bersama;
+    berubah otomatis saat engine_catalog.json atau deskripsi.xlsx diedit.
+    """
+    engine = engine or get_engine()
+    return (f"p{PIPELINE_VERSION}-{engine.catalog_version}"
+            f"-{get_description_catalog(file_path, engine).version}")
+
+
+class ResultCache:
+    """
+    Cache LRU hasil pipeline, dipakai bersama semua session dalam satu proses.
+    - Kunci: (metode, fingerprint jawaban, versi model) -> lihat session_pipeline.
+    - Nilai disimpan sebagai pickle: tiap session dapat salinan sendiri & ukuran bisa dibatasi.
+    - Batas: max_entries, max_bytes, ttl (detik); counter hit/miss/eviction.
+    - disk_path (opsional): tier kedua SQLite (WAL) agar beberapa worker Streamlit
+      di mesin yang sama bisa memakai hasil satu sama lain.
+    - _lock hanya menjaga LRU di memori; query SQLite (dijaga _disk_lock) & pickle di luar _lock,
+      jadi hit memori tidak menunggu I/O disk session lain.
+    """
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024, ttl=3600.0, disk_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._data = OrderedDict()   # key -> (kedaluwarsa, blob)
+        self._bytes = 0
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0,
+                       "puts": 0, "errors": 0}
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, timeout=5.0, check_same_thread=False,
+                                         isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)"
+            )
+
+    @staticmethod
+    def _key(key):
+        return "|".join(map(str, key))
+
+    def get(self, key):
+        """Salinan hasil untuk key, atau None (miss / kedaluwarsa)."""
+        k = self._key(key)
+        now = time.time()
+        blob = self._get_memory(k, now)
+        if blob is None and self._disk is not None:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    "SELECT value, expires FROM result_cache WHERE key = ? AND expires > ?", (k, now)
+                ).fetchone()
+            if row is not None:
+                blob = row[0]
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                    if k not in self._data:   # put() lain bisa lebih dulu selama query
+                        self._store(k, blob, row[1])
+        if blob is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        return pickle.loads(blob)
+
+    def _get_memory(self, k, now):
+        with self._lock:
+            entry = self._data.get(k)
+            if entry is None:
+                return None
+            if entry[0] > now:
+                self._data.move_to_end(k)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._drop(k)
+            self._stats["expired"] += 1
+            return None
+
+    def put(self, key, value):
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            return
+        k = self._key(key)
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._store(k, blob, expires)
+            self._stats["puts"] += 1
+            puts = self._stats["puts"]
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO result_cache (key, value, expires) VALUES (?, ?, ?)",
+                    (k, blob, expires)
+                )
+                if puts % 100 == 0:
+                    self._disk.execute("DELETE FROM result_cache WHERE expires <= ?", (time.time(),))
+
+    def _store(self, k, blob, expires):
+        if k in self._data:
+            self._drop(k)
+        if len(blob) > self.max_bytes:
+            return
+        self._data[k] = (expires, blob)
+        self._bytes += len(blob)
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self._stats["evictions"] += 1
+
+    def _drop(self, k):
+        _, blob = self._data.pop(k)
+        self._bytes -= len(blob)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM result_cache")
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hit_rate": (self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0,
+                **self._stats,
+            }
+
+
+def _secrets_section(name):
+    # tanpa secrets.toml -> pakai default
+    try:
+        return st.secrets.get(name, {})
+    except FileNotFoundError:
+        return {}
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """
+    Satu ResultCache per proses. secrets [result_cache]: max_entries, max_bytes,
+    ttl, disk_path (kosong = tanpa tier disk).
+    """
+    cfg = _secrets_section("result_cache")
+    return ResultCache(
+        max_entries=int(cfg.get("max_entries", 2048)),
+        max_bytes=int(cfg.get("max_bytes", 64 * 1024 * 1024)),
+        ttl=float(cfg.get("ttl", 3600)),
+        disk_path=cfg.get("disk_path") or None,
+    )
+
+# ==========================================
+# CHART PROFIL vs TARGET (SPEC VEGA-LITE DI-CACHE)
+# ==========================================
+# Aspek chart: (key rules engine, key kategori user di row_data)
+PROFILE_CHART_ASPECTS = (
+    ("innovativeness", "cat_innovativeness"),
+    ("self_efficacy", "cat_self_efficacy"),
+    ("need_achievement", "cat_need_achievement"),
+    ("loc", "cat_loc"),
+)
+PROFILE_CHART_SCORE = {"low": 1, "mid-low": 2, "mid-high": 3, "high": 4, "external": 2, "internal": 4, "-": 0}
+
+# Gaya chart per halaman hasil
+PROFILE_CHART_VARIANTS = {
+    "single": {
+        "labels": ("Innovativeness", "Self-Efficacy", "Need for Achievement", "Locus of Control"),
+        # padding 0.4 membuat jarak antar grup lebih lebar
+        "y_axis": {"title": None, "labelFontSize": 13, "labelPadding": 15, "labelLimit": 1000, "minExtent": 150},
+        "y_padding": 0.4,
+        "colors": ["#295ABB", "#3FB68E"],
+        "legend": {"title": None, "orient": "bottom"},
+        "bar_height": 12,
+        "offset_sort": ["1. Anda", "2. Target"],
+        "text_mark": {"color": "black", "fontSize": 11},
+    },
+    "hybrid": {
+        "labels": ("Innovativeness", "Self-Efficacy", "Need for Achievement", "LOC"),
+        "y_axis": {"title": None, "labelFontSize": 13, "labelLimit": 120},
+        "y_padding": 0.3,
+        "colors": ["#2196F3", "#3FB68e"],
+        "legend": None,
+        "bar_height": 15,
+        "offset_sort": None,
+        "text_mark": {},
+    },
+}
+
+def profile_levels(engine, row_data, sector):
+    """(level user, level target sektor) per aspek PROFILE_CHART_ASPECTS -> kunci cache chart."""
+    user, target = [], []
+    for r_key, u_key in PROFILE_CHART_ASPECTS:
+        # Target = level pertama di rules yang memuat sektor ini (default 'low')
+        t_lvl = "low"
+        for lvl, sec_list in engine.rules.get(r_key, {}).items():
+            if any(x.lower() == sector.lower() for x in sec_list):
+                t_lvl = lvl
+                break
+        user.append(str(row_data.get(u_key, "low")))
+        target.append(t_lvl)
+    return tuple(user), tuple(target)
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def profile_chart_spec(variant, user_levels, target_levels):
+    """
+    Spec Vega-Lite chart 'Anda vs Target' (bar + label level) untuk st.vega_lite_chart.
+    Dibangun sekali per (variant, level user, level target) & dipakai ulang semua session,
+    tanpa Altair/DataFrame; data = array per kolom (8 baris). Objek dibagi bersama -> jangan diubah.
+    """
+    style = PROFILE_CHART_VARIANTS[variant]
+    levels = [lvl for pair in zip(user_levels, target_levels) for lvl in pair]
+    values = {
+        "Aspek": [label for label in style["labels"] for _ in range(2)],
+        "Skor": [PROFILE_CHART_SCORE.get(lvl.lower(), 1) for lvl in levels],
+        "Jenis": ["1. Anda", "2. Target"] * len(style["labels"]),
+        "Level": [lvl.title() for lvl in levels],
+    }
+
+    color = {"field": "Jenis", "type": "nominal", "scale": {"range": style["colors"]}}
+    if style["legend"]:
+        color["legend"] = style["legend"]
+    y_offset = {"field": "Jenis", "type": "nominal"}
+    if style["offset_sort"]:
+        y_offset["sort"] = style["offset_sort"]
+    encoding = {
+        "y": {"field": "Aspek", "type": "nominal", "axis": style["y_axis"],
+              "scale": {"padding": style["y_padding"]}},
+        # domain diperbesar dikit biar teks label muat
+        "x": {"field": "Skor", "type": "quantitative", "axis": None, "scale": {"domain": [0, 4.5]}},
+        "color": color,
+        "yOffset": y_offset,
+    }
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v6.json",
+        "data": {"values": values},
+        "height": 220,
+        "layer": [
+            {"mark": {"type": "bar", "height": style["bar_height"]}, "encoding": encoding},
+            {"mark": {"type": "text", "align": "left", "dx": 5, **style["text_mark"]},
+             "encoding": {**encoding, "text": {"field": "Level", "type": "nominal"}}},
+        ],
+        "config": {"background": "transparent", "view": {"stroke": "gray", "strokeWidth": 2}},
+    }
+
+
+def compute_single_result(engine, user_input):
+    """
+    Pipeline Single untuk satu set jawaban (tanpa UI).
+    Output: row_data, jarak_sorted, final_clusters & data penjelasan (sector_docs,
+    cluster_docs, dim_matches) yang dipakai render_hasil_single.
+    """
+    # menyalin data input ke row_data untuk diproses lebih lanjut tanpa merusak data asli
+    row_data = user_input.copy()
+
+    # ============================================
+    # STEP A: PROSES 4 DOMAIN KEWIRAUSAHAAN
+    # ============================================
+    
+    # 1. Hitung Score & Kategori (rata-rata skor per dimensi (se, inn, nach, loc)
+    scores_A = engine.domain_cols_score(user_input)
+
+    # Masukkan skor angka ke row_data (untuk keperluan vektor nanti)
+    row_data['score_SE'] = scores_A['self_efficacy']
+    row_data['score_INN'] = scores_A['innovativeness']
+    row_data['score_NACH'] = scores_A['need_achievement']
+
+    # Konversi Angka -> Kategori (low, mid, high)
+    row_data['cat_self_efficacy'] = engine.kategori_score(scores_A['self_efficacy'])
+    row_data['cat_innovativeness'] = engine.kategori_score(scores_A['innovativeness'])
+    row_data['cat_need_achievement'] = engine.kategori_score(scores_A['need_achievement'])
+    
+   # LOC Logic
+    # membandingkan rata-rata internal vs eksternal untuk menentukan dominasi locus of control user
+    row_data['cat_loc'] = engine.kategori_loc(scores_A['loc_internal'], scores_A['loc_external'])
+    
+    # ============================================
+    # STEP B: NOTASI BIG 5 PERSONALITY
+    # ============================================
+    scores_B = engine.calculate_big5_scores(user_input)
+    notations = engine.big5_notations(scores_B)
+    row_data.update(notations) # Masukkan Note_O, Note_C, dll ke row_data
+
+    # ============================================
+    # STEP C: LOOKUP HASIL (Euclidean, cluster A/B, refinement)
+    # ============================================
+    # Seluruh pipeline single hanya bergantung pada kategori & notasi di atas,
+    # jadi hasilnya diambil dari SingleLookupTable (sudah dihitung untuk 128 x 3125 kombinasi)
+    lookup = get_single_lookup(engine)
+    hasil = lookup.lookup(lookup.encode(row_data))
+
+    # Top 3 sektor (urut jarak Euclidean terdekat) & jaraknya untuk kartu sektor
+    row_data['top3_euclid_qA'] = hasil['top3_euclid_qA']
+    row_data['top5_clusters_qB_score'] = hasil['top5_clusters_qB_score']
+    final_clusters = hasil['final_clusters']
+
+    # Data penjelasan untuk UI (deskripsi & kecocokan dimensi Big Five)
+    sector_docs = engine.get_sector_descriptions()
+    cluster_docs = engine.get_cluster_descriptions()
+    return {
+        'row_data': row_data,
+        'jarak_sorted': hasil['jarak_top3_qA'],
+        'final_clusters': final_clusters,
+        'sector_docs': {s.title(): sector_docs.get(s.title(), "") for s in row_data['top3_euclid_qA']},
+        'cluster_docs': {c: cluster_docs.get(c, "") for c in final_clusters},
+        'dim_matches': {c: engine.dimension_matches(row_data, c) for c in final_clusters},
+    }
+
 
 def render_hasil_single():
     # --- 0. CSS STYLE (Hanya untuk elemen non-HTML block) ---
@@ -3008,116 +5878,22 @@ def render_hasil_single():
             border-bottom: 1px solid #154360;
         }
 
-        /* Media Query HP */
-        @media (max-width: 600px) {
-            .mobile-text-left { text-align: left !important; }
-            div[data-testid="stExpander"] details summary p {
-                font-size: 18px !important;
-            }
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # --- 1. AMBIL DATA DARI SESSION STATE ---
-    # Gabungkan jawaban kuesioner bagian 1 (karakter kewirausahaan)
-    answers_1 = st.session_state.get('temp_answers_1', {})
-    # Gabungkan jawaban kuesioner bagian 2 (big five personality)
-    answers_2 = st.session_state.get('temp_answers_2', {})
-
-    # menggabungkan kedua kamus (dictionary) jawaban menjadi satu variabel user_input
-    user_input = {**answers_1, **answers_2}
-    # memanggil class recommenderengine yang berisi logika perhitungan sistem rekomendasi
-    engine = RecommenderEngine()
-    # menyalin data input ke row_data untuk diproses lebih lanjut tanpa merusak data asli
-    row_data = user_input.copy()
-
-    # ============================================
-    # STEP A: PROSES 4 DOMAIN KEWIRAUSAHAAN
-    # ============================================
-    
-    # 1. Hitung Score & Kategori (rata-rata skor per dimensi (se, inn, nach, loc)
-    scores_A = engine.domain_cols_score(user_input)
-
-    # Masukkan skor angka ke row_data (untuk keperluan vektor nanti)
-    row_data['score_SE'] = scores_A['self_efficacy']
-    row_data['score_INN'] = scores_A['innovativeness']
-    row_data['score_NACH'] = scores_A['need_achievement']
-
-    # Konversi Angka -> Kategori (low, mid, high)
-    row_data['cat_self_efficacy'] = engine.kategori_score(scores_A['self_efficacy'])
-    row_data['cat_innovativeness'] = engine.kategori_score(scores_A['innovativeness'])
-    row_data['cat_need_achievement'] = engine.kategori_score(scores_A['need_achievement'])
-    
-   # LOC Logic
-    # mengambil nilai mentah untuk dimensi locus of control internal & external
-    loc_i_raw = [user_input.get(k,3) for k in engine.domain_cols['loc_internal']]
-    loc_e_raw = [user_input.get(k,3) for k in engine.domain_cols['loc_external']]
-
-    # membandingkan rata-rata internal vs eksternal untuk menentukan dominasi locus of control user
-    row_data['cat_loc'] = engine.kategori_loc(sum(loc_i_raw)/len(loc_i_raw), sum(loc_e_raw)/len(loc_e_raw))
-    
-    # 2. Broad matching
-    # mencocokkan kategori user dengan sektor yang sesuai berdasarkan aturan
-    rekomendasi_sektor_qA = engine.rekomendasi_per_domain(row_data)
-
-    # menyimpan daftar sektor kandidat (masih dalam cakupan luas)
-    row_data['rekomendasi_sektor_qA'] = rekomendasi_sektor_qA
-    
-    # 3. Create User Vector (untuk Euclidean)
-    # mengubah label kategori (high/low) menjadi angka bobot (0-3) untuk perhitungan jarak
-    vector_vals = engine.create_user_vector(row_data)
-
-    # memperbarui row_data dengan nilai vektor numerik tersebut
-    row_data.update(vector_vals)
-
-    # 4. Euclidean Distance (Final Sector Ranking)
-    # menghitung jarak terdekat antara profil user dengan profil ideal setiap sektor (yang sudah dalam bentuk vektor numerik)
-    jarak_sorted, top_picks = engine.final_sector(row_data, rekomendasi_sektor_qA) #jarak_s
-    row_data["final_sector_qA"] = top_picks # List sektor terurut dari jarak terdekat
-    sector_names_list = list(jarak_sorted.keys())
-
-    
-    # Simpan Top 3 & top 5 untuk Logic Refinement nanti
-    row_data['top3_euclid_qA'] = sector_names_list[:3]
-    row_data['top5_euclid_qA'] = sector_names_list[:5]
-
-    # 5. Mapping Sektor -> Cluster A
-    row_data['cluster_weights_top5_qA'] = engine.cluster_weights_from_top5_qA(row_data['top3_euclid_qA'])
-    # mengambil top 1
-    row_data['cluster_top5_best_qA'], row_data['cluster_top5_ranking_qA'] = engine.best_list_cluster_from_weights_qA(row_data['cluster_weights_top5_qA'])
-
-    # Simpan mapping sektor mana saja yang masuk ke cluster terpilih
-    row_data['top5_cluster_to_sector_qA'] = engine.top5_clusters_with_sectors_qA(row_data['top3_euclid_qA'])
-
-    # ============================================
-    # STEP B: PROSES BIG 5 PERSONALITY
-    # ============================================
-
-    # 1. Hitung Score & Notasi
-    scores_B = engine.calculate_big5_scores(user_input)
-    notations = engine.big5_notations(scores_B)
-    row_data.update(notations) # Masukkan Note_O, Note_C, dll ke row_data
-    
-    # 2. Cari Cluster B (Euclidean Distance terhadap Prototype Simbol)
-    best_name, best_score, list_names, list_scores = engine.assign_cluster_with_top5(row_data)
-
-    row_data['top5_clusters_qB'] = list_names
-    row_data['top5_clusters_qB_score'] = list_scores
-    
-    # 3. ambil nama cluster(-cluster) dengan nilai tertinggi
-    row_data['cluster_top5_best_qB'] = engine.pick_best_clusters_qB_multi(row_data)
-
-    # 4. ambil nilai tertinggi
-    row_data['cluster_top5_best_qB_score'] = engine.pick_best_clusters_qB_score(row_data)
-
-    # 5. 
-    row_data["top5_cluster_to_sector_qB"] = engine.top5_clusters_with_matched_sectors_qB(row_data)
-    
-    # ============================================
-    # STEP C: FINAL REFINEMENT (GABUNGAN)
-    # ============================================
+        /* Media Query HP */
+        @media (max-width: 600px) {
+            .mobile-text-left { text-align: left !important; }
+            div[data-testid="stExpander"] details summary p {
+                font-size: 18px !important;
+            }
+        }
+    </style>
+    """, unsafe_allow_html=True)
     
-    final_clusters = engine.get_recommended_cluster_refined(row_data)
+    # --- 1. HASIL PIPELINE (dihitung sekali per set jawaban, lihat session_pipeline) ---
+    engine = session_engine()
+    hasil = session_pipeline('single', compute_single_result, engine)
+    row_data = hasil['row_data']
+    jarak_sorted = hasil['jarak_sorted']
+    final_clusters = hasil['final_clusters']
     # st.write(jarak_sorted)
     # # ============================================
     # # [DEBUGGING AREA] LIHAT ISI ROW DATA
@@ -3134,7 +5910,7 @@ def render_hasil_single():
     # ============================================
     # TAMPILAN UI
     # ============================================
-    scroll_to_here(0, key='scroll_hasil_single')
+    scroll_to_top.scroll_to_here(0, key='scroll_hasil_single')
     st.success("Analisis Selesai! Berikut adalah hasil rekomendasi berdasarkan profil Anda.")
     st.header("🎯 Hasil Rekomendasi (Single Method)")
     st.write("⚠️PENTING: Setelah membaca penjelasan halaman ini, mohon dilanjutkan ke halaman selanjutnya untuk penjelasan metode Hybrid dan dilanjutkan ke feedback/tanggapan di akhir. Feedback/tanggapan Anda sangat diperlukan dalam menentukan hasil penelitian kami, terkait performa kedua sistem rekomendasi")
@@ -3190,7 +5966,7 @@ def render_hasil_single():
     
 
     # Pastikan data pendukung sudah siap
-    sector_docs = engine.get_sector_descriptions()
+    sector_docs = hasil['sector_docs']
 
     # LOOPING TOP 3 SEKTOR
     for i, s in enumerate(row_data['top3_euclid_qA']):
@@ -3243,61 +6019,9 @@ def render_hasil_single():
             # -----------------------------------------------------------
             st.caption("📊 **Perbandingan Detail: Anda vs Target Kebutuhan Sektor**")
             
-            # 1. Siapkan Data
-            chart_data = []
-            val_map = {"low": 1, "mid-low": 2, "mid-high": 3, "high": 4, 
-                        "external": 2, "internal": 4, "-": 0}
-            
-            domains = [
-                ("Innovativeness", "cat_innovativeness", "innovativeness"),
-                ("Self-Efficacy", "cat_self_efficacy", "self_efficacy"),
-                ("Need for Achievement", "cat_need_achievement", "need_achievement"),
-                ("Locus of Control", "cat_loc", "loc")
-            ]
-            
-            for label, u_key, r_key in domains:
-                # Cari Target
-                t_lvl = "low"
-                d_rules = engine.rules.get(r_key, {})
-                for lvl, sec_list in d_rules.items():
-                    if any(x.lower() == s.lower() for x in sec_list):
-                        t_lvl = lvl; break
-                
-                # Ambil User
-                u_lvl = row_data.get(u_key, "low")
-                
-                # Masukkan Data
-                chart_data.append({"Aspek": label, "Skor": val_map.get(str(u_lvl).lower(), 1), "Jenis": "1. Anda", "Level": str(u_lvl).title()})
-                chart_data.append({"Aspek": label, "Skor": val_map.get(str(t_lvl).lower(), 1), "Jenis": "2. Target", "Level": str(t_lvl).title()})
-            
-            df_chart = pd.DataFrame(chart_data)
-
-            # 2. Render Chart Horizontal (Altair)
-            
-            base = alt.Chart(df_chart).encode(
-                # --- [UPDATE 1] Tambahkan padding di sini ---
-                y=alt.Y('Aspek:N', 
-                        axis=alt.Axis(title=None, labelFontSize=13, labelPadding=15, labelLimit=1000, minExtent=150), 
-                        scale=alt.Scale(padding=0.4) # Padding 0.4 membuat jarak antar grup lebih lebar
-                ), 
-                x=alt.X('Skor:Q', axis=None, scale=alt.Scale(domain=[0, 4.5])), # Domain diperbesar dikit biar teks label muat
-                color=alt.Color('Jenis:N', legend=alt.Legend(title=None, orient='bottom'), scale=alt.Scale(range=['#295ABB', "#3FB68E"]))
-            )
-
-            bars = base.mark_bar(height=12).encode(
-                yOffset=alt.YOffset('Jenis:N', sort=['1. Anda', '2. Target']) 
-            )
-
-            # Label Teks
-            text = base.mark_text(dx=5, align='left', color='black', fontSize=11).encode(
-                yOffset=alt.YOffset('Jenis:N', sort=['1. Anda', '2. Target']),
-                text='Level:N'
-            )
-
-            # --- [UPDATE 2] Perbesar Height Chart ---
-            final_chart = (bars + text).properties(height=220).configure(background='transparent').configure_view(stroke='gray', strokeWidth=2)
-            
-            st.altair_chart(final_chart, use_container_width=True)
+            # Spec Vega-Lite di-cache per (level user, level target) -> tanpa build chart tiap rerun
+            spec = profile_chart_spec('single', *profile_levels(engine, row_data, s))
+            st.vega_lite_chart(spec, use_container_width=True)
 
             st.markdown("---")
             
@@ -3310,7 +6034,7 @@ def render_hasil_single():
 
     # 3. HASIL CLUSTER (OPEN ALL)
     st.markdown("## Anda masuk ke klaster:")
-    cluster_docs = engine.get_cluster_descriptions()
+    cluster_docs = hasil['cluster_docs']
     
     if final_clusters:
         for i, cluster in enumerate(final_clusters):
@@ -3339,6 +6063,7 @@ def render_hasil_single():
                 
                 # --- [UPDATE] KARTU PERBANDINGAN: USER VS TARGET ---
                 rules = engine.big5_cluster_rules.get(cluster, {})
+                dim_match = hasil['dim_matches'][cluster]
                 
                 if rules:
                     st.markdown("##### ⚖️ Kecocokan Kepribadian Anda vs Standar Klaster:")
@@ -3356,8 +6081,8 @@ def render_hasil_single():
                         target_rule = rules.get(trait_code, "?")          # Misal: "0/+"
                         user_score = row_data.get(f'Note_{trait_code}')   # Misal: "-"
                         
-                        # 2. Cek Kecocokan (Pakai fungsi engine)
-                        is_match = engine.symbol_matches(user_score, target_rule)
+                        # 2. Cek Kecocokan (bitmask rule yang sudah dikompilasi engine)
+                        is_match = dim_match.get(trait_code, False)
                         
                         # 3. Tentukan Warna & Ikon
                         if is_match:
@@ -3429,26 +6154,19 @@ def render_hasil_single():
     # [UPDATE] Simpan ke Database (Single: Cluster & Sektor)
     user_id = st.session_state.get('current_user_id')
     if user_id:
+        publish_results('single', user_id, final_clusters, row_data.get('top3_euclid_qA', []))
         try:
-            db = st.session_state['db']
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            # 1. Siapkan String Cluster
-            str_cluster = ", ".join(final_clusters)
-            
-            # 2. Siapkan String Sektor (Single pakai Euclidean)
-            str_sector = ", ".join(row_data.get('top3_euclid_qA', [])) 
-            
-            # 3. Update Database
-            cursor.execute("""
-                UPDATE mst_tbl 
-                SET rec_single = %s, top3_sector_single = %s 
-                WHERE user_id = %s
-            """, (str_cluster, str_sector, user_id))
-            
-            conn.commit()
-            conn.close()
+            # hanya sekali per user & set jawaban, bukan tiap rerun
+            if not result_saved('single', user_id, hasil):
+                db = get_db()
+                
+                # 1. Cluster & Sektor (Single pakai Euclidean), disimpan sebagai JSON array
+                db.update_user_fields(user_id, {
+                    "rec_single": list(final_clusters),
+                    "top3_sector_single": list(row_data.get('top3_euclid_qA', [])),
+                })
+                db.checkpoint("hasil_single")
+                mark_result_saved('single', user_id, hasil)
         except Exception as e:
             # st.error(f"Error saving DB: {e}") # Aktifkan jika ingin debug
             pass
@@ -3464,99 +6182,15 @@ def render_hasil_single():
 
     
     if st.button("🚀 Lanjut ke Analisis Hybrid", type="primary", use_container_width=True):
-        with st.spinner('Loading...'):
-                    time.sleep(2)
         st.session_state['halaman_sekarang'] = "hasil_hybrid"
         st.rerun()
 
-def render_hasil_hybrid():
-    # --- 0. CSS STYLE (Background & Helper Classes) ---
-    st.markdown("""
-    <style>
-        /* 1. Background Halaman */
-        .stApp {
-            background-color: #F8F9F1;
-        }
-
-        /* 2. Kartu Big 5 Kecil */
-        .big5-card {
-            background-color: #fff;
-            border-radius: 8px;
-            padding: 10px 5px;
-            text-align: center;
-            margin-bottom: 10px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        }
-
-        /* 3. Styling Tombol Streamlit */
-        div.stButton > button {
-            border-radius: 8px !important;
-            font-weight: 600 !important;
-        }
-        
-        /* 4. Judul Expander Besar */
-        div[data-testid="stExpander"] details summary p {
-            font-size: 20px !important;
-            font-weight: 700 !important;
-            color: #154360 !important;
-        }
-
-        /* --- CLASS BARU UNTUK KOTAK DESKRIPSI (Ganti Inline CSS) --- */
-        .info-box-blue {
-            background-color: #EBF5FB; 
-            border: 2px solid #AED6F1; 
-            border-radius: 12px; 
-            padding: 25px; 
-            margin-bottom: 20px; 
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1); 
-            color: #0A0A44;
-            font-size: 16px;
-            line-height: 1.6;
-            text-align: justify;
-        }
-
-        /* --- CLASS BARU UNTUK SEKTOR MATCHED (Ganti Inline CSS) --- */
-        .sector-match-box {
-            background-color: #e1f5fe;
-            border-left: 5px solid #2980b9;
-            padding: 10px;
-            border-radius: 5px;
-            margin: 10px 0;
-            color: #0c5460;
-            font-size: 16px;
-        }
-
-        /* --- CLASS UNTUK LINK --- */
-        .custom-link {
-            text-decoration: none;
-            color: #2980B9 !important;
-            font-weight: bold;
-            border-bottom: 1px dashed #2980B9;
-        }
-        .custom-link:hover {
-            color: #154360 !important;
-            border-bottom: 1px solid #154360;
-        }
-
-        /* Media Query HP */
-        @media (max-width: 600px) {
-            .mobile-text-left { text-align: left !important; }
-            div[data-testid="stExpander"] details summary p {
-                font-size: 18px !important;
-            }
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    # ... (Bagian Load Data Sama) ...
-    answers_1 = st.session_state.get('temp_answers_1', {})
-    answers_2 = st.session_state.get('temp_answers_2', {})
-    
-    if not answers_1 or not answers_2:
-        st.warning("Data belum lengkap.")
-        return
-
-    user_input = {**answers_1, **answers_2}
-    engine = RecommenderEngine()
+def compute_hybrid_result(engine, user_input):
+    """
+    Pipeline Hybrid untuk satu set jawaban (tanpa UI).
+    Output: row_data, jarak_sorted, top3_tfidf_A, final_clusters & data penjelasan
+    (sector_docs, cluster_docs, dim_matches) yang dipakai render_hasil_hybrid.
+    """
     row_data = user_input.copy() # Copy agar user_input aman
 
     # ============================================
@@ -3572,14 +6206,11 @@ def render_hasil_hybrid():
     row_data['cat_need_achievement'] = engine.kategori_score(scores_A['need_achievement'])
     
     # LOC Logic
-    loc_i_raw = [user_input.get(k,3) for k in engine.domain_cols['loc_internal']]
-    loc_e_raw = [user_input.get(k,3) for k in engine.domain_cols['loc_external']]
-    val_i = sum(loc_i_raw)/len(loc_i_raw) if loc_i_raw else 0
-    val_e = sum(loc_e_raw)/len(loc_e_raw) if loc_e_raw else 0
-    row_data['cat_loc'] = engine.kategori_loc(val_i, val_e)
+    row_data['cat_loc'] = engine.kategori_loc(scores_A['loc_internal'], scores_A['loc_external'])
 
     # 2.Broad Matching
-    rekomendasi_sektor_qA_hybrid = engine.rekomendasi_per_domain(row_data)
+    # kandidat sektor sebagai bitmask id sektor (OR rules 4 domain)
+    rekomendasi_sektor_qA_hybrid = engine.candidate_mask(row_data)
     row_data['rekomendasi_sektor_qA_hybrid'] = rekomendasi_sektor_qA_hybrid
     row_data.update(engine.create_user_vector(row_data))
 
@@ -3599,8 +6230,7 @@ def render_hasil_hybrid():
 
     # --- BAGIAN BARU: CONTENT-BASED (TF-IDF) ---
     
-    # 4. Build User Text Profile (Cell 34)
-    row_data['user_text_profile_A_hybrid'] = engine.build_narrative_text(row_data, engine.likert_text_map)
+    # 4. User Text Profile (Cell 34) -> dirakit langsung sebagai vektor kata di compute_narrative_ranking
     
     # 5. Hitung TF-IDF Similarity (Cell 39)
     # Menggunakan Top 5 Euclidean sebagai kandidat
@@ -3618,11 +6248,10 @@ def render_hasil_hybrid():
     }
 
     # Panggil Generic Function
-    top3_tfidf_A = engine.compute_tfidf_ranking(
-        user_text=row_data['user_text_profile_A_hybrid'], 
+    top3_tfidf_A = engine.compute_narrative_ranking(
+        row=row_data,
+        part='A',
         candidates_dict=candidates_A,
-        lang='id',    # Settingan Lokal
-        ngram=(1,1),  # Settingan Standar
         top_n=3   # Ambil 3 Terbaik
     )
 
@@ -3664,7 +6293,6 @@ def render_hasil_hybrid():
 
     cluster_docs = engine.get_cluster_descriptions()
     # TF IDF
-    row_data['user_text_profile_B_hybrid'] = engine.build_narrative_text(row_data, engine.qb_text_mapping)
     candidates_B_hybrid = {
         s: cluster_docs.get(s, "")
         for s in row_data['top3_clusters_qB_hybrid'] 
@@ -3673,11 +6301,10 @@ def render_hasil_hybrid():
 
 
     # Panggil Generic Function
-    top3_tfidf_B_hybrid = engine.compute_tfidf_ranking(
-        user_text=row_data["user_text_profile_B_hybrid"], 
+    top3_tfidf_B_hybrid = engine.compute_narrative_ranking(
+        row=row_data,
+        part='B',
         candidates_dict=candidates_B_hybrid,
-        lang='id',    # Settingan Lokal
-        ngram=(1,1),  # Settingan Standar
         top_n=3       # Ambil 3 Terbaik
     )
 
@@ -3719,7 +6346,127 @@ def render_hasil_hybrid():
     # ============================================
     # STEP C: FINAL REFINEMENT (HYBRID)
     # ============================================
-    final_clusters_hybrid = engine.get_recommended_cluster_refined_hybrid(row_data)
+    # Tanpa st.* di sini: hasil di-memo per session & dibagi lewat ResultCache, jadi
+    # pesan refinement dikembalikan sebagai data dan ditampilkan oleh render_hasil_hybrid
+    refine = {}
+    final_clusters_hybrid = engine.get_recommended_cluster_refined_hybrid(row_data, verbose=False, trace=refine)
+
+    # Data penjelasan untuk UI (deskripsi & kecocokan dimensi Big Five)
+    target_sectors = list(dict.fromkeys(row_data.get('top3_tfidf_sector_hybrid', [])))
+    return {
+        'row_data': row_data,
+        'jarak_sorted': jarak_sorted,
+        'top3_tfidf_A': top3_tfidf_A,
+        'final_clusters': final_clusters_hybrid,
+        'sector_docs': {s.title(): sector_docs.get(s.title(), "") for s in target_sectors[:3]},
+        'cluster_docs': {c: cluster_docs.get(c, "") for c in final_clusters_hybrid},
+        'dim_matches': {c: engine.dimension_matches(row_data, c) for c in final_clusters_hybrid},
+        'refine_pelengkap': refine.get('pelengkap'),
+        'refine_fallback': refine.get('fallback', False),
+    }
+
+
+def render_hasil_hybrid():
+    # --- 0. CSS STYLE (Background & Helper Classes) ---
+    st.markdown("""
+    <style>
+        /* 1. Background Halaman */
+        .stApp {
+            background-color: #F8F9F1;
+        }
+
+        /* 2. Kartu Big 5 Kecil */
+        .big5-card {
+            background-color: #fff;
+            border-radius: 8px;
+            padding: 10px 5px;
+            text-align: center;
+            margin-bottom: 10px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
+        }
+
+        /* 3. Styling Tombol Streamlit */
+        div.stButton > button {
+            border-radius: 8px !important;
+            font-weight: 600 !important;
+        }
+        
+        /* 4. Judul Expander Besar */
+        div[data-testid="stExpander"] details summary p {
+            font-size: 20px !important;
+            font-weight: 700 !important;
+            color: #154360 !important;
+        }
+
+        /* --- CLASS BARU UNTUK KOTAK DESKRIPSI (Ganti Inline CSS) --- */
+        .info-box-blue {
+            background-color: #EBF5FB; 
+            border: 2px solid #AED6F1; 
+            border-radius: 12px; 
+            padding: 25px; 
+            margin-bottom: 20px; 
+            box-shadow: 0 4px 6px rgba(0,0,0,0.1); 
+            color: #0A0A44;
+            font-size: 16px;
+            line-height: 1.6;
+            text-align: justify;
+        }
+
+        /* --- CLASS BARU UNTUK SEKTOR MATCHED (Ganti Inline CSS) --- */
+        .sector-match-box {
+            background-color: #e1f5fe;
+            border-left: 5px solid #2980b9;
+            padding: 10px;
+            border-radius: 5px;
+            margin: 10px 0;
+            color: #0c5460;
+            font-size: 16px;
+        }
+
+        /* --- CLASS UNTUK LINK --- */
+        .custom-link {
+            text-decoration: none;
+            color: #2980B9 !important;
+            font-weight: bold;
+            border-bottom: 1px dashed #2980B9;
+        }
+        .custom-link:hover {
+            color: #154360 !important;
+            border-bottom: 1px solid #154360;
+        }
+
+        /* Media Query HP */
+        @media (max-width: 600px) {
+            .mobile-text-left { text-align: left !important; }
+            div[data-testid="stExpander"] details summary p {
+                font-size: 18px !important;
+            }
+        }
+    </style>
+    """, unsafe_allow_html=True)
+    # ... (Bagian Load Data Sama) ...
+    answers_1 = st.session_state.get('temp_answers_1', {})
+    answers_2 = st.session_state.get('temp_answers_2', {})
+    
+    if not answers_1 or not answers_2:
+        st.warning("Data belum lengkap.")
+        return
+
+    # Hasil pipeline (dihitung sekali per set jawaban, lihat session_pipeline)
+    engine = session_engine()
+    hasil = session_pipeline('hybrid', compute_hybrid_result, engine)
+    row_data = hasil['row_data']
+    jarak_sorted = hasil['jarak_sorted']
+    top3_tfidf_A = hasil['top3_tfidf_A']
+    final_clusters_hybrid = hasil['final_clusters']
+    sector_docs = hasil['sector_docs']
+    cluster_docs = hasil['cluster_docs']
+
+    # Pesan refinement (dulu ditulis langsung saat menghitung); .get -> entri cache lama tanpa kunci ini
+    if hasil.get('refine_pelengkap'):
+        st.write(f"   + Menambahkan pelengkap: **{hasil['refine_pelengkap']}**")
+    if hasil.get('refine_fallback'):
+        st.error("⚠️ Filter membuang semua hasil. Mengembalikan Initial sebagai fallback.")
 
     # st.write(final_clusters_hybrid)
     # ============================================
@@ -3734,7 +6481,7 @@ def render_hasil_hybrid():
     # TAMPILAN UI
     # ============================================
 
-    scroll_to_here(0, key='scroll_hasil_hybrid')
+    scroll_to_top.scroll_to_here(0, key='scroll_hasil_hybrid')
     # 2. Panggil fungsi untuk loncat ke jangkar tersebut
     st.header("🎯 Hasil Rekomendasi (Hybrid Method)")
     st.write("⚠️PENTING: Setelah membaca penjelasan halaman ini, mohon dilanjutkan ke halaman selanjutnya untuk ringkasan dan mengisi feedback/tanggapan di akhir. Feedback/tanggapan Anda sangat diperlukan dalam menentukan hasil penelitian kami, terkait performa kedua sistem rekomendasi")
@@ -3823,37 +6570,11 @@ def render_hasil_hybrid():
             st.progress(match_score, text=f"Kecocokan Profil: {match_score}%")
             st.markdown("---")
 
-            # CHART (Altair Transparan & Responsif)
+            # CHART (Vega-Lite transparan & responsif, spec di-cache)
             st.caption("📊 Perbandingan Detail: Anda vs Target")
             
-            chart_data = []
-            val_map = {"low": 1, "mid-low": 2, "mid-high": 3, "high": 4, "external": 2, "internal": 4, "-": 0}
-            domains = [("Innovativeness", "cat_innovativeness", "innovativeness"), ("Self-Efficacy", "cat_self_efficacy", "self_efficacy"), ("Need for Achievement", "cat_need_achievement", "need_achievement"), ("LOC", "cat_loc", "loc")]
-            
-            for label, u_key, r_key in domains:
-                t_lvl = "low"
-                d_rules = engine.rules.get(r_key, {})
-                for lvl, sec_list in d_rules.items():
-                    if any(x.lower() == s.lower() for x in sec_list):
-                        t_lvl = lvl; break
-                u_lvl = row_data.get(u_key, "low")
-
-                chart_data.append({"Aspek": label, "Skor": val_map.get(str(u_lvl).lower(), 1), "Jenis": "1. Anda", "Level": str(u_lvl).title()})
-                chart_data.append({"Aspek": label, "Skor": val_map.get(str(t_lvl).lower(), 1), "Jenis": "2. Target", "Level": str(t_lvl).title()})
-            
-            df_chart = pd.DataFrame(chart_data)
-
-            # Render Chart
-            base = alt.Chart(df_chart).encode(
-                y=alt.Y('Aspek:N', axis=alt.Axis(title=None, labelFontSize=13, labelLimit=120), scale=alt.Scale(padding=0.3)), 
-                x=alt.X('Skor:Q', axis=None, scale=alt.Scale(domain=[0, 4.5])),
-                color=alt.Color('Jenis:N', scale=alt.Scale(range=['#2196F3', '#3FB68e']))
-            )
-            bars = base.mark_bar(height=15).encode(yOffset=alt.YOffset('Jenis:N'))
-            text = base.mark_text(dx=5, align='left').encode(yOffset=alt.YOffset('Jenis:N'), text='Level:N')
-            
-            final_chart = (bars + text).properties(height=220).configure(background='transparent').configure_view(stroke='gray', strokeWidth=2)
-            st.altair_chart(final_chart, use_container_width=True)
+            spec = profile_chart_spec('hybrid', *profile_levels(engine, row_data, s))
+            st.vega_lite_chart(spec, use_container_width=True)
             
             st.markdown("---")
             # Inline style untuk justify text deskripsi
@@ -3894,6 +6615,7 @@ def render_hasil_hybrid():
                 
                 # KARTU BIG 5
                 rules = engine.big5_cluster_rules.get(cluster, {})
+                dim_match = hasil['dim_matches'][cluster]
                 if rules:
                     st.markdown("##### ⚖️ Kecocokan Kepribadian vs Standar Klaster:")
                     cols_b5 = st.columns(5)
@@ -3902,7 +6624,7 @@ def render_hasil_hybrid():
                     for idx, (trait_name, trait_code) in enumerate(traits):
                         target_rule = rules.get(trait_code, "?")
                         user_score = row_data.get(f'Note_{trait_code}')
-                        is_match = engine.symbol_matches(user_score, target_rule)
+                        is_match = dim_match.get(trait_code, False)
                         
                         if is_match:
                             bg, txt, border, icon, status = "#d1e7dd", "#0f5132", "#badbcc", "✅", "Sesuai"
@@ -3954,32 +6676,126 @@ def render_hasil_hybrid():
     # 4. SIMPAN KE DB
     user_id = st.session_state.get('current_user_id')
     if user_id:
+        publish_results('hybrid', user_id, final_clusters_hybrid, target_sectors)
         try:
-            db = st.session_state['db']
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            str_cluster = ", ".join(final_clusters_hybrid)
-            str_sector = ", ".join(target_sectors)
-            cursor.execute("UPDATE mst_tbl SET rec_hybrid = %s, top3_sector_hybrid = %s WHERE user_id = %s", (str_cluster, str_sector, user_id))
-            conn.commit(); conn.close()
+            # hanya sekali per user & set jawaban, bukan tiap rerun
+            if not result_saved('hybrid', user_id, hasil):
+                db = get_db()
+                db.update_user_fields(user_id, {
+                    "rec_hybrid": list(final_clusters_hybrid),
+                    "top3_sector_hybrid": list(target_sectors),
+                })
+                db.checkpoint("hasil_hybrid")
+                mark_result_saved('hybrid', user_id, hasil)
         except: pass
 
     # NAVIGASI
     col_btn1, col_btn2 = st.columns([1, 1])
     with col_btn1:
         if st.button("🚀 Lanjut ke Summary/Ringkasan & Feedback", type="primary", use_container_width=True):
-            with st.spinner('Loading...'):
-                    time.sleep(2)
             st.session_state['halaman_sekarang'] = "hasil_summary"
             st.rerun()
     with col_btn2:
         if st.button("⏮️ Back to Single", use_container_width=True):
-            with st.spinner('Loading...'):
-                    time.sleep(2)
             st.session_state['halaman_sekarang'] = "hasil_single"
             st.rerun()
 
 
+# ==========================================
+# HASIL REKOMENDASI PER SESSION
+# ==========================================
+def publish_results(method, user_id, clusters, sectors):
+    """
+    Simpan hasil halaman Single/Hybrid ('single'/'hybrid') di session.
+    Dashboard membaca dari sini -> rerun dashboard tanpa query ke database.
+    """
+    store = st.session_state.get('hasil_rekomendasi')
+    if store is None or store.get('user_id') != user_id:
+        store = st.session_state['hasil_rekomendasi'] = {'user_id': user_id}
+    store[method] = {'clusters': list(clusters), 'sectors': list(sectors)}
+
+
+class _UncachedResult(Exception):
+    """Dilempar dari fungsi st.cache_data agar hasilnya tidak disimpan (exception tidak di-cache)."""
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_saved_results(_db, user_id):
+    row = _db.read_user_fields(user_id, ["rec_single", "top3_sector_single", "rec_hybrid", "top3_sector_hybrid"])
+    if row is None:
+        raise _UncachedResult(None)
+    results = {
+        'user_id': user_id,
+        'single': {'clusters': parse_db_list(row['rec_single']), 'sectors': parse_db_list(row['top3_sector_single'])},
+        'hybrid': {'clusters': parse_db_list(row['rec_hybrid']), 'sectors': parse_db_list(row['top3_sector_hybrid'])},
+    }
+    # hasil belum lengkap (Hybrid belum tersimpan) jangan ditahan 60 detik
+    if not results['single']['clusters'] or not results['hybrid']['clusters']:
+        raise _UncachedResult(results)
+    return results
+
+
+def load_saved_results(db, user_id):
+    """
+    Fallback jika session kehilangan hasil: baca dari DB (query berparameter, cache per user_id).
+    Hanya hasil lengkap yang di-cache; user tidak ditemukan / hasil kosong / error DB selalu dibaca ulang.
+    """
+    try:
+        return _cached_saved_results(db, normalize_user_id(user_id))
+    except _UncachedResult as e:
+        return e.value
+
+
+def forget_saved_results(user_id):
+    """Buang cache load_saved_results milik user ini (dipanggil setelah perubahannya dikirim)."""
+    _cached_saved_results.clear(None, normalize_user_id(user_id))
+
+
+def answers_fingerprint(answers):
+    """Hash kanonik jawaban (urut kunci) -> kunci memo hasil pipeline."""
+    items = sorted(answers.items())
+    return hashlib.sha1(json.dumps(items, default=_json_scalar).encode()).hexdigest()
+
+
+def session_pipeline(method, compute, engine):
+    """
+    Hasil pipeline ('single'/'hybrid') di-memo di session, kunci = fingerprint jawaban
+    Part 1 + Part 2. Rerun karena klik widget memakai hasil yang sama; jika jawaban
+    berubah, cek dulu cache lintas session (get_result_cache) sebelum menghitung ulang.
+    """
+    user_input = {**st.session_state.get('temp_answers_1', {}), **st.session_state.get('temp_answers_2', {})}
+    key = answers_fingerprint(user_input)
+    memo = st.session_state.setdefault('hasil_pipeline', {})
+    if method not in memo or memo[method]['fingerprint'] != key:
+        # jawaban identik dari session lain -> pakai hasil dari cache bersama
+        cache = get_result_cache()
+        cache_key = (method, key, get_model_version(engine))
+        result = cache.get(cache_key)
+        if result is None:
+            result = compute(engine, user_input)
+            cache.put(cache_key, result)
+        memo[method] = {**result, 'fingerprint': key}
+    return memo[method]
+
+
+def result_saved(method, user_id, hasil):
+    return st.session_state.get('hasil_tersimpan', {}).get(method) == (user_id, hasil['fingerprint'])
+
+
+def mark_result_saved(method, user_id, hasil):
+    st.session_state.setdefault('hasil_tersimpan', {})[method] = (user_id, hasil['fingerprint'])
+
+
+def get_results(db, user_id):
+    store = st.session_state.get('hasil_rekomendasi')
+    if store and store.get('user_id') == user_id and 'single' in store and 'hybrid' in store:
+        return store
+    return load_saved_results(db, user_id)
+
+
 def render_comparison_dashboard():
     # --- 1. CSS STYLING (Tema Pastel Blue & Responsif) ---
     st.markdown("""
@@ -4034,7 +6850,7 @@ def render_comparison_dashboard():
     </style>
     """, unsafe_allow_html=True)
 
-    scroll_to_here(0, key='summary')
+    scroll_to_top.scroll_to_here(0, key='summary')
 
     st.title("⚖️ Perbandingan Hasil Rekomendasi")
     st.write("⚠️PENTING: Mohon untuk mengisi feedback di akhir halaman ini. Feedback/tanggapan Anda sangat diperlukan dalam menentukan hasil penelitian kami, terkait performa kedua sistem rekomendasi")
@@ -4044,36 +6860,21 @@ def render_comparison_dashboard():
         st.warning("⚠️ User ID tidak ditemukan. Silakan isi profil ulang.")
         return
 
-    # 2. FETCH DATA DARI DATABASE
-    if 'db' not in st.session_state:
-        st.session_state['db'] = DatabaseManager()
-    
-    db = st.session_state['db']
-    conn = db.get_connection()
+    # 2. AMBIL HASIL (dari session; DB hanya jika session kehilangan hasil)
+    db = get_db()
     
-    # Ambil 4 Kolom Penting
-    df = pd.read_sql_query(f"""
-        SELECT rec_single, top3_sector_single, rec_hybrid, top3_sector_hybrid 
-        FROM mst_tbl WHERE user_id = '{user_id}'
-    """, conn)
-    conn.close()
-
-    if df.empty:
+    results = get_results(db, user_id)
+
+    if results is None:
         st.error("Data tidak ditemukan di database.")
         return
 
-    # 3. PARSING DATA (String -> List)
-    row = df.iloc[0]
-    
-    def parse_db_str(s):
-        if not s: return []
-        return [x.strip() for x in s.split(",")]
-
-    final_single = parse_db_str(row['rec_single'])
-    sectors_single = parse_db_str(row['top3_sector_single'])
+    # 3. DATA (List)
+    final_single = results['single']['clusters']
+    sectors_single = results['single']['sectors']
     
-    final_hybrid = parse_db_str(row['rec_hybrid'])
-    sectors_hybrid = parse_db_str(row['top3_sector_hybrid'])
+    final_hybrid = results['hybrid']['clusters']
+    sectors_hybrid = results['hybrid']['sectors']
 
     # Cek Data Kosong
     if not final_single or not final_hybrid:
@@ -4130,16 +6931,12 @@ def render_comparison_dashboard():
     with col_btn1:
         # TOMBOL PINDAH KE HYBRID
         if st.button("⏮️ Back to Single", type="primary", use_container_width=True):
-            with st.spinner('Loading...'):
-                    time.sleep(2)
             st.session_state['halaman_sekarang'] = "hasil_single"
             st.rerun()
 
     with col_btn2:
         # TOMBOL RESET
         if st.button("⏮️ Back to Hybrid", type="primary", use_container_width=True):
-            with st.spinner('Loading...'):
-                    time.sleep(2)
             st.session_state['halaman_sekarang'] = "hasil_hybrid"
             st.rerun()
 
@@ -4151,11 +6948,7 @@ def render_comparison_dashboard():
 def main():
 
     st.set_page_config(page_title="Form Profil", layout="wide")
-    # --- [FIX] INISIALISASI DATABASE DISINI ---
-    # Cek dulu: Apakah 'db' sudah ada di memory streamlit
-    if 'db' not in st.session_state:
-        st.session_state['db'] = DatabaseManager()
-        
+    # DatabaseManager dibuat saat pertama dipakai (get_db), bukan di sini
 
     # Inisialisasi session state (jika belum ada)
     if 'halaman_sekarang' not in st.session_state:
@@ -4185,9 +6978,17 @@ def main():
     elif page == "hasil_summary": 
         render_comparison_dashboard()
 
+    get_startup_timings().first_paint(time.perf_counter() - _SCRIPT_T0)
+
 if __name__ == "__main__":
 
-    main()
+    if "--build-catalog" in sys.argv[1:]:
+        # python app.py --build-catalog : kompilasi deskripsi.xlsx sebelum deploy
+        store = get_description_store()
+        store.get()
+        print(store.stats())
+    else:
+        main()
 
 
 
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch):
+    # deskripsi.xlsx & engine_catalog.json dibaca relatif ke root repo
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture
+def catalog_data():
+    """Isi engine_catalog.json (dict mentah, boleh diubah per test)."""
+    with open(app.ENGINE_CATALOG_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def write_catalog(tmp_path):
+    """Tulis dict katalog ke file sementara & kembalikan path-nya."""
+    path = tmp_path / "engine_catalog.json"
+
+    def write(data):
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def random_answers():
+    """random_answers(engine, n, seed): N set jawaban Likert acak untuk semua soal engine."""
+    def make(engine, n, seed=0):
+        rng = np.random.default_rng(seed)
+        rows = []
+        for i in range(n):
+            # separuh baris condong ke beberapa nilai agar kategori ekstrem ikut teruji
+            p = rng.dirichlet(np.ones(5) * 0.5) if i % 2 else None
+            vals = rng.choice(np.arange(1, 6), size=len(engine.score_items), p=p)
+            rows.append({k: int(v) for k, v in zip(engine.score_items, vals)})
+        return rows
+    return make
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+import app
+
+
+def per_user_single(engine, row):
+    """Pipeline Single per user (tanpa SingleLookupTable) dari kategori & notasi di row."""
+    row = dict(row)
+    rek = engine.rekomendasi_per_domain(row)
+    row.update(engine.create_user_vector(row))
+    jarak_sorted, _ = engine.final_sector(row, rek)
+    row['top3_euclid_qA'] = list(jarak_sorted)[:3]
+    row['cluster_weights_top5_qA'] = engine.cluster_weights_from_top5_qA(row['top3_euclid_qA'])
+    row['cluster_top5_best_qA'], _ = (engine.best_list_cluster_from_weights_qA(row['cluster_weights_top5_qA'])
+                                      if row['cluster_weights_top5_qA'] else ([], []))
+    row['top5_cluster_to_sector_qA'] = engine.top5_clusters_with_sectors_qA(row['top3_euclid_qA'])
+    _, _, names, scores = engine.assign_cluster_with_top5(row)
+    row['top5_clusters_qB'] = names
+    row['top5_clusters_qB_score'] = scores
+    row['cluster_top5_best_qB'] = engine.pick_best_clusters_qB_multi(row)
+    row['final_clusters'] = engine.get_recommended_cluster_refined(row, verbose=False)
+    return row
+
+
+def categorize(engine, answers):
+    """Jawaban mentah -> kategori domain & notasi Big 5 (STEP A & B compute_single_result)."""
+    row = dict(answers)
+    scores_A = engine.domain_cols_score(answers)
+    row['cat_self_efficacy'] = engine.kategori_score(scores_A['self_efficacy'])
+    row['cat_innovativeness'] = engine.kategori_score(scores_A['innovativeness'])
+    row['cat_need_achievement'] = engine.kategori_score(scores_A['need_achievement'])
+    row['cat_loc'] = engine.kategori_loc(scores_A['loc_internal'], scores_A['loc_external'])
+    row.update(engine.big5_notations(engine.calculate_big5_scores(answers)))
+    return row
+
+
+SINGLE_COLUMNS = ("cat_self_efficacy", "cat_innovativeness", "cat_need_achievement", "cat_loc",
+                  "top3_euclid_qA", "cluster_weights_top5_qA", "cluster_top5_best_qA",
+                  "top5_cluster_to_sector_qA", "top5_clusters_qB", "cluster_top5_best_qB", "final_clusters")
+
+
+@pytest.fixture
+def engine():
+    return app.RecommenderEngine()
+
+
+@pytest.fixture
+def skewed_engine(catalog_data, write_catalog):
+    # Bobot non-default: posisi ke-3 paling berat -> beda hasil terlihat jika bobot di-hardcode
+    catalog_data["rank_weights"] = [1, 1, 9]
+    return app.RecommenderEngine(app.load_engine_catalog(write_catalog(catalog_data)))
+
+
+def assert_single_batch_matches_per_user(engine, rows):
+    res = engine.recommend_single_batch(pd.DataFrame(rows))
+    for i, answers in enumerate(rows):
+        exp = per_user_single(engine, categorize(engine, answers))
+        for col in SINGLE_COLUMNS:
+            assert res[col].iloc[i] == exp[col], (i, col)
+
+
+def test_single_batch_matches_per_user(engine, random_answers):
+    assert_single_batch_matches_per_user(engine, random_answers(engine, 300, seed=0))
+
+
+def test_single_batch_follows_rank_weights(skewed_engine, random_answers):
+    assert_single_batch_matches_per_user(skewed_engine, random_answers(skewed_engine, 300, seed=1))
+
+
+def test_rank_weights_longer_than_ranked_columns(catalog_data, write_catalog, random_answers):
+    catalog_data["rank_weights"] = [5, 4, 3, 2, 1, 1, 1]
+    engine = app.RecommenderEngine(app.load_engine_catalog(write_catalog(catalog_data)))
+    assert_single_batch_matches_per_user(engine, random_answers(engine, 100, seed=3))
+
+
+def test_lookup_table_follows_rank_weights(skewed_engine):
+    engine = skewed_engine
+    table = app.SingleLookupTable.build(engine)
+    # satu kode notasi per kode kategori, digeser agar semua notasi Big 5 ikut terlewati
+    for a in range(table.N_A):
+        code = a * table.N_B + (a * 97) % table.N_B
+        exp = per_user_single(engine, table.describe(code))
+        got = table.lookup(code)
+        assert got["top3_euclid_qA"] == exp["top3_euclid_qA"]
+        assert got["final_clusters"] == exp["final_clusters"], table.describe(code)
+
+
+def same(a, b):
+    """Kesamaan nilai batch vs per user; angka float dibandingkan dengan toleransi."""
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, float) or isinstance(b, float):
+        return b == pytest.approx(a)
+    return a == b
+
+
+def assert_hybrid_batch_matches_per_user(engine, rows):
+    res = engine.recommend_hybrid_batch(pd.DataFrame(rows))
+    for i, answers in enumerate(rows):
+        exp = app.compute_hybrid_result(engine, answers)
+        for col in res.columns:
+            if col in exp["row_data"]:
+                assert same(res[col].iloc[i], exp["row_data"][col]), (i, col)
+        assert res["final_clusters_hybrid"].iloc[i] == exp["final_clusters"], i
+
+
+def test_hybrid_batch_matches_per_user(engine, random_answers):
+    assert_hybrid_batch_matches_per_user(engine, random_answers(engine, 60, seed=4))
+
+
+def test_hybrid_batch_follows_rank_weights(skewed_engine, random_answers):
+    assert_hybrid_batch_matches_per_user(skewed_engine, random_answers(skewed_engine, 60, seed=2))
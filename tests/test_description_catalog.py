@@ -0,0 +1,65 @@
+import os
+import shutil
+import zipfile
+
+import numpy as np
+import pytest
+
+import app
+
+
+@pytest.fixture
+def engine():
+    return app.RecommenderEngine()
+
+
+@pytest.fixture
+def make_store(engine, tmp_path):
+    xlsx = str(tmp_path / "deskripsi.xlsx")
+    shutil.copy("deskripsi.xlsx", xlsx)
+
+    def make():
+        return app.DescriptionCatalogStore(
+            xlsx, str(tmp_path / ".deskripsi.catalog.npz"),
+            {"A": engine.likert_text_map, "B": engine.qb_text_mapping}, check_interval=0)
+    return make
+
+
+def test_catalog_file_round_trip(make_store, engine, random_answers):
+    built_store = make_store()
+    built = built_store.get()
+    assert built_store.stats()["builds"] == 1
+
+    loaded_store = make_store()
+    loaded = loaded_store.get()
+    assert loaded_store.stats()["builds"] == 0 and loaded_store.stats()["loads"] == 1
+    assert loaded.version == built.version
+    assert loaded.sectors == built.sectors and loaded.clusters == built.clusters
+
+    # file hanya berisi array numerik & teks JSON (tanpa pickle/objek sklearn)
+    with zipfile.ZipFile(loaded_store.catalog_path) as z:
+        assert sorted(z.namelist()) == ["docs_cluster.npy", "docs_sector.npy", "meta.npy",
+                                        "narratives_A.npy", "narratives_B.npy"]
+    with np.load(loaded_store.catalog_path, allow_pickle=False) as z:
+        assert all(z[k].dtype != object for k in z.files)
+
+    a, b = built.tfidf, loaded.tfidf
+    assert a.vocabulary == b.vocabulary
+    names = list(built.sectors)[:5]
+    text = "saya suka inovasi teknologi dan memimpin tim bisnis baru"
+    assert a.rank(text, "sector", names) == b.rank(text, "sector", names)
+    assert (a.transform([text]) != b.transform([text])).nnz == 0
+    for row in random_answers(engine, 20):
+        for part in ("A", "B"):
+            np.testing.assert_array_equal(a.narrative_vector(row, part), b.narrative_vector(row, part))
+
+
+def test_stale_or_foreign_file_is_rebuilt(make_store):
+    store = make_store()
+    store.get()
+    with open(store.catalog_path, "wb") as f:
+        f.write(b"bukan npz")
+    fresh = make_store()
+    fresh.get()
+    assert fresh.stats()["builds"] == 1
+    assert os.path.getsize(fresh.catalog_path) > 100
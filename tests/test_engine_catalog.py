@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+import app
+
+
+def test_validate_reports_every_problem(catalog_data):
+    catalog_data["rank_weights"] = [5, 0]
+    catalog_data["sector_proto"]["Construction"] = [9, 1, 1, 1]
+    catalog_data["big5_cluster_rules"]["Adaptive Services"] = {"O": "+++", "C": "0"}
+    with pytest.raises(app.EngineCatalogError) as e:
+        app.validate_engine_catalog(catalog_data)
+    text = "\n".join(e.value.problems)
+    assert "rank_weights" in text
+    assert "sector_proto.Construction" in text
+    assert "big5_cluster_rules.Adaptive Services" in text
+
+
+def test_catalog_version_ignores_notes_and_formatting(catalog_data, write_catalog):
+    v1 = app.load_engine_catalog(write_catalog(catalog_data))["catalog_version"]
+    catalog_data.setdefault("notes", {})["test"] = "catatan saja"
+    path = write_catalog(catalog_data)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(catalog_data, f, indent=4)
+    assert app.load_engine_catalog(path)["catalog_version"] == v1
+    catalog_data["rank_weights"] = [5, 4, 2]
+    assert app.load_engine_catalog(write_catalog(catalog_data))["catalog_version"] != v1
+
+
+def test_registry_hot_reload(catalog_data, write_catalog):
+    path = write_catalog(catalog_data)
+    registry = app.EngineRegistry(path, check_interval=0)
+    e1 = registry.get()
+
+    # stempel file berubah tapi isi sama -> engine yang sama
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(catalog_data, f, indent=2)
+    assert registry.get() is e1
+
+    # perubahan nyata -> engine baru, resource per versi terpisah
+    catalog_data["sector_proto"]["Construction"] = [2, 1, 2, 0]
+    write_catalog(catalog_data)
+    os.utime(path, ns=(1, 1))
+    e2 = registry.get()
+    assert e2 is not e1
+    assert e2.sector_proto["Construction"] == (2, 1, 2, 0)
+    assert registry.resource(e1, "x", lambda: "satu") == "satu"
+    assert registry.resource(e2, "x", lambda: "dua") == "dua"
+    assert registry.resource(e1, "x", lambda: "baru") == "satu"
+
+    # katalog tidak valid / JSON rusak -> engine lama tetap dipakai, error dicatat
+    catalog_data["rank_weights"] = []
+    write_catalog(catalog_data)
+    assert registry.get() is e2
+    assert "rank_weights" in registry.stats()["last_error"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{rusak")
+    assert registry.get() is e2
+    assert registry.stats()["failures"] == 2
+
+    # engine read-only
+    with pytest.raises(AttributeError):
+        e2.rules = {}
+
+
+def test_question_keys_follow_catalog_and_question_order(catalog_data, write_catalog):
+    engine = app.RecommenderEngine(app.load_engine_catalog(write_catalog(catalog_data)))
+    assert app._question_keys(engine, "A") == tuple(app.question_bank_A())
+    assert app._question_keys(engine, "B") == tuple(app.question_bank_B())
+
+    # item baru di katalog (belum ada teks soal) -> ikut ditanyakan, di akhir
+    catalog_data["big5"]["openess"].append("OPE-4")
+    engine = app.RecommenderEngine(app.load_engine_catalog(write_catalog(catalog_data)))
+    assert app._question_keys(engine, "B") == tuple(app.question_bank_B()) + ("OPE-4",)
+    assert "OPE-4" not in app._question_keys(engine, "A")
+
+
+def test_session_keeps_pinned_engine_across_hot_reload(catalog_data, write_catalog, monkeypatch):
+    old = app.RecommenderEngine(app.load_engine_catalog(write_catalog(catalog_data)))
+    catalog_data["big5"]["openess"].append("OPE-4")
+    new = app.RecommenderEngine(app.load_engine_catalog(write_catalog(catalog_data)))
+    active = [old]
+    monkeypatch.setattr(app, "get_engine", lambda: active[0])
+    monkeypatch.setattr(app.st, "session_state", {})
+
+    keys_b = app.question_keys("B")      # Part 1 dimulai tanpa pin -> pin engine aktif
+    active[0] = new                       # katalog di-hot reload di tengah kuesioner
+    assert app.question_keys("B") == keys_b and "OPE-4" not in keys_b
+    assert app.session_engine() is old
+
+    app.pin_questionnaire()               # responden baru
+    assert app.session_engine() is new and app.question_keys("B")[-1] == "OPE-4"
@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pyarrow.parquet as pq
+import pytest
+from mysql.connector import FieldType
+
+import app
+
+T0 = datetime(2026, 1, 1)
+FIELD_TYPES = {"user_id": FieldType.LONGLONG, "created_at": FieldType.DATETIME,
+               "updated_at": FieldType.DATETIME, "name": FieldType.VAR_STRING,
+               "INN-CE1": FieldType.TINY, "rec_single": FieldType.JSON}
+
+
+class FakeCursor:
+    """Cursor ala mysql.connector (placeholder %s, description berisi type code) di atas sqlite."""
+    def __init__(self, conn):
+        self._conn = conn
+        self._cur = conn.db.cursor()
+        self.description = None
+
+    def execute(self, sql, params=()):
+        self._conn.queries.append(sql)
+        if sql == "SELECT NOW(6)":
+            # jam server DB = conn.now (datetime, seperti mysql.connector)
+            sql, params = 'SELECT ? AS "now [dt]"', (self._conn.now,)
+        self._cur.execute(sql.replace("%s", "?"), params)
+        if self._cur.description:
+            self.description = [(d[0], FIELD_TYPES.get(d[0], FieldType.VAR_STRING)) for d in self._cur.description]
+
+    def fetchmany(self, n):
+        return self._cur.fetchmany(n)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def close(self):
+        self._cur.close()
+
+
+class FakeConnection:
+    def __init__(self, now):
+        self.now = now
+        self.queries = []
+        self.db = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        self.db.execute("CREATE TABLE mst_tbl (user_id INTEGER PRIMARY KEY, created_at dt, updated_at dt, "
+                        "name TEXT, `INN-CE1` INTEGER, rec_single TEXT)")
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def put(self, user_id, created_at, updated_at, name="x", answer=3, rec=None):
+        self.db.execute("INSERT OR REPLACE INTO mst_tbl VALUES (?, ?, ?, ?, ?, ?)",
+                        (user_id, created_at, updated_at, name, answer, rec))
+
+
+@pytest.fixture(autouse=True)
+def sqlite_datetimes():
+    # stempel waktu disimpan sebagai teks ISO dengan mikrodetik -> urutan teks = urutan waktu
+    sqlite3.register_adapter(datetime, lambda d: d.strftime("%Y-%m-%d %H:%M:%S.%f"))
+    sqlite3.register_converter("dt", lambda b: datetime.strptime(b.decode(), "%Y-%m-%d %H:%M:%S.%f"))
+    yield
+    sqlite3.adapters.pop((datetime, sqlite3.PrepareProtocol), None)
+    sqlite3.converters.pop("DT", None)
+
+
+@pytest.fixture
+def conn():
+    c = FakeConnection(now=T0 + timedelta(days=1))
+    # 3 baris per detik -> seri updated_at dipecah user_id
+    for i in range(1000):
+        ts = T0 + timedelta(seconds=i // 3)
+        rec = json.dumps([f"c{i}", "x"]) if i % 4 else ("a, b" if i % 8 else None)
+        c.put(i * 7 + 3, ts, ts, name=f"n{i}", answer=i % 5 + 1, rec=rec)
+    return c
+
+
+def export(conn, tmp_path, name, **kwargs):
+    path = str(tmp_path / name)
+    result = app.export_users_parquet(conn, path, page_size=128, **kwargs)
+    return result, (pq.read_table(path).to_pandas() if os.path.exists(path) else None)
+
+
+def test_full_export_pages_in_keyset_order(conn, tmp_path):
+    result, df = export(conn, tmp_path, "all.parquet")
+    assert result["rows"] == len(df) == 1000
+    assert df["user_id"].is_unique
+    assert df.sort_values(["updated_at", "user_id"]).index.equals(df.index)
+    assert pq.ParquetFile(tmp_path / "all.parquet").num_row_groups == 8
+    assert list(df["rec_single"].iloc[1]) == ["c1", "x"]
+    assert list(df["rec_single"].iloc[4]) == ["a", "b"]
+    assert df["rec_single"].iloc[0] is None
+    assert not any("OFFSET" in q for q in conn.queries)
+
+
+def test_incremental_export_picks_up_late_and_updated_rows(conn, tmp_path):
+    first, _ = export(conn, tmp_path, "1.parquet")
+
+    # baris ditulis write-behind belakangan: created_at lebih tua dari watermark
+    late = T0 + timedelta(hours=2)
+    conn.put(99999, T0, late, name="telat")
+    # baris lama di-UPDATE (feedback) -> updated_at baru
+    conn.put(10, T0, late + timedelta(seconds=1), name="feedback")
+
+    second, df = export(conn, tmp_path, "2.parquet", since=first["watermark"])
+    assert second["rows"] == 2
+    assert df["name"].tolist() == ["telat", "feedback"]
+
+    third, df = export(conn, tmp_path, "3.parquet", since=second["watermark"])
+    assert third == {"rows": 0, "watermark": second["watermark"]}
+    assert df is None
+
+
+def test_rows_inside_settle_window_wait_for_next_export(conn, tmp_path):
+    now = conn.now
+    conn.put(77777, now, now - timedelta(seconds=1), name="baru")
+    first, df = export(conn, tmp_path, "1.parquet")
+    assert "baru" not in df["name"].tolist()
+
+    conn.now = now + timedelta(seconds=10)
+    second, df = export(conn, tmp_path, "2.parquet", since=first["watermark"])
+    assert df["name"].tolist() == ["baru"]
+
+
+def test_user_id_key_with_filters_and_columns(conn, tmp_path):
+    result, df = export(conn, tmp_path, "f.parquet", key="user_id",
+                        filters={"INN-CE1": (">=", 4)}, columns=["name"])
+    assert df.columns.tolist() == ["user_id", "name"]
+    assert result["rows"] == len(df) == 400
+    assert df["user_id"].is_monotonic_increasing
+    assert result["watermark"] == df["user_id"].iloc[-1]
+
+
+@pytest.mark.parametrize("kwargs", [{"key": "name"}, {"filters": {"name": ("LIKE", "x")}},
+                                    {"filters": {"a`b": 1}}])
+def test_invalid_key_or_filter(conn, tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        export(conn, tmp_path, "x.parquet", **kwargs)
@@ -0,0 +1,175 @@
+import re
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """time.time() tetap -> semua id jatuh di ms yang sama (kecuali sequence habis)."""
+    now = 1_760_000_000.0
+    monkeypatch.setattr(app.time, "time", lambda: now)
+    return int(now * 1000)
+
+
+def parts(user_id):
+    low = app.IdGenerator.sort_key(user_id)
+    return (low >> 17, (low >> 10) & 127, low & 1023)   # (ms sejak epoch, node, sequence)
+
+
+def test_ids_are_monotonic_within_a_node():
+    gen = app.IdGenerator(node_id=3)
+    ids = [gen.next_id() for _ in range(5000)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert {parts(i)[1] for i in ids} == {3}
+    assert abs(app.IdGenerator.created_at(ids[-1]).timestamp() - time.time()) < 5
+
+
+def test_sequence_overflow_borrows_next_millisecond(frozen_clock):
+    gen = app.IdGenerator(node_id=1)
+    ids = [gen.next_id() for _ in range(3 * 1024)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    ms = [parts(i)[0] + app.ID_EPOCH_MS for i in ids]
+    assert ms[:1024] == [frozen_clock] * 1024
+    assert ms[1024:2048] == [frozen_clock + 1] * 1024
+    assert ms[2048:] == [frozen_clock + 2] * 1024
+    assert [parts(i)[2] for i in ids[1020:1028]] == [1020, 1021, 1022, 1023, 0, 1, 2, 3]
+
+
+def test_shard_bits_stay_out_of_sort_key(frozen_clock):
+    plain = app.IdGenerator(node_id=9)
+    sharded = app.IdGenerator(node_id=9, shard_bits=5)
+    ids = [sharded.next_id() for _ in range(100)]
+    assert len({i >> 58 for i in ids}) == 32          # shard round-robin
+    assert all(0 < i < 1 << 63 for i in ids)
+    keys = [app.IdGenerator.sort_key(i) for i in ids]
+    assert keys == sorted(keys) and keys == [plain.next_id() for _ in range(100)]
+    assert app.IdGenerator.created_at(ids[0]) == app.IdGenerator.created_at(keys[0])
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"node_id": 128}, {"node_id": -1}, {"node_id": 0, "shard_bits": 6}, {},
+    {"node_id": 0, "lease": object()},
+])
+def test_invalid_configuration_is_rejected(kwargs):
+    with pytest.raises(ValueError):
+        app.IdGenerator(**kwargs)
+
+
+def test_legacy_hex_ids_match_mysql_conv():
+    # CONV('0000abcd', 16, 10) = 43981
+    assert app.normalize_user_id("0000abcd") == 43981
+    assert app.normalize_user_id("1F2E3D4C") == 0x1F2E3D4C
+    assert app.normalize_user_id("ffffffff") == 2 ** 32 - 1
+    assert app.normalize_user_id(123456789) == 123456789
+    for other in ("user-lama", "abcd", "0000abcdef", "xyz12345"):
+        assert app.normalize_user_id(other) == other
+
+
+class FakeLeaseTable:
+    """Tabel id_node_lease dengan jam database sendiri (detik, bisa dimajukan)."""
+    def __init__(self):
+        self.rows = {}          # node_id -> [owner, expires_at]
+        self.offset = 0.0
+        self.down = False
+
+    def now(self):
+        return time.monotonic() + self.offset
+
+    @contextmanager
+    def connect(self):
+        if self.down:
+            raise OSError("database tidak terjangkau")
+        yield self
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def fetchall(self):
+        return self.result
+
+    def execute(self, sql, params=()):
+        sql, now = " ".join(sql.split()), self.now()
+        if sql.startswith("SELECT node_id"):
+            self.result = [(n,) for n, (_, exp) in self.rows.items() if exp >= now]
+        elif sql.startswith("INSERT IGNORE"):
+            node, owner, us = params
+            self.rowcount = int(node not in self.rows)
+            self.rows.setdefault(node, [owner, now + us / 1e6])
+        elif re.match(r"UPDATE id_node_lease SET owner", sql):
+            owner, us, node = params
+            self.rowcount = int(node in self.rows and self.rows[node][1] < now)
+            if self.rowcount:
+                self.rows[node] = [owner, now + us / 1e6]
+        elif sql.startswith("UPDATE"):
+            us, node, owner = params
+            self.rowcount = int(self.rows.get(node, [None])[0] == owner)
+            if self.rowcount:
+                self.rows[node][1] = now + us / 1e6
+        elif sql.startswith("DELETE"):
+            node, owner = params
+            if self.rows.get(node, [None])[0] == owner:
+                del self.rows[node]
+        else:
+            raise AssertionError(f"SQL tidak dikenal: {sql}")
+
+
+@pytest.fixture
+def table():
+    return FakeLeaseTable()
+
+
+def make_lease(table, owner, ttl=60.0, node_count=4):
+    return app.NodeLease(table.connect, ttl=ttl, owner=owner, node_count=node_count)
+
+
+def test_leases_never_share_a_node(table):
+    leases = [make_lease(table, f"p{i}") for i in range(4)]
+    assert sorted(lease.current() for lease in leases) == [0, 1, 2, 3]
+    with pytest.raises(RuntimeError):
+        make_lease(table, "p4").current()
+
+    freed = leases[2].node_id
+    leases[2].release()
+    assert make_lease(table, "p4").current() == freed
+
+
+def test_expired_lease_of_dead_process_is_reused(table):
+    dead = make_lease(table, "dead", node_count=1)
+    assert dead.current() == 0
+    other = make_lease(table, "other", node_count=1)
+    with pytest.raises(RuntimeError):
+        other.claim()
+    table.offset += 61
+    assert other.current() == 0 and table.rows[0][0] == "other"
+
+
+def test_lost_lease_moves_to_another_node(table):
+    slow = make_lease(table, "slow", ttl=0.2)
+    node = slow.current()
+    table.offset += 1                         # sewa kedaluwarsa di database...
+    table.rows[node] = ["thief", table.now() + 60]   # ...dan node-nya diambil proses lain
+    time.sleep(0.25)                          # sewa lokal habis -> current() memperpanjang dulu
+    moved = slow.current()
+    assert moved != node and table.rows[moved][0] == "slow"
+    assert table.rows[node][0] == "thief"
+
+
+def test_generator_fails_instead_of_guessing_when_lease_cannot_be_renewed(table):
+    lease = make_lease(table, "p", ttl=0.1)
+    gen = app.IdGenerator(lease=lease)
+    first = gen.next_id()
+    assert parts(first)[1] == lease.node_id
+    table.down = True
+    gen.next_id()                             # sewa lokal masih berlaku
+    time.sleep(0.15)
+    with pytest.raises(OSError):
+        gen.next_id()
+    table.down = False
+    assert gen.next_id() > first
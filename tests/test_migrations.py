@@ -0,0 +1,177 @@
+import re
+
+import pytest
+from mysql.connector import errors
+
+import app
+
+
+class FakeSchema:
+    """Skema MySQL minimal (tabel -> kolom/tipe/index/baris) untuk DDL yang dipakai MIGRATIONS."""
+    def __init__(self, fail_at=None):
+        self.tables = {}
+        self.versions = []
+        self.fail_at = fail_at      # nomor DDL/DML ke-n (mulai 1) yang gagal -> migrasi putus di tengah
+        self.executed = 0
+
+    def connect(self):
+        return FakeConnection(self)
+
+    def table(self, name):
+        if name not in self.tables:
+            raise errors.ProgrammingError(msg=f"Table '{name}' doesn't exist")
+        return self.tables[name]
+
+    def snapshot(self):
+        return {name: (dict(t["cols"]), set(t["indexes"]), sorted(r["user_id"] for r in t["rows"]))
+                for name, t in self.tables.items()}
+
+
+class FakeConnection:
+    def __init__(self, schema):
+        self.schema = schema
+
+    def cursor(self):
+        return FakeCursor(self.schema)
+
+    def commit(self):
+        pass
+
+
+def parse_columns(body):
+    cols = dict(re.findall(r"(`[^`]+`|\w+) ([A-Z]+)", body))
+    return {c.strip("`"): t.lower() for c, t in cols.items() if c not in ("KEY", "PRIMARY", "NOT")}
+
+
+class FakeCursor:
+    def __init__(self, schema):
+        self.s = schema
+        self.rows = []
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchone(self):
+        return self.fetchall()[0]
+
+    def execute(self, sql, params=()):
+        s = self.s
+        sql = " ".join(sql.split())
+        self.rows = []
+        if "information_schema" in sql:
+            table, name = params[0], params[-1]
+            t = s.tables.get(table)
+            if "information_schema.TABLES" in sql:
+                self.rows = [(1,)] if t else []
+            elif "information_schema.COLUMNS" in sql:
+                self.rows = [(t["cols"][name].encode(),)] if t and name in t["cols"] else []
+            else:
+                self.rows = [(1,)] if t and name in t["indexes"] else []
+            return
+        if "LOCK(" in sql:
+            self.rows = [(1,)]
+            return
+        if "schema_version" in sql:
+            if sql.startswith("SELECT"):
+                self.rows = [(max(s.versions, default=0),)]
+            elif sql.startswith("INSERT"):
+                s.versions.append(params[0])
+            return
+        if sql.startswith("SELECT t.user_id"):
+            copied = {r["legacy_user_id"] for r in s.table("mst_tbl_v2")["rows"]}
+            self.rows = [(r["user_id"],) for r in s.table("mst_tbl")["rows"] if r["user_id"] not in copied]
+            return
+
+        s.executed += 1
+        if s.executed == s.fail_at:
+            raise errors.DatabaseError(msg=f"gagal di langkah {s.executed}")
+        if m := re.match(r"CREATE TABLE (IF NOT EXISTS )?(\w+)\s*\((.*)\)", sql):
+            if m.group(2) in s.tables:
+                if m.group(1):
+                    return
+                raise errors.ProgrammingError(msg="table exists")
+            s.tables[m.group(2)] = {"cols": parse_columns(m.group(3)), "indexes": set(), "rows": []}
+        elif m := re.match(r"DROP TABLE IF EXISTS (\w+)$", sql):
+            s.tables.pop(m.group(1), None)
+        elif m := re.match(r"INSERT INTO (\w+) .* FROM (\w+) WHERE", sql):
+            src = s.table(m.group(2))["rows"]
+            s.table(m.group(1))["rows"] += [{"user_id": int(r["user_id"], 16), "legacy_user_id": r["user_id"]}
+                                            for r in src if re.fullmatch(r"[0-9a-fA-F]{8}", r["user_id"])]
+        elif m := re.match(r"RENAME TABLE (\w+) TO (\w+), (\w+) TO (\w+)$", sql):
+            if m.group(2) in s.tables or m.group(4) in s.tables and m.group(4) != m.group(1):
+                raise errors.ProgrammingError(msg="table exists")
+            a, b = s.table(m.group(1)), s.table(m.group(3))
+            del s.tables[m.group(1)], s.tables[m.group(3)]
+            s.tables[m.group(2)], s.tables[m.group(4)] = a, b
+        elif m := re.match(r"ALTER TABLE (\w+) (.*)$", sql):
+            self.alter(s.table(m.group(1)), m.group(2))
+        elif m := re.match(r"UPDATE (\w+) SET (\w+) =", sql):
+            if m.group(2) not in s.table(m.group(1))["cols"]:
+                raise errors.ProgrammingError(msg=f"Unknown column {m.group(2)}")
+        else:
+            raise AssertionError(f"SQL tidak dikenal: {sql}")
+
+    def alter(self, t, change):
+        cols = t["cols"]
+        if m := re.match(r"MODIFY (`[^`]+`|\w+) (\w+)", change):
+            name = m.group(1).strip("`")
+            if name not in cols:
+                raise errors.ProgrammingError(msg="Unknown column")
+            cols[name] = m.group(2).lower()
+        elif m := re.match(r"ADD COLUMN (\w+) (\w+)", change):
+            if m.group(1) in cols:
+                raise errors.ProgrammingError(msg=f"Duplicate column name '{m.group(1)}'")
+            cols[m.group(1)] = m.group(2).lower()
+        elif m := re.match(r"DROP COLUMN (\w+)$", change):
+            if cols.pop(m.group(1), None) is None:
+                raise errors.ProgrammingError(msg="Can't DROP column; check that it exists")
+        elif m := re.match(r"CHANGE COLUMN (\w+) (\w+) (\w+)$", change):
+            if m.group(1) not in cols:
+                raise errors.ProgrammingError(msg="Unknown column")
+            del cols[m.group(1)]
+            cols[m.group(2)] = m.group(3).lower()
+        elif m := re.match(r"ADD INDEX (\w+)", change):
+            if m.group(1) in t["indexes"]:
+                raise errors.ProgrammingError(msg=f"Duplicate key name '{m.group(1)}'")
+            t["indexes"].add(m.group(1))
+        else:
+            raise AssertionError(f"ALTER tidak dikenal: {change}")
+
+
+def legacy_schema(fail_at=None):
+    """Skema v1 berisi data lama: id hex 8 digit + beberapa id yang tidak bisa dikonversi."""
+    s = FakeSchema()
+    app._run_migration_step(s.connect().cursor(), app.MIGRATIONS[0][2][0])
+    s.versions.append(1)
+    s.tables["mst_tbl"]["rows"] = [{"user_id": u} for u in ("0000abcd", "1f2e3d4c", "user-lama", "xyz")]
+    s.executed, s.fail_at = 0, fail_at
+    return s
+
+
+def test_migration_reports_rows_left_in_legacy(capsys):
+    s = legacy_schema()
+    assert app.run_migrations(s.connect(), {}) == app.MIGRATIONS[-1][0]
+    out = capsys.readouterr().out
+    assert "2 baris tidak disalin" in out and "'user-lama'" in out and "'xyz'" in out
+    assert sorted(r["user_id"] for r in s.tables["mst_tbl"]["rows"]) == [0xabcd, 0x1f2e3d4c]
+    assert len(s.tables["mst_tbl_legacy"]["rows"]) == 4
+    cols = s.tables["mst_tbl"]["cols"]
+    assert cols["rec_single"] == "json" and "rec_single_json" not in cols
+    assert cols["INN-CE1"] == "tinyint" and cols["updated_at"] == "datetime"
+
+
+def test_failed_migration_resumes_at_every_step():
+    clean = legacy_schema()
+    app.run_migrations(clean.connect(), {})
+    total = clean.executed
+    assert total > 60
+
+    for fail_at in range(1, total + 1):
+        s = legacy_schema(fail_at)
+        with pytest.raises(errors.DatabaseError):
+            app.run_migrations(s.connect(), {})
+        s.fail_at = None
+        assert app.run_migrations(s.connect(), {}) == app.MIGRATIONS[-1][0], fail_at
+        assert s.snapshot() == clean.snapshot(), fail_at
+        assert s.versions == clean.versions
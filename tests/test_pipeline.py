@@ -0,0 +1,41 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def engine():
+    return app.RecommenderEngine()
+
+
+@pytest.fixture
+def no_streamlit_output(monkeypatch):
+    """Gagal jika pipeline menulis ke halaman (hasilnya di-memo & dibagi antar session)."""
+    def fail(*args, **kwargs):
+        raise AssertionError(f"pipeline menulis ke halaman: {args}")
+    for name in ("write", "error", "info", "warning", "success", "markdown"):
+        monkeypatch.setattr(app.st, name, fail)
+
+
+def test_hybrid_refinement_reports_events_through_trace(engine, no_streamlit_output):
+    # semua kandidat tanpa sektor -> fallback ke Initial
+    trace = {}
+    row = {"cluster_top5_best_qA_hybrid": ["X"], "cluster_top3_best_qB_hybrid": ["Y"],
+           "top3_cluster_to_sector_qA_hybrid": {}}
+    assert engine.get_recommended_cluster_refined_hybrid(row, verbose=False, trace=trace) == ["X", "Y"]
+    assert trace == {"fallback": True}
+
+    # sektor user belum tercover -> cluster pelengkap
+    trace = {}
+    row = {"cluster_top5_best_qA_hybrid": ["X", "Z"], "cluster_top3_best_qB_hybrid": ["X"],
+           "top3_cluster_to_sector_qA_hybrid": {"X": ["s1"], "Z": ["s2"]},
+           "top3_tfidf_sector": ["s2"]}
+    assert engine.get_recommended_cluster_refined_hybrid(row, verbose=False, trace=trace) == ["X", "Z"]
+    assert trace == {"pelengkap": "Z"}
+
+
+def test_compute_hybrid_result_is_silent(engine, random_answers, no_streamlit_output):
+    for answers in random_answers(engine, 30, seed=5):
+        hasil = app.compute_hybrid_result(engine, answers)
+        assert hasil["refine_fallback"] in (True, False)
+        assert hasil["refine_pelengkap"] is None or hasil["refine_pelengkap"] in hasil["final_clusters"]
@@ -0,0 +1,186 @@
+import gc
+import threading
+import time
+
+import pytest
+
+import app
+
+
+class FakeConnection:
+    """Koneksi ala mysql.connector: ping/rollback/close + penanda transaksi."""
+    def __init__(self, driver):
+        self.driver = driver
+        self.in_transaction = False
+        self.closed = False
+        self.broken = False
+        self.rollback_fails = False
+
+    def ping(self, reconnect=False):
+        if self.broken:
+            raise OSError("server has gone away")
+
+    def rollback(self):
+        if self.rollback_fails:
+            raise OSError("rollback gagal")
+        self.in_transaction = False
+
+    def cursor(self):
+        return self
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDriver:
+    def __init__(self):
+        self.conns = []
+        self.fail_next = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        with self.lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                raise OSError("connection refused")
+            conn = FakeConnection(self)
+            self.conns.append(conn)
+            return conn
+
+
+@pytest.fixture
+def driver():
+    return FakeDriver()
+
+
+@pytest.fixture
+def make_pool(driver):
+    def make(**kwargs):
+        kwargs = {"max_size": 2, "timeout": 1.0, **kwargs}
+        return app.ConnectionPool(driver.connect, **kwargs)
+    return make
+
+
+def test_connection_is_reused_and_double_close_is_harmless(driver, make_pool):
+    pool = make_pool()
+    with pool.acquire() as conn:
+        first = conn._conn
+        assert conn.cursor() is first
+    conn.close()
+    with pytest.raises(AttributeError):
+        conn.cursor()
+
+    with pool.acquire() as conn:
+        assert conn._conn is first
+    stats = pool.stats()
+    assert (stats["created"], stats["reused"], stats["idle"], stats["open"]) == (1, 1, 1, 1)
+
+
+def test_open_transaction_is_rolled_back_on_release(driver, make_pool):
+    pool = make_pool()
+    conn = pool.acquire()
+    conn._conn.in_transaction = True
+    conn.close()
+    assert driver.conns[0].in_transaction is False
+    assert pool.stats()["idle"] == 1
+
+    # rollback gagal -> koneksi tidak dikembalikan ke pool
+    conn = pool.acquire()
+    conn._conn.in_transaction = True
+    conn._conn.rollback_fails = True
+    conn.close()
+    assert driver.conns[0].closed
+    assert pool.stats()["open"] == 0
+
+
+def test_failed_health_check_replaces_connection(driver, make_pool):
+    pool = make_pool(health_check_after=0.0)
+    pool.acquire().close()
+    driver.conns[0].broken = True
+    time.sleep(0.01)
+    with pool.acquire() as conn:
+        assert conn._conn is driver.conns[1]
+    assert driver.conns[0].closed
+    stats = pool.stats()
+    assert stats["health_failures"] == 1 and stats["created"] == 2 and stats["open"] == 1
+
+
+@pytest.mark.parametrize("kwargs", [{"idle_timeout": 0.05}, {"max_lifetime": 0.05}])
+def test_expired_connection_is_closed(driver, make_pool, kwargs):
+    pool = make_pool(**kwargs)
+    pool.acquire().close()
+    time.sleep(0.1)
+    with pool.acquire() as conn:
+        assert conn._conn is driver.conns[1]
+    assert driver.conns[0].closed
+    assert pool.stats()["closed"] == 1
+
+
+def test_leaked_wrapper_returns_connection(make_pool):
+    pool = make_pool()
+    conn = pool.acquire()
+    del conn
+    gc.collect()
+    stats = pool.stats()
+    assert stats["leaked"] == 1 and stats["idle"] == 1 and stats["in_use"] == 0
+
+
+def test_saturated_pool_times_out(make_pool):
+    pool = make_pool(max_size=1, timeout=0.1)
+    held = pool.acquire()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    assert time.monotonic() - start >= 0.1
+    assert pool.stats()["timeouts"] == 1
+    held.close()
+
+
+def test_waiter_gets_connection_when_released(driver, make_pool):
+    pool = make_pool(max_size=1, timeout=2.0)
+    held = pool.acquire()
+    threading.Timer(0.05, held.close).start()
+    with pool.acquire() as conn:
+        assert conn._conn is driver.conns[0]
+    assert pool.stats()["waits"] >= 1 and pool.stats()["created"] == 1
+
+
+def test_connect_failure_frees_slot(driver, make_pool):
+    pool = make_pool(max_size=1)
+    driver.fail_next = 1
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert pool.stats()["open"] == 0
+    with pool.acquire():
+        pass
+
+
+def test_concurrent_use_never_exceeds_max_size(driver, make_pool):
+    pool = make_pool(max_size=3, timeout=5.0)
+    lock = threading.Lock()
+    active, peak, errors = set(), [0], []
+
+    def worker():
+        try:
+            for _ in range(50):
+                with pool.acquire() as conn:
+                    with lock:
+                        assert id(conn._conn) not in active   # satu koneksi tidak dipinjam dua kali
+                        active.add(id(conn._conn))
+                        peak[0] = max(peak[0], len(active))
+                    time.sleep(0.0005)
+                    with lock:
+                        active.discard(id(conn._conn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    stats = pool.stats()
+    assert peak[0] <= 3 and stats["created"] <= 3
+    assert stats["in_use"] == 0 and stats["idle"] == stats["open"] == len(driver.conns)
+    assert stats["created"] + stats["reused"] == 8 * 50
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+import app
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return app.RecommenderEngine()
+
+
+def test_profile_levels_take_user_categories_and_first_matching_rule(engine):
+    sector = engine.rules["innovativeness"]["mid-high"][0]
+    row = {"cat_innovativeness": "high", "cat_self_efficacy": "mid-low",
+           "cat_need_achievement": "low", "cat_loc": "internal"}
+    user, target = app.profile_levels(engine, row, sector.upper())   # nama sektor tanpa beda huruf
+    assert user == ("high", "mid-low", "low", "internal")
+    assert target == tuple(next((lvl for lvl, sectors in engine.rules[r_key].items() if sector in sectors), "low")
+                           for r_key, _ in app.PROFILE_CHART_ASPECTS)
+    assert target[0] == "mid-high"
+
+    # kategori belum ada / sektor tidak dikenal -> 'low'
+    assert app.profile_levels(engine, {}, "Sektor Tidak Ada") == (("low",) * 4, ("low",) * 4)
+
+
+@pytest.mark.parametrize("variant", sorted(app.PROFILE_CHART_VARIANTS))
+def test_spec_pairs_user_and_target_per_aspect(variant):
+    user = ("high", "mid-low", "low", "internal")
+    target = ("mid-high", "high", "mid-low", "external")
+    spec = app.profile_chart_spec(variant, user, target)
+    values = spec["data"]["values"]
+    labels = app.PROFILE_CHART_VARIANTS[variant]["labels"]
+
+    assert values["Aspek"] == [label for label in labels for _ in range(2)]
+    assert values["Jenis"] == ["1. Anda", "2. Target"] * 4
+    assert values["Level"] == ["High", "Mid-High", "Mid-Low", "High", "Low", "Mid-Low", "Internal", "External"]
+    assert values["Skor"] == [4, 3, 2, 4, 1, 2, 4, 2]
+    assert all(len(column) == 8 for column in values.values())
+    json.dumps(spec)                                  # dikirim apa adanya ke st.vega_lite_chart
+
+
+def test_variant_styles_and_cache_reuse():
+    levels = (("low",) * 4, ("high",) * 4)
+    single = app.profile_chart_spec("single", *levels)
+    hybrid = app.profile_chart_spec("hybrid", *levels)
+    assert app.profile_chart_spec("single", *levels) is single
+
+    bar = single["layer"][0]["encoding"]
+    assert bar["color"]["legend"] == {"title": None, "orient": "bottom"}
+    assert bar["yOffset"]["sort"] == ["1. Anda", "2. Target"]
+    assert "legend" not in hybrid["layer"][0]["encoding"]["color"]
+    assert "sort" not in hybrid["layer"][0]["encoding"]["yOffset"]
+    assert single["layer"][1]["encoding"]["text"] == {"field": "Level", "type": "nominal"}
+    assert single["layer"][1]["mark"]["color"] == "black" and "color" not in hybrid["layer"][1]["mark"]
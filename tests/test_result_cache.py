@@ -0,0 +1,85 @@
+import pickle
+import threading
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(app.time, "time", lambda: now[0])
+    return now
+
+
+def size(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = app.ResultCache(max_entries=2)
+    cache.put(("single", "a"), 1)
+    cache.put(("single", "b"), 2)
+    assert cache.get(("single", "a")) == 1       # a jadi paling baru dipakai
+    cache.put(("single", "c"), 3)
+    assert cache.get(("single", "b")) is None
+    assert cache.get(("single", "a")) == 1 and cache.get(("single", "c")) == 3
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_max_bytes_bounds_memory():
+    value = "x" * 1000
+    cache = app.ResultCache(max_bytes=2 * size(value) + 10)
+    for i in range(3):
+        cache.put(("single", i), value)
+    assert cache.stats()["bytes"] == 2 * size(value)
+    assert cache.get(("single", 0)) is None and cache.get(("single", 2)) == value
+
+    cache.put(("single", "besar"), "y" * 5000)   # lebih besar dari max_bytes -> tidak disimpan
+    assert cache.get(("single", "besar")) is None and cache.stats()["entries"] == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = app.ResultCache(ttl=60)
+    cache.put(("single", "k"), {"a": 1})
+    clock[0] += 59
+    assert cache.get(("single", "k")) == {"a": 1}
+    clock[0] += 2
+    assert cache.get(("single", "k")) is None
+    stats = cache.stats()
+    assert stats["expired"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_each_get_returns_a_copy():
+    cache = app.ResultCache()
+    cache.put(("single", "k"), {"final_clusters": ["A"]})
+    cache.get(("single", "k"))["final_clusters"].append("B")
+    assert cache.get(("single", "k")) == {"final_clusters": ["A"]}
+
+
+def test_disk_tier_is_shared_between_workers(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    worker_1 = app.ResultCache(disk_path=path, ttl=60)
+    worker_2 = app.ResultCache(disk_path=path, ttl=60)
+    worker_1.put(("hybrid", "f", "v1"), {"row_data": [1, 2]})
+
+    assert worker_2.get(("hybrid", "f", "v1")) == {"row_data": [1, 2]}
+    assert worker_2.get(("hybrid", "f", "v1")) == {"row_data": [1, 2]}
+    stats = worker_2.stats()
+    assert (stats["disk_hits"], stats["hits"], stats["entries"]) == (1, 1, 1)
+
+    clock[0] += 61                                # kedaluwarsa juga di tier disk
+    assert app.ResultCache(disk_path=path).get(("hybrid", "f", "v1")) is None
+
+
+def test_memory_hit_does_not_wait_for_disk(tmp_path):
+    cache = app.ResultCache(disk_path=str(tmp_path / "cache.sqlite"))
+    cache.put(("single", "k"), 1)
+    result = []
+    with cache._disk_lock:                        # session lain sedang query SQLite
+        reader = threading.Thread(target=lambda: result.append(cache.get(("single", "k"))))
+        reader.start()
+        reader.join(timeout=2)
+        assert result == [1]
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+import app
+
+
+class FakeDB:
+    """read_user_fields ala DatabaseManager: baris per user_id, hitung jumlah query."""
+    def __init__(self):
+        self.rows = {}
+        self.reads = 0
+
+    def read_user_fields(self, user_id, columns):
+        self.reads += 1
+        row = self.rows.get(user_id)
+        return None if row is None else {c: row.get(c) for c in columns}
+
+
+class FakeQueue:
+    def __init__(self, db):
+        self.db = db
+
+    def enqueue(self, user_id, fields):
+        self.db.rows.setdefault(user_id, {}).update(
+            {k: json.dumps(v) if isinstance(v, list) else v for k, v in fields.items()})
+
+
+@pytest.fixture
+def db():
+    app._cached_saved_results.clear()
+    yield FakeDB()
+    app._cached_saved_results.clear()
+
+
+def complete_row():
+    return {"rec_single": '["A"]', "top3_sector_single": '["S"]',
+            "rec_hybrid": '["B"]', "top3_sector_hybrid": '["T"]'}
+
+
+def test_only_complete_results_are_cached(db):
+    assert app.load_saved_results(db, 1) is None
+    assert app.load_saved_results(db, 1) is None
+    assert db.reads == 2
+
+    db.rows[1] = {**complete_row(), "rec_hybrid": None}
+    assert app.load_saved_results(db, 1)["hybrid"]["clusters"] == []
+    db.rows[1] = complete_row()
+    assert app.load_saved_results(db, 1)["hybrid"]["clusters"] == ["B"]
+    assert app.load_saved_results(db, 1)["hybrid"]["clusters"] == ["B"]
+    assert db.reads == 4
+
+
+def test_legacy_hex_id_shares_cache_entry(db):
+    db.rows[0xabcd] = complete_row()
+    app.load_saved_results(db, 0xabcd)
+    app.load_saved_results(db, "0000abcd")
+    assert db.reads == 1
+
+
+def test_sent_changes_invalidate_only_that_user(db):
+    db.rows[1] = complete_row()
+    db.rows[2] = complete_row()
+    app.load_saved_results(db, 1)
+    app.load_saved_results(db, 2)
+
+    manager = app.DatabaseManager.__new__(app.DatabaseManager)
+    manager.writes = FakeQueue(db)
+    manager.uow = app.UnitOfWork(manager._send)
+    manager.uow.stage(1, {"rec_hybrid": ["C"]})
+    assert app.load_saved_results(db, 1)["hybrid"]["clusters"] == ["B"]   # belum dikirim
+    manager.uow.flush()
+
+    reads = db.reads
+    assert app.load_saved_results(db, 1)["hybrid"]["clusters"] == ["C"]
+    assert app.load_saved_results(db, 2)["hybrid"]["clusters"] == ["B"]
+    assert db.reads == reads + 1
@@ -0,0 +1,79 @@
+import pytest
+
+import app
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return app.RecommenderEngine()
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """st.session_state baru + ResultCache baru (tidak berbagi dengan test lain)."""
+    state = {}
+    monkeypatch.setattr(app.st, "session_state", state)
+    cache = app.ResultCache()
+    monkeypatch.setattr(app, "get_result_cache", lambda: cache)
+    return state
+
+
+@pytest.fixture
+def compute():
+    calls = []
+
+    def run(engine, user_input):
+        calls.append(dict(user_input))
+        return {"final_clusters": [f"C{len(calls)}"], "row_data": dict(user_input)}
+    run.calls = calls
+    return run
+
+
+def answer(state, part_1, part_2):
+    state["temp_answers_1"], state["temp_answers_2"] = dict(part_1), dict(part_2)
+
+
+def test_reruns_reuse_the_memoised_result(engine, session, compute):
+    answer(session, {"SE-M1": 4, "INN-O1": 2}, {"OPE-1": 5})
+    first = app.session_pipeline("single", compute, engine)
+    assert app.session_pipeline("single", compute, engine) is first
+    assert len(compute.calls) == 1
+
+    # urutan kunci tidak mengubah fingerprint
+    answer(session, {"INN-O1": 2, "SE-M1": 4}, {"OPE-1": 5})
+    assert app.session_pipeline("single", compute, engine) is first
+
+    session["temp_answers_2"]["OPE-1"] = 4         # jawaban berubah -> hitung ulang
+    second = app.session_pipeline("single", compute, engine)
+    assert second["fingerprint"] != first["fingerprint"] and len(compute.calls) == 2
+
+    app.session_pipeline("hybrid", compute, engine)  # memo terpisah per metode
+    assert len(compute.calls) == 3
+
+
+def test_identical_answers_in_another_session_hit_shared_cache(engine, session, compute, monkeypatch):
+    answer(session, {"SE-M1": 4}, {"OPE-1": 5})
+    first = app.session_pipeline("single", compute, engine)
+
+    other = {}
+    monkeypatch.setattr(app.st, "session_state", other)
+    answer(other, {"SE-M1": 4}, {"OPE-1": 5})
+    again = app.session_pipeline("single", compute, engine)
+    assert len(compute.calls) == 1
+    assert again == first and again is not first   # salinan sendiri per session
+    again["final_clusters"].append("X")
+    assert first["final_clusters"] == ["C1"]
+
+
+def test_result_is_saved_once_per_user_and_answers(engine, session, compute):
+    answer(session, {"SE-M1": 4}, {"OPE-1": 5})
+    hasil = app.session_pipeline("single", compute, engine)
+    assert not app.result_saved("single", 7, hasil)
+    app.mark_result_saved("single", 7, hasil)
+    assert app.result_saved("single", 7, hasil)
+    assert app.result_saved("single", 7, app.session_pipeline("single", compute, engine))
+
+    assert not app.result_saved("hybrid", 7, hasil)
+    assert not app.result_saved("single", 8, hasil)
+    session["temp_answers_1"]["SE-M1"] = 1
+    assert not app.result_saved("single", 7, app.session_pipeline("single", compute, engine))
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import app
+from test_batch import per_user_single
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return app.RecommenderEngine()
+
+
+@pytest.fixture(scope="module")
+def table(engine):
+    return app.SingleLookupTable.build(engine)
+
+
+def sample_codes(table, per_a=5):
+    """Semua kode kategori, masing-masing dengan beberapa kode notasi tersebar."""
+    return [a * table.N_B + (a * 97 + k * 641) % table.N_B for a in range(table.N_A) for k in range(per_a)]
+
+
+def test_encode_and_describe_round_trip(table):
+    for code in sample_codes(table) + [0, table.N_A * table.N_B - 1]:
+        assert table.encode(table.describe(code)) == code
+    assert table.final.shape[0] == table.N_A * table.N_B
+
+
+def test_lookup_matches_per_user_pipeline(engine, table):
+    for code in sample_codes(table):
+        exp = per_user_single(engine, table.describe(code))
+        got = table.lookup(code)
+        assert got["top3_euclid_qA"] == exp["top3_euclid_qA"]
+        names = [name for name, _ in got["top5_clusters_qB_score"]]
+        assert names[:len(exp["top5_clusters_qB"])] == list(exp["top5_clusters_qB"])
+        assert got["final_clusters"] == exp["final_clusters"], table.describe(code)
+
+
+def test_saved_table_loads_identically(table, tmp_path):
+    path = str(tmp_path / "single_lookup.npz")
+    table.save(path)
+    loaded = app.SingleLookupTable.load(path)
+    assert loaded.labels == table.labels and loaded.sectors == table.sectors
+    assert np.array_equal(loaded.final, table.final)
+    for code in sample_codes(table, per_a=1):
+        assert loaded.lookup(code) == table.lookup(code)
+    assert all(len(codes) == 0 for codes in table.diff(loaded).values())
+
+
+def test_diff_reports_codes_whose_result_changed(table, catalog_data, write_catalog):
+    catalog_data["rank_weights"] = [1, 1, 9]
+    skewed = app.SingleLookupTable.build(
+        app.RecommenderEngine(app.load_engine_catalog(write_catalog(catalog_data))))
+    diff = table.diff(skewed)
+    assert len(diff["cluster_scores"]) == 0            # Part B tidak bergantung rank_weights
+    assert len(diff["final_clusters"]) > 0
+
+    changed = set(diff["final_clusters"].tolist())
+    for code in sample_codes(table):
+        same = table.lookup(code)["final_clusters"] == skewed.lookup(code)["final_clusters"]
+        assert same != (code in changed), table.describe(code)
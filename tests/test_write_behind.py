@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+from mysql.connector import errors
+
+import app
+
+
+class FakeDB:
+    """Tabel {user_id: {kolom: nilai}} di balik koneksi ala mysql.connector (executemany + commit)."""
+    def __init__(self):
+        self.rows = {}
+        self.down = 0          # jumlah commit berikutnya yang gagal (koneksi putus)
+        self.poison = set()    # user_id yang selalu ditolak DB (constraint)
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.staged = {}
+
+    def cursor(self):
+        return self
+
+    def executemany(self, sql, rows):
+        cols = [c.strip("` ") for c in sql.split("(", 1)[1].split(")", 1)[0].split(",")]
+        for row in rows:
+            if row[0] in self.db.poison:
+                raise errors.IntegrityError(msg=f"baris {row[0]} melanggar constraint")
+            self.staged.setdefault(row[0], {}).update(zip(cols[1:], row[1:]))
+
+    def commit(self):
+        with self.db.lock:
+            if self.db.down:
+                self.db.down -= 1
+                raise errors.OperationalError(msg="koneksi putus")
+            self.db.batches.append(sorted(self.staged))
+            for user_id, fields in self.staged.items():
+                self.db.rows.setdefault(user_id, {}).update(fields)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db():
+    return FakeDB()
+
+
+@pytest.fixture
+def make_queue(db, tmp_path):
+    queues = []
+
+    def make(**kwargs):
+        kwargs = {"flush_interval": 0.05, "batch_window": 0.01, "max_backoff": 0.1, **kwargs}
+        q = app.WriteBehindQueue(db.connect, str(tmp_path / "wb.jsonl"), **kwargs)
+        queues.append(q)
+        return q
+    yield make
+    for q in queues:
+        q.close(timeout=1.0)
+
+
+def journal_lines(q):
+    with open(q.journal_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_updates_are_coalesced_and_flushed(db, make_queue):
+    q = make_queue()
+    q.enqueue("u1", {"name": "a"})
+    q.enqueue("u1", {"INN-CE1": np.int64(4), "rec_single": ["X", "Y"]})
+    q.enqueue("u2", {"name": "b"})
+    assert q.pending_for("u1")["INN-CE1"] == 4
+    assert q.flush(5)
+    assert db.rows == {"u1": {"name": "a", "INN-CE1": 4, "rec_single": '["X", "Y"]'},
+                       "u2": {"name": "b"}}
+    assert journal_lines(q) == []
+
+
+def test_invalid_column_is_rejected(make_queue):
+    q = make_queue()
+    with pytest.raises(ValueError):
+        q.enqueue("u1", {"a`b": 1})
+
+
+def test_connection_failure_retries_whole_batch(db, make_queue):
+    q = make_queue(max_attempts=2)
+    db.down = 3
+    q.enqueue("u1", {"name": "a"})
+    q.enqueue("u2", {"name": "b"})
+    assert q.flush(5)
+    assert db.rows == {"u1": {"name": "a"}, "u2": {"name": "b"}}
+    stats = q.stats()
+    assert stats["failures"] == 3 and stats["dead_lettered"] == 0
+
+
+def test_poison_row_goes_to_dead_letter_without_blocking(db, make_queue):
+    q = make_queue(max_attempts=3)
+    db.poison = {"bad"}
+    for i in range(5):
+        q.enqueue(f"u{i}", {"name": str(i)})
+    q.enqueue("bad", {"name": "x"})
+    assert q.flush(5)
+    assert sorted(db.rows) == [f"u{i}" for i in range(5)]
+
+    # tulisan berikutnya tetap jalan
+    q.enqueue("u9", {"name": "9"})
+    assert q.flush(5)
+    assert "u9" in db.rows
+
+    with open(q.dead_letter_path, encoding="utf-8") as f:
+        dead = [json.loads(line) for line in f]
+    assert [(d["u"], d["f"]) for d in dead] == [("bad", {"name": "x"})]
+    assert "constraint" in dead[0]["error"]
+    stats = q.stats()
+    assert stats["dead_lettered"] == 1 and stats["row_failures"] == 3 and stats["retrying"] == 0
+
+
+def test_journal_is_replayed_after_crash(db, make_queue, tmp_path):
+    db.down = 10 ** 6
+    q = make_queue()
+    q.enqueue("u1", {"name": "a"})
+    q.enqueue("u1", {"umur": 30})
+    # crash: thread berhenti tanpa flush, lock lepas (proses mati), journal tertinggal
+    with q._cond:
+        q._stopped = True
+        q._cond.notify_all()
+    q._thread.join()
+    q._journal.write('{"u": "u2", "f": {"na')   # baris terakhir terpotong
+    q._journal.close()
+    q._lock_file.close()
+
+    db.down = 0
+    q2 = make_queue()
+    assert q2.stats()["corrupt_lines"] == 1
+    assert q2.flush(5)
+    assert db.rows == {"u1": {"name": "a", "umur": 30}}
+
+
+def test_journals_are_per_process_and_orphans_are_adopted(db, make_queue, tmp_path):
+    base = str(tmp_path / "wb.jsonl")
+    record = lambda u: json.dumps({"u": u, "f": {"name": u}}) + "\n"
+    # journal proses lain yang masih hidup (lock dipegang) & yang sudah mati (lock bebas)
+    alive, dead = base + ".hostA-1", base + ".hostB-2"
+    for path, user_id in ((alive, "alive"), (dead, "dead"), (base, "legacy")):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(record(user_id))
+    alive_lock = app._lock_journal(alive)
+
+    q = make_queue()
+    assert q.journal_path not in (base, alive, dead)
+    assert q.stats()["adopted_journals"] == 2
+    assert not os.path.exists(dead) and not os.path.exists(base)
+
+    # compact/flush proses ini tidak menyentuh journal proses lain yang masih hidup
+    assert q.flush(5)
+    assert sorted(db.rows) == ["dead", "legacy"]
+    with open(alive, encoding="utf-8") as f:
+        assert f.read() == record("alive")
+
+    # journal sendiri tidak bisa dipakai dua kali
+    with pytest.raises(RuntimeError):
+        make_queue()
+    alive_lock.close()
+
+
+def test_close_removes_empty_journal(make_queue):
+    q = make_queue()
+    q.enqueue("u1", {"name": "a"})
+    q.close()
+    assert not os.path.exists(q.journal_path)
+    assert not os.path.exists(q.journal_path + ".lock")